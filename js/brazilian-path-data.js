@@ -151,5 +151,23 @@
             description: 'Visit CEPOTX, a cooperative that supports small-scale cacao farmers in Pará, Brazil, located in the heart of the Amazon Rainforest. The cooperative provides essential resources, knowledge sharing, and market access to help member farms maintain the highest standards of quality and sustainability. Through CEPOTX, small-scale farmers gain access to regenerative farming practices, quality control systems, and fair trade opportunities. Member farms like Paulo\'s La do Sitio produce award-winning cacao that reflects the unique terroir of the Amazon Rainforest.'
         }
     };
+    
+    // Stop order generated by scripts/optimize_routes.py - do not edit by hand
+    window.BRAZILIAN_PATH_ORDER = [
+        'founderhaus',
+        'fazenda-analuana-bahia',
+        'black-king-ilheus',
+        'fazenda-capelavelha-bahia',
+        'coopercabruca',
+        'fazenda-santa-ana-bahia',
+        'vivi-jesus-do-deus-itacare',
+        'itacare-cultural-experiences',
+        'oscar-bahia',
+        'salvador-colonial-history',
+        'paulo-la-do-sitio-para',
+        'cepotx',
+        'jungle-johnny-amazon-tours',
+        'cargo-boat-manaus-leticia'
+    ];
 })();
 
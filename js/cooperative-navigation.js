@@ -7,6 +7,10 @@
     
     // Wait for data and drift navigation to load
     function initCooperativeNavigation() {
+        // Links rendered at build time by scripts/build_neighbors.py
+        const staticNav = document.getElementById('cooperative-navigation');
+        if (staticNav && staticNav.hasAttribute('data-static-nav')) return;
+        
         if (!window.getDriftNeighbors) {
             setTimeout(initCooperativeNavigation, 100);
             return;
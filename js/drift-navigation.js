@@ -8,6 +8,8 @@
     
     // Get Pacific West Coast Drift order (North to South)
     function getPacificWestCoastDriftOrder() {
+        // Optimized order written by scripts/optimize_routes.py
+        if (window.PACIFIC_PATH_ORDER) return window.PACIFIC_PATH_ORDER.slice();
         if (!window.PARTNERS_DATA) return [];
         
         const westCoastStates = ['Washington', 'Oregon', 'California', 'Arizona'];
@@ -47,7 +49,10 @@
     // Get Brazilian Drift order - includes farms, partners, cooperatives, and experiences
     // This matches the exact order from the Brazilian path page
     function getBrazilianDriftOrder() {
-        // Define the exact order matching the Brazilian path page itinerary
+        // Optimized order written by scripts/optimize_routes.py
+        if (window.BRAZILIAN_PATH_ORDER) return window.BRAZILIAN_PATH_ORDER.slice();
+        
+        // Fallback: the hand-written order from before the route optimizer
         const exactOrder = [
             'founderhaus',                    // Partner - Florianópolis
             'fazenda-capelavelha-bahia',      // Farm - Bahia
@@ -7,6 +7,10 @@
     
     // Wait for data and drift navigation to load
     function initExperienceNavigation() {
+        // Links rendered at build time by scripts/build_neighbors.py
+        const staticNav = document.getElementById('experience-navigation');
+        if (staticNav && staticNav.hasAttribute('data-static-nav')) return;
+        
         if (!window.getDriftNeighbors) {
             setTimeout(initExperienceNavigation, 100);
             return;
@@ -7,6 +7,10 @@
     
     // Wait for drift navigation to load
     function initFarmNavigation() {
+        // Links rendered at build time by scripts/build_neighbors.py
+        const staticNav = document.getElementById('farm-navigation');
+        if (staticNav && staticNav.hasAttribute('data-static-nav')) return;
+        
         if (!window.getDriftNeighbors) {
             setTimeout(initFarmNavigation, 100);
             return;
@@ -61,5 +61,31 @@
             image: '../../assets/partners/headers/winter-desert-gatherings-header.jpg'
         }
     };
+    
+    // Stop order generated by scripts/optimize_routes.py - do not edit by hand
+    window.PACIFIC_PATH_ORDER = [
+        'okanogan-family-barter-faire',
+        'rpm-ninja',
+        'republic-cafe-and-ming-lounge',
+        'prism-percussions',
+        'embodied-blindfold-dance',
+        'sacred-earth-farms',
+        'love-wisdom-power',
+        'the-enchanted-forest-boutique',
+        'green-gulch-farm-zen-center',
+        'edge-and-node-house-of-web3',
+        'love-of-ganesha',
+        'kikis-cocoa',
+        'orbis86',
+        'queen-hippie-gypsy',
+        'miss-tomato',
+        'block71-silicon-valley',
+        'hacker-dojo',
+        'go-ask-alice',
+        'lumin-earth-apothecary',
+        'secrets-of-garden-slo',
+        'slab-city-salvation-mountain',
+        'winter-desert-gatherings'
+    ];
 })();
 
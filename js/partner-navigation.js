@@ -7,6 +7,10 @@
     
     // Wait for partners data and drift navigation to load
     function initPartnerNavigation() {
+        // Links rendered at build time by scripts/build_neighbors.py
+        const staticNav = document.getElementById('partner-navigation');
+        if (staticNav && staticNav.hasAttribute('data-static-nav')) return;
+        
         if (!window.getDriftNeighbors) {
             setTimeout(initPartnerNavigation, 100);
             return;
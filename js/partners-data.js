@@ -1,6 +1,7 @@
 /**
  * Partner location data with coordinates for geographic navigation
- * Used to calculate nearest neighbors for next/previous navigation
+ * Nearest neighbors and next/previous links are precomputed from this data
+ * by scripts/build_neighbors.py (see js/neighbors.json)
  */
 window.PARTNERS_DATA = {
     'okanogan-family-barter-faire': {
@@ -200,111 +201,3 @@ window.PARTNERS_DATA = {
         description: 'Led by Jae Nice, RPM Ninja creates safe creative spaces for music, art, and community in Seattle. Through immersive events, fantasy balls, bazaars, and workshops, they bring together artists, musicians, and community members to celebrate creativity and connection.'
     },
 };
-
-/**
- * Calculate distance between two coordinates using Haversine formula
- * Returns distance in kilometers
- */
-function calculateDistance(lat1, lon1, lat2, lon2) {
-    const R = 6371; // Earth's radius in kilometers
-    const dLat = (lat2 - lat1) * Math.PI / 180;
-    const dLon = (lon2 - lon1) * Math.PI / 180;
-    const a = 
-        Math.sin(dLat / 2) * Math.sin(dLat / 2) +
-        Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
-        Math.sin(dLon / 2) * Math.sin(dLon / 2);
-    const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
-    return R * c;
-}
-
-/**
- * Build a traveling salesman path through all partners
- * Uses greedy nearest neighbor algorithm starting from the westernmost partner
- * Returns an array of slugs in order
- */
-function buildTravelingSalesmanPath() {
-    const allSlugs = Object.keys(window.PARTNERS_DATA);
-    if (allSlugs.length === 0) return [];
-    
-    // Start from the westernmost partner (lowest longitude)
-    let startSlug = allSlugs[0];
-    let minLon = window.PARTNERS_DATA[startSlug].lon;
-    for (const slug of allSlugs) {
-        if (window.PARTNERS_DATA[slug].lon < minLon) {
-            minLon = window.PARTNERS_DATA[slug].lon;
-            startSlug = slug;
-        }
-    }
-    
-    const path = [startSlug];
-    const visited = new Set([startSlug]);
-    
-    // Greedy nearest neighbor: at each step, go to the nearest unvisited partner
-    let currentSlug = startSlug;
-    while (visited.size < allSlugs.length) {
-        let nearestSlug = null;
-        let minDistance = Infinity;
-        
-        for (const slug of allSlugs) {
-            if (visited.has(slug)) continue;
-            
-            const distance = calculateDistance(
-                window.PARTNERS_DATA[currentSlug].lat,
-                window.PARTNERS_DATA[currentSlug].lon,
-                window.PARTNERS_DATA[slug].lat,
-                window.PARTNERS_DATA[slug].lon
-            );
-            
-            if (distance < minDistance) {
-                minDistance = distance;
-                nearestSlug = slug;
-            }
-        }
-        
-        if (nearestSlug) {
-            path.push(nearestSlug);
-            visited.add(nearestSlug);
-            currentSlug = nearestSlug;
-        } else {
-            break; // No more unvisited partners
-        }
-    }
-    
-    return path;
-}
-
-// Cache the path so we don't rebuild it every time
-let cachedPath = null;
-function getTravelingSalesmanPath() {
-    if (!cachedPath) {
-        cachedPath = buildTravelingSalesmanPath();
-    }
-    return cachedPath;
-}
-
-/**
- * Find nearest neighbors for a given partner in the traveling salesman path
- * Returns { previous: partnerData, next: partnerData } or null if not found
- */
-function findNearestNeighbors(currentSlug) {
-    const current = window.PARTNERS_DATA[currentSlug];
-    if (!current) return null;
-    
-    const path = getTravelingSalesmanPath();
-    const currentIndex = path.indexOf(currentSlug);
-    
-    if (currentIndex === -1) return null;
-    
-    // Get previous and next in the path (wrapping around)
-    const prevIndex = currentIndex === 0 ? path.length - 1 : currentIndex - 1;
-    const nextIndex = currentIndex === path.length - 1 ? 0 : currentIndex + 1;
-    
-    return {
-        previous: window.PARTNERS_DATA[path[prevIndex]],
-        next: window.PARTNERS_DATA[path[nextIndex]]
-    };
-}
-
-// Expose function to window for use by partner-navigation.js
-window.findNearestNeighbors = findNearestNeighbors;
-
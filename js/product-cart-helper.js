@@ -25,7 +25,7 @@
               data-product-name="${product.name}"
               data-product-price="${product.price}"
               data-product-image="${product.image}"
-              data-stripe-price-id="${product.stripePriceId}"
+              data-stripe-price-id="${product.stripePriceId || ''}"
               ${style ? `style="${style}"` : ''}>
         ${buttonText}
       </button>
@@ -82,7 +82,7 @@
       button.setAttribute('data-product-name', product.name);
       button.setAttribute('data-product-price', product.price);
       button.setAttribute('data-product-image', product.image);
-      button.setAttribute('data-stripe-price-id', product.stripePriceId);
+      button.setAttribute('data-stripe-price-id', product.stripePriceId || '');
       button.textContent = product.price > 0 ? `Add to Cart - $${product.price.toFixed(2)}` : 'Add to Cart';
       button.style.cssText = 'width: 100%; padding: 0.75rem; background-color: var(--color-primary, #3b3333); color: white; border: none; border-radius: 5px; font-weight: 600; cursor: pointer; transition: background-color 0.3s;';
       
@@ -0,0 +1 @@
+(function(w,L,I,G){var A=w.PRODUCT_LIST,P,k,o;if(!A){w.PRODUCT_LIST=A=L;w.PRODUCT_INDEX=I;w.PRODUCT_CATEGORIES=G;P=w.PRODUCTS={};for(k in I)P[k]=L[I[k]]}else{o=A.length;P=w.PRODUCTS;A.push.apply(A,L);for(k in I){w.PRODUCT_INDEX[k]=I[k]+o;P[k]=L[I[k]]}for(k in G)w.PRODUCT_CATEGORIES[k]=(w.PRODUCT_CATEGORIES[k]||[]).concat(G[k].map(function(i){return i+o}))}w.getProduct=function(d){return w.PRODUCTS[d]||null};w.getAllProducts=function(){return w.PRODUCT_LIST.slice()};w.getProductsByCategory=function(c){return(w.PRODUCT_CATEGORIES[c]||[]).map(function(i){return w.PRODUCT_LIST[i]})}})(window,[{"productId":"ceremonial-cacao-paulo-s-la-do-sitio-farm-200g","name":"Ceremonial Cacao – La do Sitio Farm, Pará Brazil, 2024 (200g)","price":25.0,"weight":7.05,"image":"/assets/images/products/la-do-sitio-farm.jpg","category":"retail"},{"productId":"taste-of-rainforest-caramelized-cacao-beans","name":"Taste of Rainforest - 200 grams Caramelized Cacao Beans","price":25.0,"weight":7.05,"image":"/assets/images/products/taste-of-rainforest.jpeg","category":"retail"},{"productId":"oscar-bahia-ceremonial-cacao-200g","name":"Ceremonial Cacao – Oscar's Farm, Bahia Brazil, 2024 (200g)","price":25.0,"weight":7.05,"image":"/assets/images/products/oscars-farm.jpeg","category":"retail"},{"productId":"8-ounce-organic-cacao-nibs","name":"Amazon Rainforest Regenerative 8 Ounce Organic Cacao Nibs","price":25.0,"weight":8.0,"image":"/assets/images/products/cacao-nibs.jpeg","category":"retail"}],{"ceremonial-cacao-paulo-s-la-do-sitio-farm-200g":0,"taste-of-rainforest-caramelized-cacao-beans":1,"oscar-bahia-ceremonial-cacao-200g":2,"8-ounce-organic-cacao-nibs":3},{"retail":[0,1,2,3]});
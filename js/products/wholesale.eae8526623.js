@@ -0,0 +1 @@
+(function(w,L,I,G){var A=w.PRODUCT_LIST,P,k,o;if(!A){w.PRODUCT_LIST=A=L;w.PRODUCT_INDEX=I;w.PRODUCT_CATEGORIES=G;P=w.PRODUCTS={};for(k in I)P[k]=L[I[k]]}else{o=A.length;P=w.PRODUCTS;A.push.apply(A,L);for(k in I){w.PRODUCT_INDEX[k]=I[k]+o;P[k]=L[I[k]]}for(k in G)w.PRODUCT_CATEGORIES[k]=(w.PRODUCT_CATEGORIES[k]||[]).concat(G[k].map(function(i){return i+o}))}w.getProduct=function(d){return w.PRODUCTS[d]||null};w.getAllProducts=function(){return w.PRODUCT_LIST.slice()};w.getProductsByCategory=function(c){return(w.PRODUCT_CATEGORIES[c]||[]).map(function(i){return w.PRODUCT_LIST[i]})}})(window,[{"productId":"organic-criollo-cacao-beans-oscar-farm","name":"Organic Criollo Cacao Beans - Oscar's 100-Year Farm (per kg)","price":0,"image":"/assets/images/products/oscars-farm.jpeg","category":"wholesale"},{"productId":"organic-hybrid-cacao-beans-jesus-da-deus","name":"Organic Hybrid Cacao Beans - Jesus Da Deus Fazenda (per kg)","price":0,"image":"/assets/images/products/taste-of-rainforest.jpeg","category":"wholesale"},{"productId":"organic-criollo-cacao-nibs-oscar-farm","name":"Organic Criollo Cacao Nibs - Oscar's 100-Year Farm (per kg)","price":0,"image":"/assets/images/products/cacao-nibs.jpeg","category":"wholesale"},{"productId":"premium-organic-cacao-beans-la-do-sitio","name":"Premium Organic Cacao Beans - La do Sitio Farm (per kg)","price":0,"image":"/assets/images/products/la-do-sitio-farm.jpg","category":"wholesale"}],{"organic-criollo-cacao-beans-oscar-farm":0,"organic-hybrid-cacao-beans-jesus-da-deus":1,"organic-criollo-cacao-nibs-oscar-farm":2,"premium-organic-cacao-beans-la-do-sitio":3},{"wholesale":[0,1,2,3]});
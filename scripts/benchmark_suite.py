@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Benchmark the page generators and fixers on synthetic sites
+
+Nothing measured whether a change to extract_blog_content,
+extract_from_html or the navigation fixers made them slower, and the
+site keeps growing. For each size in --sizes (pages) this script:
+1. Generates a synthetic site in a temporary directory. Posts, farms and
+   shipments are copies of the repository's own pages with new slugs,
+   titles and dates. blog/index.html lists every post, and a few posts
+   reference images under assets/raw. The site also gets synthetic Wix
+   exports: raw blog and gathering pages (inline state scripts, Open
+   Graph and JSON-LD metadata, rich-text content, wixstatic images) and a
+   Domains export with one DNS row per page
+2. Runs every target in TARGETS end to end, in a fixed order on the same
+   tree, with its module's BASE_DIR-derived paths pointed at that tree and
+   its output discarded
+3. Splits each run into read, parse, transform, serialize and write time
+   with phase_timer.instrument() (wall and CPU)
+4. Appends the results to .benchmark-history.json and flags a regression
+   when a target is more than --threshold slower than the median of its
+   last BASELINE_RUNS runs at the same size
+
+Exits with status 1 if anything regressed.
+
+Requirements:
+    pip install beautifulsoup4
+
+Usage:
+    python3 scripts/benchmark_suite.py                       # 100 pages, about 20s
+    python3 scripts/benchmark_suite.py --sizes 100 1000 10000  # 1,000 pages take about 4 minutes
+    python3 scripts/benchmark_suite.py --targets fix_blog_nav_links generate_event_pages
+    python3 scripts/benchmark_suite.py --no-save --keep      # don't record, keep the corpus
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import importlib
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager, redirect_stdout
+
+from phase_timer import PHASES, PhaseTimer, instrument
+
+BASE_DIR = Path(__file__).parent.parent
+HISTORY_FILE = BASE_DIR / '.benchmark-history.json'
+
+DEFAULT_SIZES = (100,)
+REGRESSION_THRESHOLD = 0.25
+# Differences below this are noise whatever the ratio
+MIN_REGRESSION_SECONDS = 0.05
+BASELINE_RUNS = 5
+
+# Share of the synthetic pages per section; the rest are shipments
+POST_SHARE = 0.7
+FARM_SHARE = 0.1
+# Raw Wix exports (blogs and gatherings each) per site page
+RAW_SHARE = 0.05
+RAW_IMAGE_POST_EVERY = 10
+
+TEMPLATE_POST = 'post/okanogan-regenerative-cacao-journey/index.html'
+TEMPLATE_FARM = 'farms/oscar-bahia/index.html'
+TEMPLATE_SHIPMENT = 'shipments/agl14/index.html'
+
+WORDS = ('cacao', 'amazon', 'bahia', 'regenerative', 'harvest', 'circle', 'forest', 'ceremony', 'farm',
+         'journey', 'community', 'agroforestry', 'flavor', 'origin', 'family', 'river', 'canopy', 'seed')
+BLOG_CARD_PATTERN = re.compile(r'<article class="blog-card">.*?</article>', re.DOTALL)
+PUBLISHED_PATTERN = re.compile(r'content="[^"]*" property="article:published_time"')
+
+
+def _title(rng, words=5):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def synthetic_wix_page(rng, title, kind, index):
+    """A saved Wix page (blog post or event) with the clutter real exports carry."""
+    media = [f'0e2cde_{rng.getrandbits(128):032x}~mv2.jpg' for _ in range(4)]
+    state = {'siteId': f'{rng.getrandbits(64):016x}', 'routes': {f'/r{i}': {'type': 'page'} for i in range(40)},
+             'widgets': [{'id': f'comp-{i}', 'props': {'text': _title(rng, 8)}} for i in range(60)]}
+    paragraphs = ''.join(f'<p class="font_8"><span>{_title(rng, 30)}.</span></p>' for _ in range(rng.randint(8, 30)))
+    images = ''.join(f'<img src="https://static.wixstatic.com/media/{m}/v1/fill/w_740,h_493,al_c,q_90/{m}" alt="">'
+                     for m in media)
+    date = f'2025-{1 + index % 12:02d}-{1 + index % 28:02d}'
+    json_ld = ''
+    if kind == 'event':
+        json_ld = ('<script type="application/ld+json">' + json.dumps({
+            '@type': 'Event', 'name': title, 'startDate': f'{date}T18:00:00',
+            'location': {'name': f'{_title(rng, 2)} Hall', 'address': {'addressLocality': 'San Francisco'}},
+            'url': f'https://lu.ma/{_slug(title)[:12]}'}) + '</script>')
+    return (f'<!DOCTYPE html><html><head><title>{title} | Agroverse</title>'
+            f'<meta name="description" content="{_title(rng, 20)}">'
+            f'<meta property="og:title" content="{title}">'
+            f'<meta property="og:description" content="{_title(rng, 20)}">'
+            f'<meta property="og:image" content="https://static.wixstatic.com/media/{media[0]}">'
+            f'<meta property="article:published_time" content="{date}T12:00:00Z">'
+            f'<meta property="article:author" content="{_title(rng, 2)}">'
+            f'<script>window.__INITIAL_STATE__ = {json.dumps(state)};</script>'
+            f'<script>{"var w=function(){return 1};" * 400}</script>{json_ld}</head>'
+            f'<body><header><nav><a href="/">Home</a><a href="/blog">Blog</a></nav></header>'
+            f'<main><article><h1>{title}</h1><div data-testid="richTextElement" class="rich-text">'
+            f'{images}{paragraphs}<a href="https://www.eventbrite.com/e/{rng.getrandbits(40)}">RSVP</a>'
+            f'</div></article></main><footer>Agroverse</footer></body></html>')
+
+
+def generate_corpus(root, pages, seed=0):
+    """Write a synthetic site with about pages pages (plus raw exports) under root. Returns section counts."""
+    from parse_wix_domains import synthetic_export
+
+    rng = random.Random(seed)
+    root = Path(root)
+    post_template = (BASE_DIR / TEMPLATE_POST).read_text(encoding='utf-8')
+    farm_template = (BASE_DIR / TEMPLATE_FARM).read_text(encoding='utf-8')
+    shipment_template = (BASE_DIR / TEMPLATE_SHIPMENT).read_text(encoding='utf-8')
+    blog_index = (BASE_DIR / 'blog' / 'index.html').read_text(encoding='utf-8')
+    post_slug = Path(TEMPLATE_POST).parent.name
+    post_title = re.search(r'<h1 class="blog-title">(.*?)</h1>', post_template).group(1)
+
+    posts = int(pages * POST_SHARE)
+    farms = max(2, int(pages * FARM_SHARE))
+    shipments = max(2, pages - posts - farms - 2)
+    raw = max(5, int(pages * RAW_SHARE))
+
+    raw_blogs = root / 'assets' / 'raw' / 'blogs'
+    raw_gatherings = root / 'assets' / 'raw' / 'gatherings'
+    for directory in (raw_blogs, raw_gatherings, root / 'blog', root / 'assets' / 'images'):
+        directory.mkdir(parents=True, exist_ok=True)
+    shutil.copy(BASE_DIR / 'index.html', root / 'index.html')
+
+    cards = []
+    card_template = BLOG_CARD_PATTERN.search(blog_index).group(0)
+    template_card_slug = re.search(r'\.\./post/([^/]+)/', card_template).group(1)
+    template_card_title = re.search(r'<h2 class="blog-card-title">(.*?)</h2>', card_template).group(1)
+    for i in range(posts):
+        title = f'{_title(rng)} {i}'
+        slug = _slug(title)
+        html = post_template.replace(post_slug, slug).replace(post_title, title)
+        html = PUBLISHED_PATTERN.sub(f'content="2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00+00:00" '
+                                     'property="article:published_time"', html)
+        if i % RAW_IMAGE_POST_EVERY == 0:
+            image = f'{slug}_files/photo-{i}.jpg'
+            (raw_blogs / image).parent.mkdir(parents=True, exist_ok=True)
+            (raw_blogs / image).write_bytes(b'\xff\xd8\xff' + bytes(rng.getrandbits(8) for _ in range(512)))
+            html = html.replace('<article class="blog-post">',
+                                f'<article class="blog-post"><img src="../../assets/raw/blogs/{image}" alt="">', 1)
+        (root / 'post' / slug).mkdir(parents=True, exist_ok=True)
+        (root / 'post' / slug / 'index.html').write_text(html, encoding='utf-8')
+        cards.append(card_template.replace(template_card_slug, slug).replace(template_card_title, title))
+
+    matches = list(BLOG_CARD_PATTERN.finditer(blog_index))
+    (root / 'blog' / 'index.html').write_text(
+        blog_index[:matches[0].start()] + '\n'.join(cards) + blog_index[matches[-1].end():], encoding='utf-8')
+
+    for i in range(farms):
+        name = f'{_title(rng, 2)} Farm {i}'
+        html = farm_template.replace('oscar-bahia', f'farm-{i:05d}').replace("Oscar's Farm", name)
+        (root / 'farms' / f'farm-{i:05d}').mkdir(parents=True, exist_ok=True)
+        (root / 'farms' / f'farm-{i:05d}' / 'index.html').write_text(html, encoding='utf-8')
+
+    for i in range(shipments):
+        name = f'agl{100 + i}'
+        html = shipment_template.replace('agl14', name).replace('AGL14', name.upper())
+        (root / 'shipments' / name).mkdir(parents=True, exist_ok=True)
+        (root / 'shipments' / name / 'index.html').write_text(html, encoding='utf-8')
+
+    for i in range(raw):
+        for directory, kind in ((raw_blogs, 'post'), (raw_gatherings, 'event')):
+            title = f'{_title(rng)} {kind} {i}'
+            (directory / f'{title}.html').write_text(synthetic_wix_page(rng, title, kind, i), encoding='utf-8')
+
+    (root / 'assets' / 'raw' / 'wix_domains_export.htm').write_text(synthetic_export(pages), encoding='utf-8')
+    return {'posts': posts, 'farms': farms, 'shipments': shipments, 'raw_exports': 2 * raw}
+
+
+@contextmanager
+def site_root(module, root):
+    """Point module's BASE_DIR and every path under it at root, and run from root."""
+    old_base = getattr(module, 'BASE_DIR', None)
+    saved = {}
+    if old_base is not None:
+        for name, value in vars(module).items():
+            if isinstance(value, Path):
+                try:
+                    saved[name] = (value, Path(root) / value.relative_to(old_base))
+                except ValueError:
+                    continue
+    cwd = os.getcwd()
+    try:
+        for name, (_, new) in saved.items():
+            setattr(module, name, new)
+        os.chdir(root)
+        yield module
+    finally:
+        os.chdir(cwd)
+        for name, (old, _) in saved.items():
+            setattr(module, name, old)
+
+
+def run_generate_event_pages(module, root):
+    """extract_from_html + generate_event_page for every raw gathering export."""
+    for raw_file in sorted(Path(root, 'assets', 'raw', 'gatherings').glob('*.html')):
+        data = module.extract_from_html(raw_file)
+        data['slug'] = _slug(raw_file.stem)
+        out_dir = Path(root, 'event-details-registration', data['slug'])
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / 'index.html', 'w', encoding='utf-8') as f:
+            f.write(module.generate_event_page(data))
+
+
+def run_process_blog_posts(module, root):
+    """extract_blog_content + generate_blog_post_html for every raw blog export."""
+    for raw_file in sorted(module.RAW_BLOGS_DIR.glob('*.html')):
+        data = module.extract_blog_content(raw_file)
+        slug = module.slugify(data['title'])[:100]
+        (module.POSTS_DIR / slug).mkdir(parents=True, exist_ok=True)
+        with open(module.POSTS_DIR / slug / 'index.html', 'w', encoding='utf-8') as f:
+            f.write(module.generate_blog_post_html(data, slug))
+
+
+def run_parse_wix_domains(module, root):
+    module.parse_file(Path(root, 'assets', 'raw', 'wix_domains_export.htm'))
+
+
+def run_main(module, root):
+    module.main()
+
+
+# (name, module, runner) in the order they run on the shared tree.
+# generate_blog_listing rewrites blog/index.html, so it runs after everything that reads the post order.
+TARGETS = (
+    ('process_blog_posts', 'process_blog_posts', run_process_blog_posts),
+    ('generate_event_pages', 'generate_event_pages', run_generate_event_pages),
+    ('add_prev_next_navigation', 'add_prev_next_navigation', run_main),
+    ('fix_blog_nav_links', 'fix_blog_nav_links', run_main),
+    ('fix_farm_navigation', 'fix_farm_navigation', run_main),
+    ('fix_navigation_with_titles', 'fix_navigation_with_titles', run_main),
+    ('update_navigation_consistency', 'update_navigation_consistency', run_main),
+    ('fix_raw_image_references', 'fix_raw_image_references', run_main),
+    ('generate_blog_listing', 'generate_blog_listing', run_main),
+    ('parse_wix_domains', 'parse_wix_domains', run_parse_wix_domains),
+)
+
+
+def run_target(module_name, runner, root):
+    """PhaseTimer for one end-to-end run of a target on the tree at root."""
+    module = importlib.import_module(module_name)
+    timer = PhaseTimer()
+    with site_root(module, root), redirect_stdout(io.StringIO()), timer, instrument(timer):
+        runner(module, root)
+    return timer
+
+
+def load_history(history_file=HISTORY_FILE):
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def find_regressions(history, results, threshold=REGRESSION_THRESHOLD):
+    """[(key, baseline, wall)] for results slower than threshold over the median of their last runs."""
+    regressions = []
+    for key, result in results.items():
+        previous = [run['results'][key]['wall'] for run in history if key in run.get('results', {})]
+        if not previous:
+            continue
+        baseline = statistics.median(previous[-BASELINE_RUNS:])
+        if result['wall'] > baseline * (1 + threshold) and result['wall'] - baseline > MIN_REGRESSION_SECONDS:
+            regressions.append((key, baseline, result['wall']))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, targets=None, threshold=REGRESSION_THRESHOLD, save=True, keep=False,
+        history_file=HISTORY_FILE, seed=0):
+    """Benchmark every target at every size; returns (results, regressions)."""
+    selected = [t for t in TARGETS if not targets or t[0] in targets]
+    results = {}
+    for size in sizes:
+        root = Path(tempfile.mkdtemp(prefix=f'agroverse-bench-{size}-'))
+        start = time.perf_counter()
+        counts = generate_corpus(root, size, seed)
+        print(f"\n📦 {size:,} pages ({', '.join(f'{v:,} {k}' for k, v in counts.items())}) "
+              f"generated in {time.perf_counter() - start:.1f}s")
+        print(f"   {'target':<30} {'wall':>8} {'cpu':>8}  " + ' '.join(f'{p:>9}' for p in PHASES))
+        try:
+            for name, module_name, runner in selected:
+                timer = run_target(module_name, runner, root)
+                results[f'{name}@{size}'] = timer.as_dict()
+                print(f"   {name:<30} {timer.total_wall:>7.2f}s {timer.total_cpu:>7.2f}s  "
+                      + ' '.join(f'{timer.wall[p]:>8.2f}s' for p in PHASES))
+        finally:
+            if keep:
+                print(f"   🔎 Corpus kept in {root}")
+            else:
+                shutil.rmtree(root, ignore_errors=True)
+
+    history = load_history(history_file)
+    regressions = find_regressions(history, results, threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions (more than {threshold:.0%} over the median of recent runs):")
+        for key, baseline, wall in regressions:
+            print(f"   {key}: {baseline:.2f}s → {wall:.2f}s")
+    elif history:
+        print("\n✅ No regressions against recent runs")
+
+    if save:
+        history.append({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        })
+        with open(history_file, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=1)
+        print(f"📋 Results appended to {history_file}")
+    return results, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the page generators and fixers on synthetic sites')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Site sizes in pages')
+    parser.add_argument('--targets', nargs='+', choices=[t[0] for t in TARGETS], help='Only these targets')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Slowdown over the recent median that counts as a regression (0.25 = 25%%)')
+    parser.add_argument('--history', default=str(HISTORY_FILE), help='JSON history file')
+    parser.add_argument('--no-save', action='store_true', help="Don't append this run to the history")
+    parser.add_argument('--keep', action='store_true', help='Keep the generated corpora')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed')
+    args = parser.parse_args()
+
+    try:
+        _, regressions = run(args.sizes, args.targets, args.threshold, not args.no_save, args.keep,
+                             Path(args.history), args.seed)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Embed precomputed "nearby" blocks in partner and event pages
+
+Uses the LocationStore spatial index (location_store.py) to:
+1. Add a "Nearby" block to every partner page listing the partners and
+   gatherings within --radius km
+2. Add a "Partners Nearby" block to every event page under
+   event-details-registration/
+3. Leave pages with nothing nearby without a block (and remove a stale one)
+
+The blocks are plain HTML, so nothing is computed in the browser. Re-run
+after adding partners or events; generate_event_pages.py rewrites event
+pages from scratch, so run this script after it.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python3 scripts/build_nearby.py
+    python3 scripts/build_nearby.py --radius 80 --dry-run
+"""
+
+import os
+import re
+import sys
+import html
+import argparse
+
+from location_store import LocationStore, DEFAULT_RADIUS_KM
+
+MAX_ITEMS = 5
+BLOCK_PATTERN = re.compile(r'<div[^>]*\bdata-nearby=""[^>]*>.*?</div><!-- /nearby -->\n?', re.DOTALL)
+PARTNER_ANCHOR = '<!-- Partner Navigation -->'
+EVENT_ANCHOR = '<div class="event-cta">'
+
+
+def relative_url(target, page):
+    return os.path.relpath(target, page.parent).replace(os.sep, '/')
+
+
+def render_list(page, results):
+    """<ul> of links to nearby places with their distance."""
+    items = []
+    for place, distance in results[:MAX_ITEMS]:
+        href = html.escape(relative_url(place['page'], page), quote=True)
+        name = html.escape(place['name'], quote=False)
+        items.append(f'<li><a href="{href}">{name}</a> <span style="color: var(--color-text-light);">'
+                     f'· {distance:.0f} km</span></li>')
+    return '<ul>' + ''.join(items) + '</ul>'
+
+
+def render_partner_block(page, partners, events):
+    parts = []
+    if partners:
+        parts.append(f'<h4>Partners</h4>{render_list(page, partners)}')
+    if events:
+        parts.append(f'<h4>Gatherings</h4>{render_list(page, events)}')
+    return ('<div class="partner-info nearby-places" data-nearby="" style="margin-top: 3rem;">'
+            f'<h3>Nearby</h3>{"".join(parts)}</div><!-- /nearby -->\n')
+
+
+def render_event_block(page, partners):
+    return ('<div class="event-description nearby-places" data-nearby="" style="margin-top: 2rem;">'
+            f'<h3>Partners Nearby</h3>{render_list(page, partners)}</div><!-- /nearby -->\n')
+
+
+def update_page(page, block, anchor):
+    """Insert, replace or (block=None) remove the nearby block. Returns True if changed."""
+    text = page.read_text(encoding='utf-8')
+    new_text = BLOCK_PATTERN.sub('', text)
+    if block:
+        position = new_text.find(anchor)
+        if position == -1:
+            return False
+        new_text = new_text[:position] + block + new_text[position:]
+    if new_text == text:
+        return False
+    page.write_text(new_text, encoding='utf-8')
+    return True
+
+
+def unique_by_page(results):
+    """Drop repeated pages (events with several identical listings keep one entry)."""
+    seen = set()
+    unique = []
+    for place, distance in results:
+        if place['page'] not in seen:
+            seen.add(place['page'])
+            unique.append((place, distance))
+    return unique
+
+
+def build(radius=DEFAULT_RADIUS_KM, dry_run=False, geocoder=None):
+    store = LocationStore(geocoder)
+    print(f"📍 Indexed {len(store.places)} places")
+    for kind, slug, venue in store.unresolved:
+        print(f"   ⚠️  No coordinates for {kind} {slug} ({venue!r})")
+
+    updated = 0
+    for key, place in sorted(store.places.items()):
+        page = place.get('page')
+        if page is None or not page.exists() or place['kind'] not in ('partner', 'event'):
+            continue
+        partners = [(p, d) for p, d in store.near_place(key, radius, ('partner',))
+                    if p['page'].exists()]
+        if place['kind'] == 'partner':
+            events = unique_by_page(store.near_place(key, radius, ('event',)))
+            block = render_partner_block(page, partners, events) if partners or events else None
+            anchor = PARTNER_ANCHOR
+        else:
+            events = []
+            block = render_event_block(page, partners) if partners else None
+            anchor = EVENT_ANCHOR
+        if dry_run:
+            print(f"   {key}: {len(partners)} partners, {len(events)} gatherings within {radius:g} km")
+            continue
+        if update_page(page, block, anchor):
+            updated += 1
+
+    if dry_run:
+        print("\n🔎 Dry run - pages not written")
+    else:
+        print(f"✅ Updated nearby blocks on {updated} pages")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Embed nearby partners and gatherings in partner and event pages')
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_KM, help='Search radius in km')
+    parser.add_argument('--dry-run', action='store_true', help='Print what each page would list without writing')
+    parser.add_argument('--geocode', action='store_true', help='Geocode unknown event venues over the network')
+    args = parser.parse_args()
+
+    geocoder = None
+    if args.geocode:
+        from geocoding import default_geocoder, load_google_api_key
+        geocoder = default_geocoder(google_api_key=load_google_api_key())
+
+    try:
+        build(radius=args.radius, dry_run=args.dry_run, geocoder=geocoder)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        if geocoder is not None:
+            geocoder.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Precompute geographic neighbours and static prev/next links for stop pages
+
+Partner, farm and cooperative pages used to build their previous/next links
+in the browser from the full js/*-data.js coordinate sets on every view,
+and showed nothing at all without JavaScript. This script:
+1. Loads every partner, farm and cooperative (plus the journey experiences)
+   from js/partners-data.js, js/farms-data.js and the journey path data
+2. Computes all pairwise haversine distances in one vectorized NumPy pass
+   (or a BallTree for very large sets) and writes the k nearest neighbours
+   of every stop to js/neighbors.json
+3. Renders the previous/next links straight into each page's
+   #<type>-navigation container: journey order for stops on the Brazilian
+   or Pacific West Coast journey (as optimize_routes.py writes it into the
+   path data files), and a nearest-neighbour walk for the remaining partners
+4. Marks the containers with data-static-nav so the navigation scripts
+   leave them alone
+
+Re-run after adding a stop or changing coordinates.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python3 scripts/build_neighbors.py
+    python3 scripts/build_neighbors.py --k 5 --dry-run
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from geo_utils import load_js_data, load_js_order, haversine_matrix, nearest_neighbors, greedy_tour
+
+BASE_DIR = Path(__file__).parent.parent
+JS_DIR = BASE_DIR / 'js'
+NEIGHBORS_FILE = JS_DIR / 'neighbors.json'
+DRIFT_NAVIGATION_FILE = JS_DIR / 'drift-navigation.js'
+
+BRAZILIAN_JOURNEY_DIR = BASE_DIR / 'cacao-journeys' / 'brazilian-path'
+PACIFIC_JOURNEY_DIR = BASE_DIR / 'cacao-journeys' / 'pacific-west-coast-path'
+
+DEFAULT_K = 3
+STOP_DIRS = {'partner': 'partners', 'farm': 'farms', 'cooperative': 'cooperatives'}
+# Stop types whose pages carry a #<type>-navigation container
+NAVIGATION_TYPES = ('partner', 'farm', 'cooperative', 'experience')
+# Pacific West Coast drift: partners in these states, north to south
+PACIFIC_STATES = ('washington', 'oregon', 'california', 'arizona')
+# Visited as part of the Slab City experience rather than as a separate stop
+PACIFIC_EXCLUDED = {'the-ponderosa-slab-city'}
+PACIFIC_EXPERIENCES = ('slab-city-salvation-mountain', 'winter-desert-gatherings')
+
+EXACT_ORDER_PATTERN = re.compile(r'const exactOrder = \[(.*?)\];', re.DOTALL)
+
+def load_stops():
+    """Every stop with coordinates: {slug: {name, type, lat, lon, location, page}}."""
+    stops = {}
+
+    def add(slug, data, stop_type, page):
+        if slug in stops or 'lat' not in data or 'lon' not in data:
+            return
+        stops[slug] = {
+            'name': data.get('name', slug),
+            'type': stop_type,
+            'lat': data['lat'],
+            'lon': data['lon'],
+            'location': data.get('location', ''),
+            'page': page,
+        }
+
+    for slug, data in load_js_data(JS_DIR / 'partners-data.js').items():
+        add(slug, data, 'partner', BASE_DIR / 'partners' / slug / 'index.html')
+    for slug, data in load_js_data(JS_DIR / 'farms-data.js').items():
+        add(slug, data, 'farm', BASE_DIR / 'farms' / slug / 'index.html')
+    for journey_dir, data_file in ((BRAZILIAN_JOURNEY_DIR, 'brazilian-path-data.js'),
+                                   (PACIFIC_JOURNEY_DIR, 'pacific-path-data.js')):
+        for slug, data in load_js_data(JS_DIR / data_file).items():
+            stop_type = data.get('type', 'experience')
+            if stop_type in STOP_DIRS:
+                page = BASE_DIR / STOP_DIRS[stop_type] / slug / 'index.html'
+            else:
+                page = (journey_dir / data['url']).resolve()
+            add(slug, data, stop_type, page)
+    return stops
+
+def pacific_partners(stops):
+    """West-coast partners visited on the Pacific journey, north to south."""
+    slugs = [slug for slug, stop in stops.items()
+             if stop['type'] == 'partner'
+             and any(state in stop['location'].lower() for state in PACIFIC_STATES)
+             and slug not in PACIFIC_EXCLUDED]
+    return sorted(slugs, key=lambda slug: -stops[slug]['lat'])
+
+def journey_orders(stops):
+    """
+    Stop order of each journey: [(journey index page, [slugs])].
+
+    Uses the order written by optimize_routes.py into the path data files,
+    falling back to the hand-written order in drift-navigation.js.
+    """
+    pacific = load_js_order(JS_DIR / 'pacific-path-data.js', 'PACIFIC_PATH_ORDER')
+    if pacific is None:
+        pacific = pacific_partners(stops) + [slug for slug in PACIFIC_EXPERIENCES if slug in stops]
+
+    brazilian = load_js_order(JS_DIR / 'brazilian-path-data.js', 'BRAZILIAN_PATH_ORDER')
+    if brazilian is None:
+        match = EXACT_ORDER_PATTERN.search(DRIFT_NAVIGATION_FILE.read_text(encoding='utf-8'))
+        brazilian = re.findall(r"'([\w-]+)'", match.group(1)) if match else []
+
+    return [(PACIFIC_JOURNEY_DIR / 'index.html', [s for s in pacific if s in stops]),
+            (BRAZILIAN_JOURNEY_DIR / 'index.html', [s for s in brazilian if s in stops])]
+
+def compute_neighbors(stops, k):
+    """The k nearest stops of every stop as {slug: [(slug, km), ...]}."""
+    slugs = list(stops)
+    lats = np.array([stops[s]['lat'] for s in slugs])
+    lons = np.array([stops[s]['lon'] for s in slugs])
+    indices, distances = nearest_neighbors(lats, lons, k)
+    return {
+        slug: [(slugs[j], round(float(d), 1)) for j, d in zip(indices[i], distances[i])]
+        for i, slug in enumerate(slugs)
+    }
+
+def geographic_order(stops, slugs):
+    """Nearest-neighbour walk through the given stops, starting from the westernmost."""
+    if not slugs:
+        return []
+    lats = [stops[s]['lat'] for s in slugs]
+    lons = [stops[s]['lon'] for s in slugs]
+    start = int(np.argmin(lons))
+    return [slugs[i] for i in greedy_tour(haversine_matrix(lats, lons), start)]
+
+def relative_url(target, page):
+    return os.path.relpath(target, page.parent).replace(os.sep, '/')
+
+def render_navigation(prefix, page, stops, previous, following):
+    """Previous/next markup, identical to what the navigation scripts generate."""
+    parts = []
+    for slug, direction, label in ((previous, 'previous', '← Previous'), (following, 'next', 'Next →')):
+        if slug:
+            href = html.escape(relative_url(stops[slug]['page'], page), quote=True)
+            name = html.escape(stops[slug]['name'], quote=False)
+            parts.append(f'<a href="{href}" class="{prefix}-nav-link {direction}">'
+                         f'<span class="{prefix}-nav-label">{label}</span>'
+                         f'<span class="{prefix}-nav-name">{name}</span></a>')
+        else:
+            parts.append(f'<div class="{prefix}-nav-link {direction} disabled">'
+                         f'<span class="{prefix}-nav-label">{label}</span>'
+                         f'<span class="{prefix}-nav-name">—</span></div>')
+    return ''.join(parts)
+
+def container_pattern(prefix):
+    """The #<prefix>-navigation container, rendered (with end marker) or not."""
+    return re.compile(
+        r'<div[^>]*\bid="%(p)s-navigation"[^>]*>(?:.*?</div><!-- /%(p)s-navigation -->|.*?</div>)' % {'p': prefix},
+        re.DOTALL,
+    )
+
+def update_page(page, prefix, stops, previous, following, journey_page=None):
+    """Write static navigation (and the journey back link) into one page. Returns True if changed."""
+    text = page.read_text(encoding='utf-8')
+    inner = render_navigation(prefix, page, stops, previous, following)
+    container = (f'<div class="{prefix}-navigation" id="{prefix}-navigation" data-static-nav="">'
+                 f'{inner}</div><!-- /{prefix}-navigation -->')
+    new_text, count = container_pattern(prefix).subn(lambda m: container, text, count=1)
+    if not count:
+        return False
+    if journey_page is not None:
+        back_link = f'<a class="back-link" href="{relative_url(journey_page, page)}">Back to Journey</a>'
+        new_text = re.sub(r'<a class="back-link" href="[^"]*">[^<]*</a>', lambda m: back_link, new_text, count=1)
+    if new_text == text:
+        return False
+    page.write_text(new_text, encoding='utf-8')
+    return True
+
+def navigation_plan(stops):
+    """(slug, previous, next, journey page) for every stop page."""
+    plan = {}
+    for journey_page, order in journey_orders(stops):
+        for i, slug in enumerate(order):
+            if slug in plan:
+                continue  # a stop on both journeys keeps its first (Pacific) neighbours
+            plan[slug] = (order[i - 1] if i > 0 else None,
+                          order[i + 1] if i < len(order) - 1 else None,
+                          journey_page)
+    others = [slug for slug, stop in stops.items() if stop['type'] == 'partner' and slug not in plan]
+    tour = geographic_order(stops, others)
+    for i, slug in enumerate(tour):
+        plan[slug] = (tour[i - 1] if i > 0 else None,
+                      tour[i + 1] if i < len(tour) - 1 else None,
+                      None)
+    return plan
+
+def build(k=DEFAULT_K, dry_run=False):
+    stops = load_stops()
+    print(f"📍 Loaded {len(stops)} stops")
+
+    neighbors = compute_neighbors(stops, k)
+    payload = {
+        slug: {
+            'name': stop['name'],
+            'type': stop['type'],
+            'url': stop['page'].resolve().relative_to(BASE_DIR.resolve()).as_posix(),
+            'nearest': neighbors[slug],
+        }
+        for slug, stop in stops.items()
+    }
+    content = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True) + '\n'
+
+    updated = 0
+    for slug, (previous, following, journey_page) in navigation_plan(stops).items():
+        stop = stops[slug]
+        if stop['type'] not in NAVIGATION_TYPES or not stop['page'].exists():
+            continue
+        if dry_run:
+            print(f"   {slug}: ← {previous or '—'} | {following or '—'} →")
+            continue
+        # Experience pages live inside their journey and already link back to it
+        if stop['type'] == 'experience':
+            journey_page = None
+        if update_page(stop['page'], stop['type'], stops, previous, following, journey_page):
+            updated += 1
+
+    if dry_run:
+        print(f"\n🔎 Dry run - {NEIGHBORS_FILE.name} and pages not written")
+        return payload
+
+    if not NEIGHBORS_FILE.exists() or NEIGHBORS_FILE.read_text(encoding='utf-8') != content:
+        NEIGHBORS_FILE.write_text(content, encoding='utf-8')
+    print(f"✅ Wrote {NEIGHBORS_FILE.relative_to(BASE_DIR)} ({k} nearest per stop, {len(content):,} bytes)")
+    print(f"✅ Updated navigation on {updated} pages")
+    return payload
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute nearest neighbours and static prev/next links')
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help='Neighbours per stop in neighbors.json')
+    parser.add_argument('--dry-run', action='store_true', help='Print the navigation plan without writing')
+    args = parser.parse_args()
+
+    try:
+        build(k=args.k, dry_run=args.dry_run)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Build the browser product catalog from products_catalog.json
+
+products_catalog.json is the canonical product source. This script:
+1. Validates the catalog (unique ids, required fields, numeric prices/weights)
+2. Writes a minified js/products.js containing only the fields the browser
+   uses, with a prebuilt id -> index lookup and category -> indices lookup;
+   local image paths get the ?v=<content hash> recorded in asset-manifest.json
+   by fingerprint_assets.py, so run that first
+3. Writes a content-hashed copy (js/products.<hash>.js) plus one slice per
+   category (js/products/<category>.<hash>.js) so product pages can load
+   only the products they show
+4. Writes js/products.manifest.json mapping logical names to hashed files
+5. Points HTML <script src> references to js/products.js at the hashed copy
+
+The same catalog is read by generate_facebook_feed.py.
+
+Usage:
+    python3 scripts/build_products_catalog.py
+    python3 scripts/build_products_catalog.py --no-rewrite-html
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+CATALOG_FILE = BASE_DIR / 'products_catalog.json'
+JS_DIR = BASE_DIR / 'js'
+PRODUCTS_JS_FILE = JS_DIR / 'products.js'
+SLICES_DIR = JS_DIR / 'products'
+MANIFEST_FILE = JS_DIR / 'products.manifest.json'
+ASSET_MANIFEST_FILE = BASE_DIR / 'asset-manifest.json'
+
+# Fields read by cart.js, add-to-cart.js and product-cart-helper.js
+BROWSER_FIELDS = ['productId', 'name', 'price', 'weight', 'image', 'category', 'stripePriceId']
+REQUIRED_FIELDS = ['productId', 'name', 'price', 'category']
+
+HASH_LENGTH = 10
+HASHED_NAME_PATTERN = re.compile(r'^products\.[0-9a-f]{%d}\.js$' % HASH_LENGTH)
+SCRIPT_REF_PATTERN = re.compile(r'((?:^|["\'/])js/)products(?:\.[0-9a-f]{%d})?\.js' % HASH_LENGTH)
+
+# Loader shared by the full catalog and the category slices. The first file
+# loaded installs its prebuilt lists as-is; later slices are appended with
+# their indices shifted, so any combination of files can be loaded.
+RUNTIME_TEMPLATE = (
+    '(function(w,L,I,G){var A=w.PRODUCT_LIST,P,k,o;'
+    'if(!A){w.PRODUCT_LIST=A=L;w.PRODUCT_INDEX=I;w.PRODUCT_CATEGORIES=G;P=w.PRODUCTS={};'
+    'for(k in I)P[k]=L[I[k]]}'
+    'else{o=A.length;P=w.PRODUCTS;A.push.apply(A,L);'
+    'for(k in I){w.PRODUCT_INDEX[k]=I[k]+o;P[k]=L[I[k]]}'
+    'for(k in G)w.PRODUCT_CATEGORIES[k]=(w.PRODUCT_CATEGORIES[k]||[]).concat('
+    'G[k].map(function(i){return i+o}))}'
+    'w.getProduct=function(d){return w.PRODUCTS[d]||null};'
+    'w.getAllProducts=function(){return w.PRODUCT_LIST.slice()};'
+    'w.getProductsByCategory=function(c){'
+    'return(w.PRODUCT_CATEGORIES[c]||[]).map(function(i){return w.PRODUCT_LIST[i]})}'
+    '})(window,%s,%s,%s);\n'
+)
+
+def load_catalog(catalog_file=CATALOG_FILE):
+    """Load and validate the canonical product list."""
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        products = json.load(f)['products']
+
+    errors = []
+    seen = set()
+    for i, product in enumerate(products):
+        product_id = product.get('productId')
+        for field in REQUIRED_FIELDS:
+            if field not in product:
+                errors.append(f"product #{i} ({product_id or '?'}): missing '{field}'")
+        if product_id in seen:
+            errors.append(f"product #{i}: duplicate productId '{product_id}'")
+        seen.add(product_id)
+        for field in ('price', 'weight'):
+            if field in product and not isinstance(product[field], (int, float)):
+                errors.append(f"product #{i} ({product_id}): '{field}' must be a number")
+
+    if errors:
+        raise ValueError("Invalid product catalog:\n  " + "\n  ".join(errors))
+    return products
+
+def load_asset_versions(manifest_file=ASSET_MANIFEST_FILE):
+    """{site path: version} from fingerprint_assets.py, or {} before the first fingerprint run."""
+    if not manifest_file.exists():
+        return {}
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def versioned_url(url, asset_versions):
+    """A local asset URL with its ?v=<content hash>; external and unknown URLs are returned as-is."""
+    if re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', url, re.IGNORECASE):
+        return url
+    path = url.split('?')[0]
+    version = asset_versions.get(path.lstrip('/'))
+    return f"{path}?v={version}" if version else url
+
+def browser_product(product, asset_versions=None):
+    """Strip a catalog entry down to the fields the browser reads (empty values dropped)."""
+    fields = {field: product[field] for field in BROWSER_FIELDS
+              if field in product and product[field] not in ('', None)}
+    if asset_versions and 'image' in fields:
+        fields['image'] = versioned_url(fields['image'], asset_versions)
+    return fields
+
+def compact_json(value):
+    """Minified JSON that is also a valid JS literal."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def render_runtime(products, asset_versions=None):
+    """Render the minified loader for a list of catalog entries."""
+    product_list = [browser_product(p, asset_versions) for p in products]
+    index = {p['productId']: i for i, p in enumerate(product_list)}
+    categories = {}
+    for i, p in enumerate(product_list):
+        categories.setdefault(p['category'], []).append(i)
+    return RUNTIME_TEMPLATE % (compact_json(product_list), compact_json(index), compact_json(categories))
+
+def content_hash(content):
+    """Short content hash used in file names."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+def write_if_changed(path, content):
+    """Write a file only when its content differs. Returns True if written."""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+    return True
+
+def remove_stale(directory, keep, pattern):
+    """Delete previously generated hashed files that are no longer current."""
+    removed = []
+    if not directory.exists():
+        return removed
+    for path in directory.iterdir():
+        if path.is_file() and pattern.match(path.name) and path.name not in keep:
+            path.unlink()
+            removed.append(path)
+    return removed
+
+def rewrite_html_references(hashed_name):
+    """Point <script src=".../js/products.js"> references at the hashed file."""
+    target = hashed_name[:-len('.js')]
+    updated = []
+    for html_file in BASE_DIR.rglob('*.html'):
+        if 'node_modules' in html_file.parts:
+            continue
+        content = html_file.read_text(encoding='utf-8')
+        if 'products' not in content:
+            continue
+        new_content = _rewrite_script_srcs(content, target)
+        if new_content != content:
+            html_file.write_text(new_content, encoding='utf-8')
+            updated.append(html_file)
+    return updated
+
+def _rewrite_script_srcs(content, target):
+    """Rewrite products script references inside <script src> attributes only."""
+    def replace_tag(match):
+        return SCRIPT_REF_PATTERN.sub(lambda m: m.group(1) + target + '.js', match.group(0))
+    return re.sub(r'<script\b[^>]*\bsrc=["\'][^"\']*["\'][^>]*>', replace_tag, content)
+
+def build_catalog(rewrite_html=True):
+    """Build all catalog artifacts. Returns the manifest dict."""
+    products = load_catalog()
+    print(f"📦 Loaded {len(products)} products from {CATALOG_FILE.name}")
+    asset_versions = load_asset_versions()
+    if not asset_versions:
+        print(f"   ⚠️  No {ASSET_MANIFEST_FILE.name}; image paths are not versioned "
+              f"(run fingerprint_assets.py first)")
+
+    runtime = render_runtime(products, asset_versions)
+    runtime_hash = content_hash(runtime)
+    hashed_name = f"products.{runtime_hash}.js"
+
+    header = "/* Generated by scripts/build_products_catalog.py from products_catalog.json - do not edit */\n"
+    written = []
+    if write_if_changed(PRODUCTS_JS_FILE, header + runtime):
+        written.append(PRODUCTS_JS_FILE)
+    if write_if_changed(JS_DIR / hashed_name, runtime):
+        written.append(JS_DIR / hashed_name)
+
+    # Per-category slices
+    by_category = {}
+    for product in products:
+        by_category.setdefault(product['category'], []).append(product)
+
+    category_files = {}
+    for category, category_products in sorted(by_category.items()):
+        slice_runtime = render_runtime(category_products, asset_versions)
+        slice_name = f"{category}.{content_hash(slice_runtime)}.js"
+        if write_if_changed(SLICES_DIR / slice_name, slice_runtime):
+            written.append(SLICES_DIR / slice_name)
+        category_files[category] = f"products/{slice_name}"
+
+    removed = remove_stale(JS_DIR, {hashed_name}, HASHED_NAME_PATTERN)
+    slice_pattern = re.compile(r'^[\w-]+\.[0-9a-f]{%d}\.js$' % HASH_LENGTH)
+    removed += remove_stale(SLICES_DIR, {Path(f).name for f in category_files.values()}, slice_pattern)
+
+    manifest = {
+        'products.js': hashed_name,
+        'categories': category_files,
+    }
+    if write_if_changed(MANIFEST_FILE, json.dumps(manifest, indent=2, sort_keys=True) + '\n'):
+        written.append(MANIFEST_FILE)
+
+    for path in written:
+        print(f"   ✅ Wrote {path.relative_to(BASE_DIR)}")
+    for path in removed:
+        print(f"   🗑️  Removed stale {path.relative_to(BASE_DIR)}")
+    if not written and not removed:
+        print("   ⏭️  All catalog artifacts are up to date")
+
+    if rewrite_html:
+        for html_file in rewrite_html_references(hashed_name):
+            print(f"   🔗 Updated script reference in {html_file.relative_to(BASE_DIR)}")
+
+    print(f"\n✅ Catalog runtime: {len(runtime)} bytes → js/{hashed_name}")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description='Build js/products.js from products_catalog.json')
+    parser.add_argument('--no-rewrite-html', action='store_true',
+                        help='Do not point HTML script tags at the hashed catalog file')
+    args = parser.parse_args()
+
+    try:
+        build_catalog(rewrite_html=not args.no_rewrite_html)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Bundle the js/*.js scripts each page loads into shared bundles
+
+Pages load up to a dozen separate scripts from js/ (config.js, cart.js,
+cart-ui.js, universal-nav.js, ...). This script:
+1. Scans every HTML page for runs of adjacent local <script src="...js/...">
+   tags
+2. Groups the runs of every page type (post, partners, farms, ...) by the
+   ordered list of scripts they load
+3. Concatenates and minifies each distinct script list into
+   js/bundles/bundle.<hash>.js - named by content only, so page types that
+   load the same scripts share one cached file
+4. Replaces each run with a single bundle tag that records the original
+   src values in a data-bundle attribute, so the bundler can be re-run
+   after editing any js/*.js file and --unbundle can restore the original
+   tags in place
+5. Optionally writes a v3 source map next to each bundle (--source-map)
+
+Scripts with async/defer/type attributes, inline scripts and external URLs
+are left untouched. A run only spans tags separated by whitespace, so a
+bundle never moves a script past a stylesheet, comment or other markup.
+Re-run this after build_products_catalog.py so bundles pick up the current
+hashed catalog.
+
+Usage:
+    python3 scripts/bundle_js.py              # bundle and rewrite pages
+    python3 scripts/bundle_js.py --dry-run    # show what would be bundled
+    python3 scripts/bundle_js.py --source-map # also write .map files
+    python3 scripts/bundle_js.py --unbundle   # restore individual <script> tags
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+JS_DIR = BASE_DIR / 'js'
+BUNDLES_DIR = JS_DIR / 'bundles'
+MANIFEST_FILE = BUNDLES_DIR / 'manifest.json'
+
+HASH_LENGTH = 10
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script'}
+
+SCRIPT_TAG_PATTERN = re.compile(r'<script\b([^>]*)>\s*</script>[ \t]*\n?', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'([\w-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+BUNDLE_NAME_PATTERN = re.compile(r'^[\w-]+\.[0-9a-f]{%d}\.js(\.map)?$' % HASH_LENGTH)
+TRAILING_SPACE_PATTERN = re.compile(r'[ \t]*\n?$')
+
+# Characters after which a "/" starts a regex literal rather than a division
+REGEX_PREFIX_CHARS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_PREFIX_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void',
+                      'yield', 'await', 'delete', 'throw', 'new', 'instanceof'}
+# Spaces next to these characters can always be dropped
+TIGHT_CHARS = set('{}()[];,:=<>!&|?')
+
+BASE64_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# ---------------------------------------------------------------------------
+# Minification
+# ---------------------------------------------------------------------------
+
+class _MinifyOutput:
+    """Collects minified lines and the source position each one starts at."""
+
+    def __init__(self):
+        self.lines = []
+        self.positions = []
+        self.current = []
+        self.current_pos = None
+        # True when the current line continues a string or template literal,
+        # whose leading whitespace is content and must be kept
+        self.continues_literal = False
+
+    def emit(self, ch, pos):
+        if self.current_pos is None:
+            self.current_pos = pos
+        self.current.append(ch)
+
+    def space(self):
+        if self.current and self.current[-1] != ' ':
+            self.current.append(' ')
+
+    def last_char(self):
+        for ch in reversed(self.current):
+            if ch != ' ':
+                return ch
+        for line in reversed(self.lines):
+            if line:
+                return line[-1]
+        return ''
+
+    def last_word(self):
+        text = ''.join(self.current).rstrip()
+        match = re.search(r'([A-Za-z_$][\w$]*)$', text)
+        return match.group(1) if match else ''
+
+    def newline(self, force=False):
+        text = ''.join(self.current)
+        if not force:
+            text = text.rstrip(' ') if self.continues_literal else text.strip(' ')
+        if text or force or self.continues_literal:
+            self.lines.append(text)
+            self.positions.append(self.current_pos or (0, 0))
+        self.current = []
+        self.current_pos = None
+        self.continues_literal = force
+
+    def finish(self):
+        self.newline()
+        return self.lines, self.positions
+
+
+def minify_js(source):
+    """
+    Conservatively minify JavaScript.
+
+    Removes comments, indentation, blank lines and redundant spaces around
+    punctuation, but keeps line breaks so automatic semicolon insertion
+    behaves exactly as in the original. Returns (lines, positions) where
+    positions[i] is the (line, column) in the source that output line i
+    starts at, for source maps.
+    """
+    out = _MinifyOutput()
+    i = 0
+    n = len(source)
+    line = 0
+    col = 0
+    # Stack of open template literals; each entry is the brace depth at which
+    # the current ${ ... } expression returns to the template
+    template_stack = []
+    brace_depth = 0
+
+    def advance(count=1):
+        nonlocal i, line, col
+        for _ in range(count):
+            if source[i] == '\n':
+                line += 1
+                col = 0
+            else:
+                col += 1
+            i += 1
+
+    def copy_template():
+        """Copy template literal text up to the closing backtick or a ${."""
+        nonlocal brace_depth
+        while i < n:
+            ch = source[i]
+            if ch == '\\':
+                out.emit(ch, (line, col))
+                advance()
+                if i < n:
+                    if source[i] == '\n':
+                        out.newline(force=True)
+                    else:
+                        out.emit(source[i], (line, col))
+                    advance()
+                continue
+            if ch == '`':
+                out.emit(ch, (line, col))
+                advance()
+                template_stack.pop()
+                return
+            if ch == '$' and i + 1 < n and source[i + 1] == '{':
+                out.emit('$', (line, col))
+                advance()
+                out.emit('{', (line, col))
+                advance()
+                brace_depth += 1
+                return
+            if ch == '\n':
+                out.newline(force=True)
+            else:
+                out.emit(ch, (line, col))
+            advance()
+
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+
+        # Comments
+        if ch == '/' and nxt == '/':
+            while i < n and source[i] != '\n':
+                advance()
+            continue
+        if ch == '/' and nxt == '*':
+            advance(2)
+            had_newline = False
+            while i < n and not (source[i] == '*' and i + 1 < n and source[i + 1] == '/'):
+                had_newline = had_newline or source[i] == '\n'
+                advance()
+            advance(2)
+            if had_newline:
+                out.newline()
+            else:
+                out.space()
+            continue
+
+        # Whitespace
+        if ch == '\n':
+            out.newline()
+            advance()
+            continue
+        if ch in ' \t\r\f\v':
+            while i < n and source[i] in ' \t\r\f\v':
+                advance()
+            prev = out.last_char()
+            following = source[i] if i < n else ''
+            if out.current and prev not in TIGHT_CHARS and following not in TIGHT_CHARS and following != '\n':
+                out.space()
+            continue
+
+        if ch in TIGHT_CHARS and out.current and out.current[-1] == ' ':
+            out.current.pop()
+
+        # String literals
+        if ch in '"\'':
+            quote = ch
+            out.emit(ch, (line, col))
+            advance()
+            while i < n and source[i] != quote:
+                if source[i] == '\\':
+                    out.emit(source[i], (line, col))
+                    advance()
+                    if i < n and source[i] == '\n':
+                        out.newline(force=True)
+                        advance()
+                        continue
+                if i < n:
+                    out.emit(source[i], (line, col))
+                    advance()
+            if i < n:
+                out.emit(quote, (line, col))
+                advance()
+            continue
+
+        # Template literals and ${ } expressions
+        if ch == '`':
+            out.emit(ch, (line, col))
+            advance()
+            template_stack.append(brace_depth)
+            copy_template()
+            continue
+        if ch == '{':
+            brace_depth += 1
+        elif ch == '}':
+            brace_depth -= 1
+            if template_stack and brace_depth == template_stack[-1]:
+                out.emit(ch, (line, col))
+                advance()
+                copy_template()
+                continue
+
+        # Regex literals
+        if ch == '/':
+            prev = out.last_char()
+            if not prev or prev in REGEX_PREFIX_CHARS or out.last_word() in REGEX_PREFIX_WORDS:
+                out.emit(ch, (line, col))
+                advance()
+                in_class = False
+                while i < n and source[i] != '\n':
+                    c = source[i]
+                    out.emit(c, (line, col))
+                    advance()
+                    if c == '\\' and i < n:
+                        out.emit(source[i], (line, col))
+                        advance()
+                    elif c == '[':
+                        in_class = True
+                    elif c == ']':
+                        in_class = False
+                    elif c == '/' and not in_class:
+                        break
+                continue
+
+        out.emit(ch, (line, col))
+        advance()
+
+    return out.finish()
+
+# ---------------------------------------------------------------------------
+# Source maps
+# ---------------------------------------------------------------------------
+
+def encode_vlq(value):
+    """Base64 VLQ encoding used by source maps."""
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit = value & 0x1F
+        value >>= 5
+        if value:
+            digit |= 0x20
+        encoded += BASE64_CHARS[digit]
+        if not value:
+            return encoded
+
+
+def build_source_map(bundle_name, sources, line_sources):
+    """
+    Build a v3 source map with one segment per generated line.
+
+    line_sources has one (source_index, source_line, source_column) entry per
+    generated line, or None for lines that do not map to a source.
+    """
+    mappings = []
+    prev_source = prev_line = prev_col = 0
+    for entry in line_sources:
+        if entry is None:
+            mappings.append('')
+            continue
+        source_index, source_line, source_col = entry
+        mappings.append(
+            encode_vlq(0)
+            + encode_vlq(source_index - prev_source)
+            + encode_vlq(source_line - prev_line)
+            + encode_vlq(source_col - prev_col)
+        )
+        prev_source, prev_line, prev_col = source_index, source_line, source_col
+    return {
+        'version': 3,
+        'file': bundle_name,
+        'sources': sources,
+        'names': [],
+        'mappings': ';'.join(mappings),
+    }
+
+# ---------------------------------------------------------------------------
+# Page analysis
+# ---------------------------------------------------------------------------
+
+def find_pages():
+    """All HTML pages served by the site."""
+    pages = []
+    for html_file in sorted(BASE_DIR.rglob('*.html')):
+        relative = html_file.relative_to(BASE_DIR)
+        if EXCLUDED_DIRS.intersection(relative.parts):
+            continue
+        pages.append(html_file)
+    return pages
+
+
+def page_type(page):
+    """Page type is the top-level directory; top-level pages are 'root'."""
+    parts = page.relative_to(BASE_DIR).parts
+    return parts[0] if len(parts) > 1 else 'root'
+
+
+def parse_attrs(attr_text):
+    """Parse tag attributes into a dict (valueless attributes map to '')."""
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(attr_text):
+        value = match.group(2) or match.group(3) or match.group(4) or ''
+        attrs[match.group(1).lower()] = value
+    return attrs
+
+
+def resolve_script(page, src):
+    """Resolve a script src relative to its page; None unless it is a local js/ file."""
+    if re.match(r'^(?:[a-z]+:)?//', src, re.IGNORECASE) or src.startswith('data:'):
+        return None
+    src = src.split('?')[0].split('#')[0]
+    if src.startswith('/'):
+        path = (BASE_DIR / src.lstrip('/')).resolve()
+    else:
+        path = (page.parent / src).resolve()
+    try:
+        path.relative_to(JS_DIR.resolve())
+    except ValueError:
+        return None
+    if BUNDLES_DIR.resolve() in path.parents:
+        return None
+    return path
+
+
+def collect_page_segments(page, html):
+    """
+    Find the bundleable script tags in a page, split into segments.
+
+    A segment is a run of bundleable tags separated only by whitespace, so
+    replacing it with one bundle tag moves nothing past other scripts or
+    markup. Returns a list of (matches, srcs, sources) tuples: srcs are the
+    original src values in order, sources the resolved files not already
+    loaded earlier on the page. Tags previously written by this bundler
+    are expanded back into their recorded src values.
+    """
+    segments = []
+    matches = []
+    srcs = []
+    sources = []
+    seen = set()
+    for match in re.finditer(r'<script\b([^>]*)>', html, re.IGNORECASE):
+        tag = SCRIPT_TAG_PATTERN.match(html, match.start())
+        attrs = parse_attrs(match.group(1))
+        if 'data-bundle' in attrs:
+            tag_srcs = attrs['data-bundle'].split()
+        elif set(attrs) == {'src'}:
+            tag_srcs = [attrs['src']]
+        else:
+            tag_srcs = []
+        resolved = [resolve_script(page, src) for src in tag_srcs]
+        bundleable = tag and resolved and all(path is not None for path in resolved)
+        # Any other script, or anything but whitespace since the last tag, closes the segment
+        if matches and (not bundleable or html[matches[-1].end():match.start()].strip()):
+            segments.append((matches, srcs, sources))
+            matches, srcs, sources = [], [], []
+        if not bundleable:
+            continue
+        matches.append(tag)
+        srcs.extend(tag_srcs)
+        for path in resolved:
+            if path not in seen:
+                seen.add(path)
+                sources.append(path)
+    if matches:
+        segments.append((matches, srcs, sources))
+    return segments
+
+
+def relative_url(target, start_dir):
+    """Relative URL from a directory to a file, always with forward slashes."""
+    return os.path.relpath(target, start_dir).replace(os.sep, '/')
+
+
+def line_indent(html, position):
+    """Whitespace between the start of the line and position ('' if there is other text)."""
+    indent = html[html.rfind('\n', 0, position) + 1:position]
+    return indent if not indent.strip() else ''
+
+
+def replace_segments(html, replacements):
+    """
+    Rewrite a page given (matches, replacement) pairs.
+
+    Each segment (its tags and the whitespace between them) is replaced
+    where it stood; the line break after the last tag is kept.
+    """
+    pieces = []
+    last = 0
+    for matches, replacement in sorted(replacements, key=lambda r: r[0][0].start()):
+        trailing = TRAILING_SPACE_PATTERN.search(matches[-1].group(0)).group(0)
+        pieces.append(html[last:matches[0].start()])
+        pieces.append(replacement + trailing)
+        last = matches[-1].end()
+    pieces.append(html[last:])
+    return ''.join(pieces)
+
+# ---------------------------------------------------------------------------
+# Bundling
+# ---------------------------------------------------------------------------
+
+def render_bundle(sources, source_map=False):
+    """Concatenate and minify sources. Returns (file name, content, source map or None)."""
+    lines = []
+    line_sources = []
+    for source_index, path in enumerate(sources):
+        minified, positions = minify_js(path.read_text(encoding='utf-8'))
+        # A leading ';' guards against files that omit their final semicolon
+        lines.append(';')
+        line_sources.append(None)
+        lines.extend(minified)
+        line_sources.extend((source_index, pos[0], pos[1]) for pos in positions)
+    content = '\n'.join(lines) + '\n'
+    name = f"bundle.{hashlib.sha256(content.encode('utf-8')).hexdigest()[:HASH_LENGTH]}.js"
+
+    if not source_map:
+        return name, content, None
+    map_sources = [relative_url(path, BUNDLES_DIR) for path in sources]
+    source_map_data = build_source_map(name, map_sources, line_sources)
+    content += f"//# sourceMappingURL={name}.map\n"
+    return name, content, source_map_data
+
+
+def bundle_pages(dry_run=False, source_map=False):
+    """Bundle every page's scripts and rewrite the pages."""
+    pages = find_pages()
+    print(f"🔍 Scanning {len(pages)} pages for local scripts...")
+
+    groups = {}
+    page_scripts = {}
+    for page in pages:
+        html = page.read_text(encoding='utf-8')
+        segments = []
+        for matches, srcs, sources in collect_page_segments(page, html):
+            if not sources:
+                # Every script in this run was already loaded earlier on the page; leave it as it is
+                continue
+            key = tuple(sources)
+            groups.setdefault(key, []).append(page)
+            segments.append((matches, srcs, key))
+        if segments:
+            page_scripts[page] = (html, segments)
+
+    print(f"   Found {len(page_scripts)} pages using {len(groups)} distinct script sets\n")
+
+    bundles = {}
+    manifest = {}
+    for sources in sorted(groups, key=lambda k: (len(k), [relative_url(path, JS_DIR) for path in k])):
+        name, content, map_data = render_bundle(list(sources), source_map)
+        original_bytes = sum(path.stat().st_size for path in sources)
+        page_types = sorted({page_type(page) for page in groups[sources]})
+        bundles[sources] = name
+        manifest[name] = {
+            'page_types': page_types,
+            'sources': [relative_url(path, JS_DIR) for path in sources],
+            'pages': [relative_url(page, BASE_DIR) for page in groups[sources]],
+        }
+        print(f"📦 {name}: {len(sources)} scripts, {len(groups[sources])} pages "
+              f"({', '.join(page_types)}), {original_bytes:,} → {len(content.encode('utf-8')):,} bytes")
+        if dry_run:
+            continue
+        BUNDLES_DIR.mkdir(parents=True, exist_ok=True)
+        bundle_path = BUNDLES_DIR / name
+        if not bundle_path.exists() or bundle_path.read_text(encoding='utf-8') != content:
+            bundle_path.write_text(content, encoding='utf-8')
+        map_path = BUNDLES_DIR / f"{name}.map"
+        if map_data:
+            map_path.write_text(json.dumps(map_data, separators=(',', ':')), encoding='utf-8')
+
+    if dry_run:
+        print("\n🔎 Dry run - no files written")
+        return manifest
+
+    updated = 0
+    for page, (html, segments) in page_scripts.items():
+        page_dir = page.parent
+        replacements = []
+        for matches, srcs, key in segments:
+            bundle_src = relative_url(BUNDLES_DIR / bundles[key], page_dir)
+            tag = f'<script src="{bundle_src}" data-bundle="{" ".join(srcs)}"></script>'
+            replacements.append((matches, tag))
+        new_html = replace_segments(html, replacements)
+        if new_html != html:
+            page.write_text(new_html, encoding='utf-8')
+            updated += 1
+
+    # Drop bundles (and maps) that no page references any more
+    keep = set(manifest) | ({f"{name}.map" for name in manifest} if source_map else set())
+    for path in BUNDLES_DIR.iterdir():
+        if BUNDLE_NAME_PATTERN.match(path.name) and path.name not in keep:
+            path.unlink()
+            print(f"   🗑️  Removed stale {relative_url(path, BASE_DIR)}")
+
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+    print(f"\n✅ Updated {updated} pages, {len(manifest)} bundles in {relative_url(BUNDLES_DIR, BASE_DIR)}/")
+    return manifest
+
+
+def unbundle_pages():
+    """Replace bundle tags with the individual script tags they were built from, one per line."""
+    updated = 0
+    for page in find_pages():
+        html = page.read_text(encoding='utf-8')
+
+        def expand(match):
+            attrs = parse_attrs(match.group(1))
+            if 'data-bundle' not in attrs:
+                return match.group(0)
+            separator = '\n' + line_indent(html, match.start())
+            trailing = TRAILING_SPACE_PATTERN.search(match.group(0)).group(0)
+            return separator.join(f'<script src="{src}"></script>' for src in attrs['data-bundle'].split()) + trailing
+
+        new_html = SCRIPT_TAG_PATTERN.sub(expand, html)
+        if new_html != html:
+            page.write_text(new_html, encoding='utf-8')
+            updated += 1
+    print(f"✅ Restored individual script tags in {updated} pages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bundle js/*.js into per-page-type bundles')
+    parser.add_argument('--dry-run', action='store_true', help='Report bundles without writing anything')
+    parser.add_argument('--source-map', action='store_true', help='Write a .map file next to each bundle')
+    parser.add_argument('--unbundle', action='store_true', help='Restore the original <script> tags')
+    args = parser.parse_args()
+
+    if args.unbundle:
+        unbundle_pages()
+        return
+    try:
+        bundle_pages(dry_run=args.dry_run, source_map=args.source_map)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
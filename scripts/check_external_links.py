@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Check the external links and images on the site
+
+Pages link out to wixstatic images, Eventbrite/lu.ma RSVP pages (from
+generate_event_pages.py), partner websites and CDNs, and many of those
+have rotted. This script:
+1. Collects every http(s) href/src/srcset/poster on the site, with the
+   pages and lines that use it (site_index.extract_references)
+2. Checks each URL once with asyncio: HEAD first, falling back to GET
+   (headers only) when the server rejects HEAD, following up to
+   MAX_REDIRECTS redirects, with at most --per-host requests in flight per
+   host and --concurrency overall
+3. Caches the results in .external-links-cache.json for --cache-ttl
+   seconds; transient failures (timeouts, 429, 5xx) are never cached
+4. Prints the dead and failing URLs and optionally writes a JSON report
+5. With --rewrite-images, points dead image src/srcset/poster values at a
+   local copy when the repository has one (matched by Wix media id, then by
+   file name); og:image and other <meta> copies keep the absolute URL
+
+A URL is dead on 404/410, an unknown host or a refused connection.
+StubHttpServer answers every request locally (as an HTTP proxy), so
+--stub runs the whole check offline:
+
+    python3 scripts/check_external_links.py --stub --stub-dead wixstatic
+
+Usage:
+    python3 scripts/check_external_links.py
+    python3 scripts/check_external_links.py --report external-links.json
+    python3 scripts/check_external_links.py --rewrite-images --dry-run
+    python3 scripts/check_external_links.py --refresh --per-host 2
+"""
+
+import re
+import ssl
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import posixpath
+import threading
+from urllib.parse import urljoin, urlsplit, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from site_index import BASE_DIR, SiteIndex, extract_references, replace_references
+from profiling import profiled
+
+CACHE_FILE = BASE_DIR / '.external-links-cache.json'
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_TIMEOUT = 10
+MAX_REDIRECTS = 5
+USER_AGENT = 'Mozilla/5.0 (compatible; agroverse-link-check)'
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+DEAD_STATUSES = {404, 410}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg')
+IMAGE_ATTRIBUTES = ('src', 'srcset', 'poster')
+PRECONNECT_PATTERN = re.compile(
+    r'<link\b[^>]*\brel\s*=\s*["\'](?:preconnect|dns-prefetch)["\'][^>]*>', re.IGNORECASE)
+HREF_PATTERN = re.compile(r'\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+WIX_MEDIA_ID_PATTERN = re.compile(r'([0-9a-f]{6}_[0-9a-f]{32})', re.IGNORECASE)
+
+SSL_CONTEXT = ssl.create_default_context()
+
+
+def is_image(url, attribute):
+    path = urlsplit(url).path.lower()
+    return attribute in IMAGE_ATTRIBUTES and (
+        path.endswith(IMAGE_EXTENSIONS) or '/media/' in path and 'wixstatic' in url)
+
+
+def collect_external_urls(index):
+    """{url: {'image': bool, 'uses': [(page, line, attribute)]}} in first-seen order."""
+    urls = {}
+    for page in index.pages:
+        html = (index.root / page).read_text(encoding='utf-8', errors='replace')
+        preconnects = {m.group(1) for tag in PRECONNECT_PATTERN.finditer(html)
+                       for m in [HREF_PATTERN.search(tag.group(0))] if m}
+        references, _ = extract_references(html)
+        for attribute, url, line in references:
+            if not url.lower().startswith(('http://', 'https://')) or '{' in url or url in preconnects:
+                continue
+            entry = urls.setdefault(url, {'image': False, 'uses': []})
+            entry['image'] = entry['image'] or is_image(url, attribute)
+            entry['uses'].append((page, line, attribute))
+    return urls
+
+
+async def fetch_status(url, method, timeout, proxy=None):
+    """(status, Location header) for one request; only the response headers are read."""
+    parts = urlsplit(url)
+    https = parts.scheme == 'https'
+    host = parts.hostname
+    port = parts.port or (443 if https else 80)
+    if proxy:
+        connect_host, connect_port, tls, target = proxy[0], proxy[1], None, url
+    else:
+        connect_host, connect_port, tls = host, port, SSL_CONTEXT if https else None
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    host_header = host if parts.port is None else f'{host}:{parts.port}'
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(
+            connect_host, connect_port, ssl=tls, server_hostname=host if tls else None)
+        try:
+            writer.write((f'{method} {target} HTTP/1.1\r\nHost: {host_header}\r\n'
+                          f'User-Agent: {USER_AGENT}\r\nAccept: */*\r\nConnection: close\r\n\r\n').encode('latin-1'))
+            await writer.drain()
+            status_line = (await reader.readline()).decode('latin-1').split()
+            if len(status_line) < 2 or not status_line[1].isdigit():
+                raise ConnectionError(f"malformed status line from {host}")
+            location = None
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'location':
+                    location = value.strip()
+            return int(status_line[1]), location
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+def classify_error(error):
+    """'dead' for failures that will not fix themselves, 'error' for the rest."""
+    if isinstance(error, (socket.gaierror, ConnectionRefusedError)):
+        return 'dead'
+    return 'error'
+
+
+class ExternalLinkChecker:
+    """Checks URLs concurrently with a global and a per-host limit on requests in flight."""
+
+    def __init__(self, concurrency=20, per_host=4, timeout=DEFAULT_TIMEOUT, proxy=None):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.proxy = proxy
+        self.requests = 0
+        self._global = None
+        self._concurrency = concurrency
+        self._hosts = {}
+
+    async def _request(self, url, method):
+        host = urlsplit(url).hostname
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        async with self._hosts[host], self._global:
+            self.requests += 1
+            return await fetch_status(url, method, self.timeout, self.proxy)
+
+    async def check(self, url):
+        """Result dict: url, status, state ('ok', 'dead' or 'error'), final_url, redirects, error."""
+        result = {'url': url, 'status': None, 'state': 'error', 'final_url': url, 'redirects': 0, 'error': None}
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            answer = None
+            for method in ('HEAD', 'GET'):
+                try:
+                    answer = await self._request(current, method)
+                except (OSError, asyncio.TimeoutError, ssl.SSLError, ValueError) as e:
+                    error = e
+                    continue
+                if answer[0] < 400:
+                    break
+            if answer is None:
+                result['error'] = f"{type(error).__name__}: {error}".rstrip(': ')
+                result['state'] = classify_error(error)
+                return result
+            status, location = answer
+            result['status'] = status
+            result['final_url'] = current
+            if status in REDIRECT_STATUSES and location:
+                current = urljoin(current, location)
+                result['redirects'] += 1
+                continue
+            break
+        else:
+            result['error'] = f"more than {MAX_REDIRECTS} redirects"
+            result['state'] = 'error'
+            return result
+        if status < 400:
+            result['state'] = 'ok'
+        elif status in DEAD_STATUSES:
+            result['state'] = 'dead'
+        else:
+            result['state'] = 'error'
+        return result
+
+    async def check_all(self, urls):
+        self._global = asyncio.Semaphore(self._concurrency)
+        return await asyncio.gather(*(self.check(url) for url in urls))
+
+
+def load_cache(cache_file=CACHE_FILE):
+    """Cached results by URL (empty if the cache is missing or unreadable)."""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def local_copies(index):
+    """({wix media id: file}, {file name: file}) for the images in the repository."""
+    by_media_id = {}
+    by_name = {}
+    duplicates = set()
+    for path in sorted(index.files):
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        name = posixpath.basename(path)
+        match = WIX_MEDIA_ID_PATTERN.search(name)
+        if match:
+            by_media_id.setdefault(match.group(1).lower(), path)
+        if name.lower() in by_name:
+            duplicates.add(name.lower())
+        by_name[name.lower()] = path
+    return by_media_id, {name: path for name, path in by_name.items() if name not in duplicates}
+
+
+def find_local_copy(url, copies):
+    by_media_id, by_name = copies
+    path = unquote(urlsplit(url).path)
+    match = WIX_MEDIA_ID_PATTERN.search(path)
+    if match and match.group(1).lower() in by_media_id:
+        return by_media_id[match.group(1).lower()]
+    return by_name.get(posixpath.basename(path).lower())
+
+
+def rewrite_dead_images(index, urls, results, dry_run=False):
+    """Replace dead image URLs with relative paths to local copies. Returns [(page, url, local)]."""
+    copies = local_copies(index)
+    replacements = {}
+    for result in results:
+        entry = urls[result['url']]
+        if result['state'] != 'dead' or not entry['image']:
+            continue
+        local = find_local_copy(result['url'], copies)
+        if local:
+            for page, _, _ in entry['uses']:
+                replacements.setdefault(page, {})[result['url']] = local
+
+    rewritten = []
+    for page, page_replacements in sorted(replacements.items()):
+        path = index.root / page
+        html = path.read_text(encoding='utf-8')
+        relative = {url: posixpath.relpath(local, posixpath.dirname(page) or '.')
+                    for url, local in page_replacements.items()}
+        # Only the image attributes that were checked; og:image and other <meta> copies stay absolute
+        html = replace_references(html, lambda attribute, url: relative.get(url)
+                                  if attribute in IMAGE_ATTRIBUTES else None)
+        rewritten.extend((page, url, local) for url, local in page_replacements.items())
+        if not dry_run:
+            path.write_text(html, encoding='utf-8')
+    return rewritten
+
+
+def run(root=BASE_DIR, concurrency=20, per_host=4, timeout=DEFAULT_TIMEOUT, cache_ttl=DEFAULT_CACHE_TTL,
+        refresh=False, report=None, rewrite_images=False, dry_run=False, proxy=None, cache_file=CACHE_FILE):
+    """Check every external URL on the site, print a summary and return the report dict."""
+    start = time.perf_counter()
+    index = SiteIndex(root)
+    urls = collect_external_urls(index)
+    cache = {} if refresh or cache_file is None else load_cache(cache_file)
+    now = time.time()
+    cached = {url: cache[url] for url in urls
+              if url in cache and now - cache[url].get('checked_at', 0) < cache_ttl}
+    pending = [url for url in urls if url not in cached]
+    hosts = {urlsplit(url).hostname for url in pending}
+    print(f"🌐 {len(urls)} external URLs on {len(index.pages)} pages "
+          f"({len(cached)} cached, checking {len(pending)} on {len(hosts)} hosts)")
+
+    checker = ExternalLinkChecker(concurrency, per_host, timeout, proxy)
+    fresh = asyncio.run(checker.check_all(pending)) if pending else []
+    for result in fresh:
+        result['checked_at'] = now
+        if result['state'] != 'error':
+            cache[result['url']] = result
+    if cache_file is not None:
+        save_cache({url: entry for url, entry in cache.items() if now - entry.get('checked_at', 0) < cache_ttl},
+                   cache_file)
+    fresh_by_url = {result['url']: result for result in fresh}
+    results = [cached.get(url) or fresh_by_url[url] for url in urls]
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        if result['state'] == 'ok':
+            continue
+        marker = '❌' if result['state'] == 'dead' else '⚠️ '
+        detail = result['error'] or result['status']
+        uses = urls[result['url']]['uses']
+        print(f"   {marker} {result['url']} ({detail}) on {len(uses)} page(s), e.g. {uses[0][0]}:{uses[0][1]}")
+
+    rewritten = rewrite_dead_images(index, urls, results, dry_run) if rewrite_images else []
+    for page, url, local in rewritten:
+        print(f"   🖼️  {page}: {url} → {local}")
+
+    counts = {state: sum(1 for r in results if r['state'] == state) for state in ('ok', 'dead', 'error')}
+    print(f"\n📊 {counts['ok']} ok, {counts['dead']} dead, {counts['error']} failing "
+          f"({checker.requests} requests in {elapsed:.1f}s)")
+    if rewrite_images:
+        verb = 'Would rewrite' if dry_run else 'Rewrote'
+        print(f"✅ {verb} {len(rewritten)} dead image references to local copies")
+
+    result = {
+        'pages': len(index.pages),
+        'urls': [dict(r, image=urls[r['url']]['image'],
+                      uses=[{'page': p, 'line': l, 'attribute': a} for p, l, a in urls[r['url']]['uses']])
+                 for r in results],
+        'counts': counts,
+        'rewritten': [{'page': p, 'url': u, 'local': l} for p, u, l in rewritten],
+        'seconds': round(elapsed, 3),
+    }
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"📋 Report written to {report}")
+    return result
+
+
+class StubHttpServer:
+    """
+    Local HTTP server answering any URL, as a forward proxy or directly.
+
+    routes maps a substring of the requested URL to a status or to
+    (status, Location); the first matching route wins and anything else
+    gets default_status. URLs containing a head_not_allowed substring
+    answer HEAD with 405, to exercise the GET fallback.
+    """
+
+    def __init__(self, routes=None, default_status=200, head_not_allowed=(), port=0):
+        self.routes = dict(routes or {})
+        self.default_status = default_status
+        self.head_not_allowed = tuple(head_not_allowed)
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _respond(self, method, url):
+        if method == 'HEAD' and any(marker in url for marker in self.head_not_allowed):
+            return 405, None
+        for marker, answer in self.routes.items():
+            if marker in url:
+                return answer if isinstance(answer, tuple) else (answer, None)
+        return self.default_status, None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                url = self.path
+                if not url.startswith(('http://', 'https://')):
+                    url = f"http://{self.headers.get('Host', '')}{self.path}"
+                with server.lock:
+                    server.requests.append((self.command, url))
+                status, location = server._respond(self.command, url)
+                self.send_response(status)
+                if location:
+                    self.send_header('Location', location)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            do_HEAD = do_GET = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@profiled
+def main():
+    parser = argparse.ArgumentParser(description='Check external links and images across the site')
+    parser.add_argument('--root', default=str(BASE_DIR), help='Site root (default: repository root)')
+    parser.add_argument('--report', help='Write a JSON report to this file')
+    parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight overall')
+    parser.add_argument('--per-host', type=int, default=4, help='Requests in flight per host')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Seconds per request')
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_CACHE_TTL, help='Seconds a result stays cached')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached results')
+    parser.add_argument('--rewrite-images', action='store_true', help='Point dead images at local copies')
+    parser.add_argument('--dry-run', action='store_true', help='With --rewrite-images, report without writing')
+    parser.add_argument('--stub', action='store_true', help='Send every request to a local stub server')
+    parser.add_argument('--stub-dead', action='append', default=[], metavar='TEXT',
+                        help='With --stub, URLs containing TEXT answer 404 (repeatable)')
+    args = parser.parse_args()
+
+    stub = None
+    proxy = None
+    cache_file = CACHE_FILE
+    if args.stub:
+        stub = StubHttpServer({marker: 404 for marker in args.stub_dead}, head_not_allowed=('eventbrite',)).start()
+        proxy = stub.address
+        cache_file = None
+        print(f"🔎 Stub HTTP server on {stub.url}")
+    try:
+        run(args.root, args.concurrency, args.per_host, args.timeout, args.cache_ttl,
+            refresh=args.refresh, report=args.report, rewrite_images=args.rewrite_images,
+            dry_run=args.dry_run, proxy=proxy, cache_file=cache_file)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        if stub:
+            stub.stop()
+
+
+if __name__ == '__main__':
+    main()
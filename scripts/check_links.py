@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Check every internal link and asset reference on the site
+
+The navigation scripts (add_prev_next_navigation.py, fix_blog_nav_links.py,
+update_navigation_consistency.py, fix_farm_navigation.py) write relative
+links into hundreds of pages and nothing checked them. This script:
+1. Indexes every served file once (site_index.SiteIndex)
+2. Extracts the href/src/srcset/poster references and the id/name anchors
+   of every page, spread over worker processes
+3. Resolves each reference against the file index the way GitHub Pages
+   would (dir/ -> dir/index.html, 'about' -> about.html) and each #fragment
+   against the target page's anchors
+4. Prints the broken links and optionally writes a JSON report
+
+External URLs, mailto:/tel:/javascript:/data: links and template strings
+are skipped. Exits with status 1 if anything is broken, so it can gate a
+build.
+
+Usage:
+    python3 scripts/check_links.py
+    python3 scripts/check_links.py --report link-report.json
+    python3 scripts/check_links.py --workers 0      # single process
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from site_index import BASE_DIR, SiteIndex, extract_references
+from profiling import profiled
+
+CHUNK_SIZE = 16
+TOP_FRAGMENTS = {'', 'top'}
+
+
+def _scan_pages(root, pages):
+    """(page, references, anchors) for a batch of pages."""
+    results = []
+    for page in pages:
+        html = (root / page).read_text(encoding='utf-8', errors='replace')
+        references, anchors = extract_references(html)
+        results.append((page, references, anchors))
+    return results
+
+
+def scan_site(index, workers=None):
+    """{page: (references, anchors)}, scanned in worker processes unless workers == 0."""
+    chunks = [index.pages[i:i + CHUNK_SIZE] for i in range(0, len(index.pages), CHUNK_SIZE)]
+    if workers == 0 or len(chunks) <= 1:
+        batches = [_scan_pages(index.root, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(_scan_pages, [index.root] * len(chunks), chunks))
+    return {page: (references, anchors) for batch in batches for page, references, anchors in batch}
+
+
+def check_links(index, scanned):
+    """List of broken-link dicts (page, line, attribute, url, problem)."""
+    broken = []
+    for page, (references, _) in scanned.items():
+        for attribute, url, line in references:
+            kind, target, fragment = index.resolve(url, page)
+            problem = None
+            if kind == 'missing':
+                problem = 'missing-file'
+            elif kind == 'outside':
+                problem = 'outside-site'
+            elif kind == 'file' and fragment not in TOP_FRAGMENTS and target in scanned \
+                    and fragment not in scanned[target][1]:
+                problem = 'missing-anchor'
+            if problem:
+                broken.append({'page': page, 'line': line, 'attribute': attribute,
+                               'url': url, 'problem': problem})
+    return broken
+
+
+def run(root=BASE_DIR, workers=None, report=None):
+    """Check the whole site, print a summary and return the report dict."""
+    start = time.perf_counter()
+    index = SiteIndex(root)
+    scanned = scan_site(index, workers)
+    broken = check_links(index, scanned)
+    elapsed = time.perf_counter() - start
+
+    checked = sum(len(references) for references, _ in scanned.values())
+    result = {
+        'pages': len(scanned),
+        'references': checked,
+        'broken': broken,
+        'seconds': round(elapsed, 3),
+    }
+    print(f"🔗 Checked {checked:,} references on {len(scanned)} pages in {elapsed:.2f}s")
+    for link in broken:
+        print(f"   ❌ {link['page']}:{link['line']} {link['attribute']}=\"{link['url']}\" ({link['problem']})")
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"📋 Report written to {report}")
+    if broken:
+        pages = len({link['page'] for link in broken})
+        print(f"\n📊 {len(broken)} broken links on {pages} pages")
+    else:
+        print("✅ No broken links")
+    return result
+
+
+@profiled
+def main():
+    parser = argparse.ArgumentParser(description='Check internal links and anchors across the site')
+    parser.add_argument('--report', help='Write a JSON report to this file')
+    parser.add_argument('--root', default=str(BASE_DIR), help='Site root (default: repository root)')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Worker processes (0 = scan in this process)')
+    args = parser.parse_args()
+
+    try:
+        result = run(args.root, workers=args.workers, report=args.report)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if result['broken']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Inline per-page critical CSS and defer the rest
+
+Pages load Google Fonts CSS and large inline <style> blocks in <head>
+(see generate_event_pages.generate_event_page and
+process_blog_posts.generate_blog_post_html), all of which block first
+paint. For every page this script:
+1. Builds a skeleton of the above-the-fold DOM: the header/nav elements and
+   the first content element (hero or first section), truncated to its
+   first FOLD_ELEMENT_BUDGET elements
+2. Parses the page's inline <style> blocks and local stylesheets and keeps
+   only the rules whose selectors match that skeleton (plus @font-face and
+   the @keyframes those rules use)
+3. Inlines the result as <style data-critical> and turns every stylesheet
+   into a preload that applies itself on load, with a <noscript> fallback.
+   Inline <style> blocks move to content-hashed css/deferred/*.css files,
+   so pages sharing a template share one cached file
+4. Runs pages in parallel and caches results by (template hash, CSS hash)
+   in .critical-css-cache.json
+
+The full stylesheets still load after first paint, in their original
+order, so the final cascade is unchanged. Re-running is safe: pages that
+were already processed are rebuilt from their deferred stylesheets.
+
+Requirements:
+    pip install beautifulsoup4
+
+Usage:
+    python3 scripts/critical_css.py
+    python3 scripts/critical_css.py --dry-run
+    python3 scripts/critical_css.py --force --workers 4
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+from soupsieve import SelectorSyntaxError
+
+from css_parser import (
+    parse_stylesheet, serialize, matchable_selector, keyframe_names, rebase_urls,
+)
+
+BASE_DIR = Path(__file__).parent.parent
+CSS_DIR = BASE_DIR / 'css'
+DEFERRED_DIR = CSS_DIR / 'deferred'
+CACHE_FILE = BASE_DIR / '.critical-css-cache.json'
+
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script', 'scripts'}
+# Elements of the first content block treated as above the fold
+FOLD_ELEMENT_BUDGET = 40
+# Header/nav elements are small; this only guards against pathological pages
+HEADER_ELEMENT_BUDGET = 300
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'link', 'template', 'meta'}
+HEADER_TAGS = {'header', 'nav'}
+
+HEAD_PATTERN = re.compile(r'(<head\b[^>]*>)(.*?)(</head>)', re.IGNORECASE | re.DOTALL)
+HEAD_ITEM_PATTERN = re.compile(
+    r'<style\b(?P<style_attrs>[^>]*)>(?P<css>.*?)</style>[ \t]*\n?'
+    r'|<noscript\b[^>]*data-critical-source[^>]*>.*?</noscript>[ \t]*\n?'
+    r'|<link\b(?P<link_attrs>[^>]*?)/?>[ \t]*\n?',
+    re.IGNORECASE | re.DOTALL,
+)
+ATTR_PATTERN = re.compile(r'([\w-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+
+PRELOAD_TEMPLATE = (
+    '<link href="{href}" rel="preload" as="style" '
+    'onload="this.onload=null;this.rel=\'stylesheet\'" data-critical-source=""/>\n'
+    '<noscript data-critical-source=""><link href="{href}" rel="stylesheet"/></noscript>\n'
+)
+
+_cache = {}
+
+def find_pages():
+    """All HTML pages served by the site."""
+    pages = []
+    for html_file in sorted(BASE_DIR.rglob('*.html')):
+        if EXCLUDED_DIRS.intersection(html_file.relative_to(BASE_DIR).parts):
+            continue
+        pages.append(html_file)
+    return pages
+
+def parse_attrs(attr_text):
+    """Parse tag attributes into a dict (valueless attributes map to '')."""
+    attrs = {}
+    for match in ATTR_PATTERN.finditer(attr_text or ''):
+        attrs[match.group(1).lower()] = match.group(2) or match.group(3) or match.group(4) or ''
+    return attrs
+
+def local_path(href, page):
+    """Resolve a stylesheet href to a local file, or None for external URLs."""
+    if re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', href, re.IGNORECASE):
+        return None
+    href = href.split('?')[0].split('#')[0]
+    path = (BASE_DIR / href.lstrip('/')) if href.startswith('/') else (page.parent / href)
+    path = path.resolve()
+    return path if path.is_file() else None
+
+def relative_url(target, start_dir):
+    return os.path.relpath(target, start_dir).replace(os.sep, '/')
+
+def content_hash(text, length=16):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:length]
+
+# ---------------------------------------------------------------------------
+# Above-the-fold skeleton
+# ---------------------------------------------------------------------------
+
+def _skeleton(element, budget):
+    """Serialize an element's tag structure (no text) up to budget[0] elements."""
+    if budget[0] <= 0:
+        return ''
+    budget[0] -= 1
+    attrs = ''.join(
+        f' {name}="{" ".join(value) if isinstance(value, list) else value}"'.replace('&', '&amp;')
+        for name, value in sorted(element.attrs.items())
+        if name in ('id', 'class', 'type', 'role', 'name', 'href', 'src', 'rel', 'open',
+                    'checked', 'disabled', 'hidden', 'lang', 'dir') or name.startswith(('data-', 'aria-'))
+    )
+    children = ''.join(_skeleton(child, budget) for child in element.find_all(recursive=False)
+                       if child.name not in SKIPPED_TAGS)
+    return f'<{element.name}{attrs}>{children}</{element.name}>'
+
+def above_the_fold_skeleton(html):
+    """
+    Markup skeleton of what renders above the fold.
+
+    Includes every header/nav before the first content element, then that
+    content element truncated to FOLD_ELEMENT_BUDGET elements. The same
+    skeleton doubles as the page's template signature for caching.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    body = soup.body
+    if body is None:
+        return None
+    parts = []
+    for child in body.find_all(recursive=False):
+        if child.name in SKIPPED_TAGS:
+            continue
+        if child.name in HEADER_TAGS:
+            parts.append(_skeleton(child, [HEADER_ELEMENT_BUDGET]))
+            continue
+        parts.append(_skeleton(child, [FOLD_ELEMENT_BUDGET]))
+        classes = ' '.join(child.get('class', []))
+        # Fixed overlays (mobile menus) render nothing until opened
+        if 'overlay' not in classes:
+            break
+    body_attrs = ''.join(f' {k}="{" ".join(v) if isinstance(v, list) else v}"'
+                         for k, v in sorted(body.attrs.items()))
+    return f'<html><head></head><body{body_attrs}>{"".join(parts)}</body></html>'
+
+# ---------------------------------------------------------------------------
+# Critical rule selection
+# ---------------------------------------------------------------------------
+
+def _selector_matches(dom, selector, memo):
+    matchable = matchable_selector(selector)
+    if matchable not in memo:
+        try:
+            memo[matchable] = dom.select_one(matchable) is not None
+        except (SelectorSyntaxError, NotImplementedError, ValueError):
+            # Unknown syntax: keep the rule rather than risk a flash of unstyled content
+            memo[matchable] = True
+    return memo[matchable]
+
+def _filter_nodes(nodes, dom, memo):
+    critical = []
+    for node in nodes:
+        if node['type'] == 'rule':
+            selectors = [s for s in node['selectors'] if _selector_matches(dom, s, memo)]
+            if selectors:
+                critical.append({'type': 'rule', 'selectors': selectors, 'body': node['body']})
+        elif node['type'] == 'group':
+            children = _filter_nodes(node['children'], dom, memo)
+            if children:
+                critical.append({'type': 'group', 'prelude': node['prelude'], 'children': children})
+        elif node['prelude'].lower().startswith(('@font-face', '@charset')):
+            critical.append(node)
+    return critical
+
+def critical_css(css_text, skeleton):
+    """Minified CSS containing only the rules that apply to the skeleton."""
+    nodes = parse_stylesheet(css_text)
+    dom = BeautifulSoup(skeleton, 'html.parser')
+    critical = _filter_nodes(nodes, dom, {})
+    css = serialize(critical)
+    # Bring along the @keyframes the critical rules animate with
+    used = [name for name in keyframe_names(nodes) if re.search(r'\b%s\b' % re.escape(name), css)]
+    keyframes = [node for node in nodes if node['type'] == 'at'
+                 and re.match(r'@(?:-\w+-)?keyframes\b', node['prelude'], re.IGNORECASE)
+                 and node['prelude'].split(None, 1)[-1].strip() in used]
+    return css + serialize(keyframes)
+
+# ---------------------------------------------------------------------------
+# Page processing
+# ---------------------------------------------------------------------------
+
+def _write_deferred(css):
+    """Write inline CSS to a content-hashed file in css/deferred/. Returns its path."""
+    path = DEFERRED_DIR / f"{content_hash(css, 10)}.css"
+    if not path.exists():
+        DEFERRED_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(css, encoding='utf-8')
+        os.replace(tmp, path)
+    return path
+
+def _init_worker(cache):
+    global _cache
+    _cache = cache
+
+def process_page(page, dry_run=False, force=False):
+    """Inline critical CSS for one page. Returns a result dict for the report."""
+    page = Path(page)
+    html = page.read_text(encoding='utf-8')
+    result = {'page': relative_url(page, BASE_DIR), 'status': 'skipped', 'cache_entry': None}
+
+    head_match = HEAD_PATTERN.search(html)
+    if not head_match:
+        return result
+    head = head_match.group(2)
+
+    # Collect the render-blocking stylesheets in document order
+    items = []
+    for match in HEAD_ITEM_PATTERN.finditer(head):
+        if match.group('css') is not None:
+            attrs = parse_attrs(match.group('style_attrs'))
+            kind = 'critical' if 'data-critical' in attrs else 'inline'
+            items.append((match, kind, match.group('css')))
+        elif match.group(0).lstrip().lower().startswith('<noscript'):
+            items.append((match, 'noscript', None))
+        else:
+            attrs = parse_attrs(match.group('link_attrs'))
+            rel = attrs.get('rel', '').lower()
+            is_stylesheet = rel == 'stylesheet' and attrs.get('media', 'all') in ('all', 'screen')
+            is_deferred = rel == 'preload' and 'data-critical-source' in attrs
+            if is_stylesheet or is_deferred:
+                items.append((match, 'link', attrs.get('href', '')))
+
+    if not any(kind in ('inline', 'link') for _, kind, _ in items):
+        return result
+
+    # Full CSS text (rebased to the page directory) for critical selection
+    css_parts = []
+    blocking_bytes = 0
+    for _, kind, value in items:
+        if kind == 'inline':
+            css_parts.append(value)
+            blocking_bytes += len(value.encode('utf-8'))
+        elif kind == 'link':
+            path = local_path(value, page)
+            if path is not None and path.suffix == '.css':
+                text = path.read_text(encoding='utf-8')
+                css_parts.append(rebase_urls(text, path.parent, page.parent))
+                blocking_bytes += len(text.encode('utf-8'))
+    full_css = '\n'.join(css_parts)
+
+    skeleton = above_the_fold_skeleton(html)
+    if skeleton is None:
+        return result
+    cache_key = f"{content_hash(skeleton)}:{content_hash(full_css)}"
+    if not force and cache_key in _cache:
+        critical = _cache[cache_key]
+        result['cached'] = True
+    else:
+        critical = critical_css(full_css, skeleton)
+        result['cached'] = False
+    result['cache_entry'] = (cache_key, critical)
+
+    # Rewrite the head: critical CSS first, then every stylesheet as a preload
+    replacements = []
+    inserted_critical = False
+    for match, kind, value in items:
+        text = ''
+        if not inserted_critical and kind in ('inline', 'link', 'critical'):
+            text = f'<style data-critical="">{critical}</style>\n'
+            inserted_critical = True
+        if kind == 'inline':
+            href = value
+            if not dry_run:
+                deferred = _write_deferred(rebase_urls(value, page.parent, DEFERRED_DIR).strip() + '\n')
+                href = relative_url(deferred, page.parent)
+            text += PRELOAD_TEMPLATE.format(href=href)
+        elif kind == 'link':
+            text += PRELOAD_TEMPLATE.format(href=value)
+        replacements.append((match.start(), match.end(), text))
+
+    new_head = []
+    last = 0
+    for start, end, text in replacements:
+        new_head.append(head[last:start])
+        new_head.append(text)
+        last = end
+    new_head.append(head[last:])
+    new_html = (html[:head_match.start(2)] + ''.join(new_head) + html[head_match.end(2):])
+
+    result.update({
+        'status': 'updated' if new_html != html else 'unchanged',
+        'blocking_bytes': blocking_bytes,
+        'critical_bytes': len(critical.encode('utf-8')),
+    })
+    if new_html != html and not dry_run:
+        page.write_text(new_html, encoding='utf-8')
+    return result
+
+def load_cache():
+    if not CACHE_FILE.exists():
+        return {}
+    try:
+        return json.loads(CACHE_FILE.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+
+def run(dry_run=False, force=False, workers=None):
+    """Process every page in parallel and print a report."""
+    pages = find_pages()
+    cache = load_cache()
+    print(f"🎨 Extracting critical CSS for {len(pages)} pages...\n")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache,)) as executor:
+        results = list(executor.map(process_page, pages, [dry_run] * len(pages), [force] * len(pages)))
+
+    processed = [r for r in results if r['status'] != 'skipped']
+    for r in processed:
+        marker = {'updated': '✅', 'unchanged': '⏭️ '}[r['status']]
+        cached = ' (cached)' if r.get('cached') else ''
+        print(f"   {marker} {r['page']}: {r['blocking_bytes']:,} bytes blocking → "
+              f"{r['critical_bytes']:,} bytes inline{cached}")
+
+    total_blocking = sum(r['blocking_bytes'] for r in processed)
+    total_critical = sum(r['critical_bytes'] for r in processed)
+    updated = sum(1 for r in processed if r['status'] == 'updated')
+    print(f"\n📊 {len(processed)} pages: {total_blocking:,} bytes of render-blocking CSS → "
+          f"{total_critical:,} bytes inlined")
+
+    if dry_run:
+        print(f"🔎 Dry run - {updated} pages would change")
+        return results
+
+    new_cache = dict(r['cache_entry'] for r in processed if r['cache_entry'])
+    CACHE_FILE.write_text(json.dumps(new_cache, sort_keys=True), encoding='utf-8')
+    print(f"✅ Updated {updated} pages")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Inline critical CSS and defer the rest')
+    parser.add_argument('--dry-run', action='store_true', help='Report without writing files')
+    parser.add_argument('--force', action='store_true', help='Ignore the (template, CSS) cache')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    args = parser.parse_args()
+
+    try:
+        run(dry_run=args.dry_run, force=args.force, workers=args.workers)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Minimal CSS parser shared by the CSS build scripts
+
+Parses stylesheets into a flat list of nodes that critical_css.py and
+prune_css.py can filter and serialize back:
+
+    {'type': 'rule', 'selectors': ['.a', '.b > p'], 'body': 'color:red'}
+    {'type': 'group', 'prelude': '@media (max-width: 768px)', 'children': [...]}
+    {'type': 'at', 'prelude': '@font-face', 'body': 'font-family:X;...'}
+    {'type': 'at', 'prelude': '@import url(x.css)', 'body': None}
+
+Every node also records 'start' and 'end' offsets into the source text
+(end is exclusive and includes the closing brace or semicolon), and nodes
+with a block record 'body_start' (just after the '{'), so callers can edit
+the original text in place instead of re-serializing.
+
+Group at-rules (@media, @supports, @layer, @container, @document) are
+parsed recursively; every other at-rule (@font-face, @keyframes, @page,
+@import, @charset) is kept verbatim.
+
+This is not a validating parser: it understands strings, comments,
+parentheses and nested braces, which is all the build scripts need.
+"""
+
+import os
+import re
+
+GROUP_AT_RULES = ('@media', '@supports', '@layer', '@container', '@document', '@-moz-document')
+
+# Pseudo-classes that depend on user interaction or browser state rather
+# than on the document, and pseudo-elements. They are stripped before
+# matching a selector against a static DOM.
+DYNAMIC_PSEUDO_PATTERN = re.compile(
+    r'::?(?:before|after|first-line|first-letter|placeholder|selection|marker|backdrop|'
+    r'file-selector-button|-webkit-[\w-]+|-moz-[\w-]+|-ms-[\w-]+)(?:\([^)]*\))?'
+    r'|:(?:hover|focus|focus-within|focus-visible|active|visited|link|any-link|target|'
+    r'autofill|invalid|valid|user-invalid|placeholder-shown)(?![\w-])',
+    re.IGNORECASE,
+)
+
+URL_PATTERN = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)', re.IGNORECASE)
+
+
+def strip_comments(text):
+    """Remove /* */ comments, leaving string contents alone."""
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            end = i + 1
+            while end < n and text[end] != ch:
+                end += 2 if text[end] == '\\' else 1
+            out.append(text[i:end + 1])
+            i = end + 1
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _blank_comments(text):
+    """Replace comments with spaces, keeping every other character's offset."""
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            end = i + 1
+            while end < n and text[end] != ch:
+                end += 2 if text[end] == '\\' else 1
+            out.append(text[i:end + 1])
+            i = end + 1
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            out.append(re.sub(r'[^\n]', ' ', text[i:end]))
+            i = end
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+
+def _scan_until(text, i, stops):
+    """Index of the first stop character at nesting depth 0, skipping strings."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            i += 1
+            while i < n and text[i] != ch:
+                i += 2 if text[i] == '\\' else 1
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and ch in stops:
+            return i
+        i += 1
+    return n
+
+
+def _matching_brace(text, i):
+    """Index of the '}' closing the '{' at position i."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            i += 1
+            while i < n and text[i] != ch:
+                i += 2 if text[i] == '\\' else 1
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return n
+
+
+def collapse_whitespace(text):
+    """Collapse whitespace and drop it around CSS punctuation."""
+    text = re.sub(r'\s+', ' ', text).strip()
+    return re.sub(r'\s*([{};:,>])\s*', r'\1', text).replace(';}', '}').rstrip(';')
+
+
+def split_selectors(selector_text):
+    """Split a selector list on top-level commas."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(selector_text):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(selector_text[start:i])
+            start = i + 1
+    parts.append(selector_text[start:])
+    return [re.sub(r'\s+', ' ', p).strip() for p in parts if p.strip()]
+
+
+def split_declarations(body):
+    """
+    Split a declaration block on top-level semicolons.
+
+    Returns (start, end) offsets into body; each span includes its leading
+    whitespace and trailing ';', so removing a span leaves clean text.
+    """
+    spans = []
+    body = _blank_comments(body)
+    i = 0
+    n = len(body)
+    while i < n:
+        stop = _scan_until(body, i, ';')
+        end = min(stop + 1, n)
+        if body[i:stop].strip():
+            spans.append((i, end))
+        i = end
+    return spans
+
+
+def parse_stylesheet(text):
+    """Parse CSS text into a list of nodes (see module docstring)."""
+    return _parse_nodes(_blank_comments(text), 0, len(text))
+
+
+def _parse_nodes(text, i, n):
+    nodes = []
+    while i < n:
+        while i < n and text[i] in ' \t\r\n\f;':
+            i += 1
+        if i >= n:
+            break
+        stop = min(_scan_until(text, i, '{;}'), n)
+        prelude = re.sub(r'\s+', ' ', text[i:stop]).strip()
+        if stop >= n or text[stop] in ';}':
+            if prelude.startswith('@'):
+                nodes.append({'type': 'at', 'prelude': prelude, 'body': None,
+                              'start': i, 'end': min(stop + 1, n)})
+            i = stop + 1
+            continue
+        end = min(_matching_brace(text, stop), n)
+        body = text[stop + 1:end]
+        lowered = prelude.lower()
+        span = {'start': i, 'end': min(end + 1, n), 'body_start': stop + 1}
+        if lowered.startswith(GROUP_AT_RULES):
+            nodes.append({'type': 'group', 'prelude': prelude,
+                          'children': _parse_nodes(text, stop + 1, end), **span})
+        elif prelude.startswith('@'):
+            nodes.append({'type': 'at', 'prelude': prelude, 'body': body.strip(), **span})
+        elif prelude:
+            nodes.append({'type': 'rule', 'selectors': split_selectors(prelude),
+                          'body': collapse_whitespace(body), **span})
+        i = end + 1
+    return nodes
+
+
+def serialize(nodes):
+    """Serialize nodes back to minified CSS."""
+    out = []
+    for node in nodes:
+        if node['type'] == 'rule':
+            if node['selectors'] and node['body'] is not None:
+                out.append(f"{','.join(node['selectors'])}{{{node['body']}}}")
+        elif node['type'] == 'group':
+            inner = serialize(node['children'])
+            if inner:
+                out.append(f"{node['prelude']}{{{inner}}}")
+        elif node['body'] is None:
+            out.append(f"{node['prelude']};")
+        else:
+            out.append(f"{node['prelude']}{{{collapse_whitespace(node['body'])}}}")
+    return ''.join(out)
+
+
+def iter_rules(nodes):
+    """Yield every style rule, descending into group at-rules."""
+    for node in nodes:
+        if node['type'] == 'rule':
+            yield node
+        elif node['type'] == 'group':
+            yield from iter_rules(node['children'])
+
+
+def matchable_selector(selector):
+    """
+    Reduce a selector to something that can be matched against static HTML.
+
+    Interaction-state pseudo-classes and pseudo-elements are removed, so
+    'nav a:hover::after' becomes 'nav a'. Returns '*' when nothing is left.
+    """
+    stripped = DYNAMIC_PSEUDO_PATTERN.sub('', selector).strip()
+    # A compound reduced to nothing ("ul > :hover") leaves a dangling combinator
+    stripped = re.sub(r'([>+~])\s*(?=$|[>+~,])', r'\1 *', stripped).strip()
+    return stripped or '*'
+
+
+def keyframe_names(nodes):
+    """Names of all @keyframes rules in a node list."""
+    names = set()
+    for node in nodes:
+        if node['type'] == 'at' and re.match(r'@(?:-\w+-)?keyframes\b', node['prelude'], re.IGNORECASE):
+            names.add(node['prelude'].split(None, 1)[-1].strip())
+        elif node['type'] == 'group':
+            names |= keyframe_names(node['children'])
+    return names
+
+
+def rebase_urls(css, from_dir, to_dir):
+    """
+    Rewrite relative url() references when CSS moves from one directory to
+    another (e.g. inline page CSS moved into css/, or the reverse).
+    """
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if re.match(r'^(?:[a-z][a-z0-9+.-]*:|/|#)', url, re.IGNORECASE):
+            return match.group(0)
+        target = os.path.normpath(os.path.join(str(from_dir), url))
+        rebased = os.path.relpath(target, str(to_dir)).replace(os.sep, '/')
+        return f"url({quote}{rebased}{quote})"
+    return URL_PATTERN.sub(replace, css)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+DNS record model shared by the DNS parse, convert and migrate scripts
+
+One DnsRecord class (with __slots__) replaces the loose
+{'hostname', 'value', 'ttl'} dicts and the per-script record-type
+heuristics:
+- classify() is the single hostname/value -> record type classifier
+- DnsRecord.parse() normalizes a record canonically: lower-case names
+  without the trailing dot, integer TTL, MX priority split from the value,
+  TXT values stored unquoted
+- DnsRecord.validate() checks IP addresses, host names, MX priorities,
+  TTLs and TXT lengths
+- group_records() groups by (name, type) in one pass over the records
+
+Provider formats are produced on the way out: route53_value() quotes TXT
+strings (split into 255-character chunks) and prefixes MX priorities;
+Namecheap takes the canonical value and priority as they are.
+
+    python3 scripts/dns_records.py assets/raw/agroverse_wix_domains_parsed.csv --domain agroverse.shop
+"""
+
+import re
+import csv
+import sys
+import argparse
+import ipaddress
+
+DEFAULT_TTL = 3600
+MAX_TTL = 2147483647
+MAX_TXT_CHUNK = 255
+
+LABEL_PATTERN = re.compile(r'^(?!-)[a-z0-9_-]{1,63}(?<!-)$')
+IPV4_PATTERN = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+NS_LABEL_PATTERN = re.compile(r'^ns\d*$')
+MX_WITH_PRIORITY_PATTERN = re.compile(r'^(\d+)\s+(\S+)$')
+TXT_MARKERS = ('v=', 'include:', 'google-site-verification', 'facebook-domain-verification')
+HOST_VALUE_TYPES = ('CNAME', 'MX', 'NS')
+
+# Google Workspace MX hosts and the priorities Google recommends relative to each other
+GOOGLE_MX_PRIORITIES = (('alt1.', 20), ('alt2.', 30), ('alt3.', 40), ('alt4.', 50),
+                        ('aspmx.l.google.com', 10))
+
+
+def is_ipv4(value):
+    return bool(IPV4_PATTERN.match(value)) and all(int(part) <= 255 for part in value.split('.'))
+
+
+def is_ipv6(value):
+    if ':' not in value:
+        return False
+    try:
+        ipaddress.IPv6Address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def is_hostname(name, allow_wildcard=False):
+    """Valid DNS host name (underscore labels such as _dmarc are allowed)."""
+    name = name.rstrip('.')
+    if not name or len(name) > 253:
+        return False
+    labels = name.split('.')
+    if allow_wildcard and labels[0] == '*':
+        labels = labels[1:]
+    return all(LABEL_PATTERN.match(label) for label in labels)
+
+
+def unquote_txt(value):
+    """'"a" "b"' -> 'ab', '"v=spf1 ..."' -> 'v=spf1 ...'; unquoted values are returned as is."""
+    value = value.strip()
+    if len(value) < 2 or not (value.startswith('"') and value.endswith('"')):
+        return value
+    parts = re.findall(r'"((?:[^"\\]|\\.)*)"', value)
+    return ''.join(re.sub(r'\\(.)', r'\1', part) for part in parts)
+
+
+def quote_txt(value):
+    """Route53/BIND form: quoted strings of at most 255 characters."""
+    chunks = [value[i:i + MAX_TXT_CHUNK] for i in range(0, len(value), MAX_TXT_CHUNK)] or ['']
+    return ' '.join('"' + chunk.replace('\\', '\\\\').replace('"', '\\"') + '"' for chunk in chunks)
+
+
+def classify(hostname, value):
+    """Record type for a hostname/value pair from an export without types."""
+    lowered = value.strip().lower()
+    if not lowered:
+        return 'A'
+    if lowered.startswith('"') or hostname.lower().startswith('_dmarc') \
+            or any(marker in lowered for marker in TXT_MARKERS):
+        return 'TXT'
+    if MX_WITH_PRIORITY_PATTERN.match(lowered):
+        return 'MX'
+    if ' ' in lowered:
+        return 'TXT'
+    if is_ipv4(lowered):
+        return 'A'
+    if is_ipv6(lowered):
+        return 'AAAA'
+    host = lowered
+    if 'aspmx' in host or ('mail' in host and 'google' in host) or host.startswith(('mx.', 'mx1.', 'mx2.')):
+        return 'MX'
+    if NS_LABEL_PATTERN.match(host.split('.')[0]):
+        return 'NS'
+    if '=' in lowered:
+        return 'TXT'
+    return 'CNAME' if '.' in host else 'TXT'
+
+
+def default_mx_priority(host):
+    for marker, priority in GOOGLE_MX_PRIORITIES:
+        if marker in host:
+            return priority
+    return 10
+
+
+def normalize_name(hostname, domain=None):
+    """Lower-case name without the trailing dot; with a domain, '@' and relative names are qualified."""
+    name = hostname.strip().lower().rstrip('.')
+    if domain is None:
+        return name or '@'
+    domain = domain.strip().lower().rstrip('.')
+    if name in ('', '@', domain):
+        return domain
+    if name.endswith('.' + domain):
+        return name
+    return f'{name}.{domain}'
+
+
+class DnsRecord:
+    """One DNS record; TTL in seconds (None if unknown), priority only for MX."""
+
+    __slots__ = ('name', 'type', 'value', 'ttl', 'priority')
+
+    def __init__(self, name, type, value, ttl=None, priority=None):
+        self.name = name
+        self.type = type
+        self.value = value
+        self.ttl = ttl
+        self.priority = priority
+
+    @classmethod
+    def parse(cls, hostname, value, ttl=None, record_type=None, domain=None, priority=None):
+        """Canonical record from loosely formatted fields; the type is classified if not given."""
+        value = (value or '').strip()
+        record_type = (record_type or classify(hostname, value)).upper()
+        if record_type == 'TXT':
+            value = unquote_txt(value)
+        elif record_type in HOST_VALUE_TYPES:
+            match = MX_WITH_PRIORITY_PATTERN.match(value)
+            if match and record_type == 'MX':
+                priority, value = match.group(1), match.group(2)
+            value = value.lower().rstrip('.')
+        elif record_type in ('A', 'AAAA'):
+            value = value.lower()
+        if record_type == 'MX' and priority in (None, ''):
+            priority = default_mx_priority(value)
+        ttl = str(ttl).strip() if ttl is not None else ''
+        return cls(normalize_name(hostname, domain), record_type, value,
+                   int(ttl) if ttl.isdigit() else None,
+                   int(priority) if record_type == 'MX' else None)
+
+    def _key(self):
+        return (self.name, self.type, self.value, self.ttl, self.priority)
+
+    def __eq__(self, other):
+        return isinstance(other, DnsRecord) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        priority = f' {self.priority}' if self.priority is not None else ''
+        return f"DnsRecord({self.name} {self.ttl} {self.type}{priority} {self.value!r})"
+
+    def relative_name(self, domain):
+        """'@' for the apex, 'www' for www.<domain>."""
+        domain = domain.lower().rstrip('.')
+        if self.name == domain:
+            return '@'
+        if self.name.endswith('.' + domain):
+            return self.name[:-len(domain) - 1]
+        return self.name
+
+    def fqdn(self):
+        return self.name + '.'
+
+    def route53_value(self):
+        if self.type == 'TXT':
+            return quote_txt(self.value)
+        if self.type == 'MX':
+            return f'{self.priority} {self.value}'
+        return self.value
+
+    def validate(self):
+        """List of problems with this record (empty if valid)."""
+        problems = []
+        if not is_hostname(self.name, allow_wildcard=True) and self.name != '@':
+            problems.append(f"invalid name {self.name!r}")
+        if self.ttl is not None and not 0 <= self.ttl <= MAX_TTL:
+            problems.append(f"TTL {self.ttl} out of range")
+        if not self.value:
+            problems.append("empty value")
+        elif self.type == 'A' and not is_ipv4(self.value):
+            problems.append(f"A value {self.value!r} is not an IPv4 address")
+        elif self.type == 'AAAA' and not is_ipv6(self.value):
+            problems.append(f"AAAA value {self.value!r} is not an IPv6 address")
+        elif self.type in HOST_VALUE_TYPES and not is_hostname(self.value):
+            problems.append(f"{self.type} target {self.value!r} is not a host name")
+        elif self.type == 'TXT' and len(self.value) > 4000:
+            problems.append("TXT value longer than 4000 characters")
+        if self.type == 'MX' and not (isinstance(self.priority, int) and 0 <= self.priority <= 65535):
+            problems.append(f"MX priority {self.priority!r} out of range")
+        return problems
+
+    def to_row(self):
+        """{'hostname', 'value', 'ttl', 'type'} row for the parsed-records CSV."""
+        value = f'{self.priority} {self.value}' if self.type == 'MX' else self.value
+        return {'hostname': self.name, 'value': value, 'ttl': '' if self.ttl is None else self.ttl,
+                'type': self.type}
+
+
+def group_records(records):
+    """{(name, type): [records]} in first-seen order, with repeated values dropped."""
+    groups = {}
+    seen = set()
+    for record in records:
+        value_key = (record.name, record.type, record.value, record.priority)
+        if value_key in seen:
+            continue
+        seen.add(value_key)
+        groups.setdefault((record.name, record.type), []).append(record)
+    return groups
+
+
+def unique_records(records):
+    """Records with repeated (name, value) pairs dropped, first one kept."""
+    seen = set()
+    unique = []
+    for record in records:
+        key = (record.name, record.value)
+        if key not in seen and record.value:
+            seen.add(key)
+            unique.append(record)
+    return unique
+
+
+def read_csv(csv_file, domain=None, default_ttl=DEFAULT_TTL):
+    """DnsRecords from a hostname,value,ttl[,type] CSV (rows without a value are skipped)."""
+    records = []
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('hostname') and row.get('value'):
+                record = DnsRecord.parse(row['hostname'], row['value'], row.get('ttl'),
+                                         row.get('type') or None, domain)
+                if record.ttl is None:
+                    record.ttl = default_ttl
+                records.append(record)
+    return records
+
+
+def write_csv(records, csv_file):
+    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['hostname', 'value', 'ttl', 'type'])
+        writer.writeheader()
+        writer.writerows(record.to_row() for record in records)
+
+
+def validate_records(records):
+    """[(record, problems)] for every invalid record, plus a CNAME-alongside-other-data check."""
+    invalid = [(record, problems) for record in records for problems in [record.validate()] if problems]
+    types_by_name = {}
+    for record in records:
+        types_by_name.setdefault(record.name, set()).add(record.type)
+    for record in records:
+        if record.type == 'CNAME' and len(types_by_name[record.name]) > 1:
+            invalid.append((record, [f"CNAME at {record.name} alongside "
+                                     f"{', '.join(sorted(types_by_name[record.name] - {'CNAME'}))}"]))
+    return invalid
+
+
+def partition_valid(records):
+    """(valid records, [(invalid record, problems)])."""
+    invalid = validate_records(records)
+    rejected = {id(record) for record, _ in invalid}
+    return [record for record in records if id(record) not in rejected], invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classify and validate the records in a DNS CSV')
+    parser.add_argument('csv', help='hostname,value,ttl[,type] CSV')
+    parser.add_argument('--domain', help='Zone the relative host names belong to')
+    args = parser.parse_args()
+
+    try:
+        records = read_csv(args.csv, args.domain)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    groups = group_records(records)
+    print(f"📊 {len(records)} records in {len(groups)} record sets")
+    for (name, record_type), members in groups.items():
+        print(f"   {name:40s} {record_type:5s} {', '.join(r.route53_value() for r in members)[:60]}")
+    invalid = validate_records(records)
+    for record, problems in invalid:
+        print(f"   ❌ {record.name} {record.type}: {'; '.join(problems)}")
+    if invalid:
+        sys.exit(1)
+    print("✅ All records valid")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Verify that migrated DNS records have propagated
+
+After migrate_dns_route53.py or migrate_dns_namecheap.py, this script:
+1. Reads the expected records from the same CSV (via dns_records.py)
+2. Queries every expected (name, type) against every resolver at once
+   (public resolvers by default, plus the zone's authoritative nameservers
+   with --authoritative) over asyncio UDP, falling back to TCP when a
+   response is truncated
+3. Prints the convergence percentage overall and per resolver each round,
+   re-querying only the pairs that do not match yet
+4. Exits 0 as soon as every pair matches, or 1 when --deadline passes
+
+The DNS wire format is encoded and decoded here, so no resolver library is
+needed. StubDnsServer is an in-process DNS server answering from a list of
+DnsRecords; --stub verifies against one serving the CSV itself, with
+--stub-delay making each record set appear after a random delay, so the
+whole loop can be exercised offline.
+
+Usage:
+    python3 scripts/dns_verify.py --domain agroverse.shop
+    python3 scripts/dns_verify.py --authoritative --deadline 1800
+    python3 scripts/dns_verify.py --resolver 8.8.8.8 --resolver 1.1.1.1:53
+    python3 scripts/dns_verify.py --stub --stub-delay 5    # offline, against a local stub server
+"""
+
+import sys
+import time
+import random
+import socket
+import struct
+import asyncio
+import argparse
+import ipaddress
+
+from dns_records import read_csv, group_records, partition_valid
+
+DEFAULT_CSV = 'assets/raw/agroverse_wix_domains_parsed.csv'
+DEFAULT_DOMAIN = 'agroverse.shop'
+DEFAULT_RESOLVERS = ('8.8.8.8', '1.1.1.1', '9.9.9.9', '208.67.222.222')
+QUERY_TIMEOUT = 2.0   # seconds per UDP/TCP attempt
+QUERY_ATTEMPTS = 2
+ROUND_INTERVAL = 10   # seconds between rounds
+DEFAULT_DEADLINE = 600
+MAX_IN_FLIGHT = 64
+UDP_PAYLOAD_LIMIT = 512
+
+TYPE_CODES = {'A': 1, 'NS': 2, 'CNAME': 5, 'SOA': 6, 'MX': 15, 'TXT': 16, 'AAAA': 28}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+RCODE_NAMES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+CLASS_IN = 1
+FLAG_QR, FLAG_AA, FLAG_TC, FLAG_RD, FLAG_RA = 0x8000, 0x0400, 0x0200, 0x0100, 0x0080
+
+
+class DnsQueryError(Exception):
+    pass
+
+
+# --- Wire format ---------------------------------------------------------------
+
+def encode_name(name):
+    name = name.rstrip('.')
+    out = b''.join(bytes([len(label)]) + label.encode('ascii') for label in name.split('.') if label)
+    return out + b'\x00'
+
+
+def decode_name(message, offset):
+    """(name, offset after the name) following compression pointers."""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(message):
+            raise DnsQueryError("truncated name")
+        length = message[offset]
+        if length & 0xC0 == 0xC0:
+            if jumps > 32:
+                raise DnsQueryError("compression loop")
+            pointer = struct.unpack_from('!H', message, offset)[0] & 0x3FFF
+            end = offset + 2 if end is None else end
+            offset = pointer
+            jumps += 1
+        elif length == 0:
+            return '.'.join(labels).lower(), (offset + 1 if end is None else end)
+        else:
+            labels.append(message[offset + 1:offset + 1 + length].decode('ascii', 'replace'))
+            offset += 1 + length
+
+
+def build_query(query_id, name, record_type, recursion=True):
+    header = struct.pack('!HHHHHH', query_id, FLAG_RD if recursion else 0, 1, 0, 0, 0)
+    return header + encode_name(name) + struct.pack('!HH', TYPE_CODES[record_type], CLASS_IN)
+
+
+def _decode_rdata(message, record_type, start, length):
+    rdata = message[start:start + length]
+    if record_type == 'A':
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if record_type == 'AAAA':
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if record_type in ('CNAME', 'NS'):
+        return decode_name(message, start)[0]
+    if record_type == 'MX':
+        return f"{struct.unpack_from('!H', message, start)[0]} {decode_name(message, start + 2)[0]}"
+    if record_type == 'TXT':
+        strings, i = [], 0
+        while i < len(rdata):
+            strings.append(rdata[i + 1:i + 1 + rdata[i]].decode('utf-8', 'replace'))
+            i += 1 + rdata[i]
+        return ''.join(strings)
+    return rdata.hex()
+
+
+def parse_response(message):
+    """{'id', 'rcode', 'truncated', 'answers': [(name, type, value)]}."""
+    if len(message) < 12:
+        raise DnsQueryError("short response")
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack_from('!HHHHHH', message)
+    offset = 12
+    for _ in range(qdcount):
+        offset = decode_name(message, offset)[1] + 4
+    answers = []
+    for _ in range(ancount):
+        name, offset = decode_name(message, offset)
+        type_code, _, _, length = struct.unpack_from('!HHIH', message, offset)
+        offset += 10
+        record_type = TYPE_NAMES.get(type_code, str(type_code))
+        answers.append((name, record_type, _decode_rdata(message, record_type, offset, length)))
+        offset += length
+    return {'id': query_id, 'rcode': RCODE_NAMES.get(flags & 0xF, str(flags & 0xF)),
+            'truncated': bool(flags & FLAG_TC), 'answers': answers}
+
+
+def encode_rdata(record):
+    if record.type == 'A':
+        return socket.inet_pton(socket.AF_INET, record.value)
+    if record.type == 'AAAA':
+        return socket.inet_pton(socket.AF_INET6, record.value)
+    if record.type in ('CNAME', 'NS'):
+        return encode_name(record.value)
+    if record.type == 'MX':
+        return struct.pack('!H', record.priority) + encode_name(record.value)
+    if record.type == 'TXT':
+        data = record.value.encode('utf-8')
+        return b''.join(bytes([len(data[i:i + 255])]) + data[i:i + 255]
+                        for i in range(0, len(data), 255)) or b'\x00'
+    raise ValueError(f"cannot encode {record.type}")
+
+
+# --- Client ----------------------------------------------------------------------
+
+def parse_server(server):
+    """('1.1.1.1', 53) for '1.1.1.1', '1.1.1.1:5353' or '[2606:4700::1111]:53'."""
+    if server.startswith('['):
+        host, _, port = server[1:].partition(']:')
+        return host.rstrip(']'), int(port or 53)
+    if server.count(':') == 1:
+        host, port = server.split(':')
+        return host, int(port)
+    return server, 53
+
+
+class _UdpQuery(asyncio.DatagramProtocol):
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.future = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if len(data) >= 2 and struct.unpack_from('!H', data)[0] == self.query_id and not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def query_udp(server, message, timeout=QUERY_TIMEOUT):
+    host, port = server
+    loop = asyncio.get_running_loop()
+    query_id = struct.unpack_from('!H', message)[0]
+    transport, protocol = await loop.create_datagram_endpoint(lambda: _UdpQuery(query_id),
+                                                              remote_addr=(host, port))
+    try:
+        transport.sendto(message)
+        return await asyncio.wait_for(protocol.future, timeout)
+    finally:
+        transport.close()
+
+
+async def query_tcp(server, message, timeout=QUERY_TIMEOUT):
+    host, port = server
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(struct.pack('!H', len(message)) + message)
+            await writer.drain()
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            return await reader.readexactly(length)
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+async def resolve(server, name, record_type, recursion=True, attempts=QUERY_ATTEMPTS):
+    """Parsed response for one query; UDP first, TCP if truncated. Raises DnsQueryError."""
+    last_error = None
+    for _ in range(attempts):
+        message = build_query(random.randrange(1 << 16), name, record_type, recursion)
+        try:
+            response = parse_response(await query_udp(server, message))
+            if response['truncated']:
+                response = parse_response(await query_tcp(server, message))
+            return response
+        except (OSError, asyncio.TimeoutError, DnsQueryError, struct.error) as e:
+            last_error = e
+    raise DnsQueryError(f"{type(last_error).__name__} {last_error}".strip())
+
+
+# --- Verification ------------------------------------------------------------
+
+def canonical(record_type, value):
+    """Comparable form of an answer or expected value."""
+    value = value.strip()
+    if record_type in ('CNAME', 'NS'):
+        return value.lower().rstrip('.')
+    if record_type == 'MX':
+        priority, _, host = value.partition(' ')
+        return f"{int(priority)} {host.lower().rstrip('.')}"
+    if record_type in ('A', 'AAAA'):
+        try:
+            return ipaddress.ip_address(value).compressed
+        except ValueError:
+            return value
+    return value
+
+
+def expected_record_sets(records, domain, include_apex_ns=False):
+    """{(name, type): frozenset of canonical values} for the records to verify."""
+    expected = {}
+    for (name, record_type), members in group_records(records).items():
+        if record_type == 'NS' and name == domain and not include_apex_ns:
+            continue  # the registrar/DNS host replaces the apex NS records
+        if record_type not in TYPE_CODES:
+            continue
+        values = [f'{r.priority} {r.value}' if record_type == 'MX' else r.value for r in members]
+        expected[(name, record_type)] = frozenset(canonical(record_type, v) for v in values)
+    return expected
+
+
+async def check(server, key, values, semaphore, recursion):
+    """'match', or a short description of what the resolver returned instead."""
+    name, record_type = key
+    async with semaphore:
+        try:
+            response = await resolve(server, name, record_type, recursion)
+        except DnsQueryError as e:
+            return f"error ({e})"
+    if response['rcode'] != 'NOERROR':
+        return response['rcode']
+    got = frozenset(canonical(t, v) for n, t, v in response['answers'] if t == record_type and n == name)
+    if got == values:
+        return 'match'
+    return f"got {', '.join(sorted(got)) or 'no answer'}"
+
+
+async def authoritative_servers(resolver, domain):
+    """[(ip, 53)] for the zone's NS hosts, looked up through a resolver."""
+    response = await resolve(resolver, domain, 'NS')
+    hosts = sorted(v for n, t, v in response['answers'] if t == 'NS')
+    servers = []
+    for host in hosts:
+        answer = await resolve(resolver, host, 'A')
+        servers.extend((ip, 53) for _, t, ip in answer['answers'] if t == 'A')
+    return hosts, servers
+
+
+def summarize(status, servers):
+    """(overall percent, {server: percent})."""
+    per_server = {}
+    for server in servers:
+        results = [result for (s, _), result in status.items() if s == server]
+        per_server[server] = 100 * sum(r == 'match' for r in results) / max(1, len(results))
+    overall = 100 * sum(r == 'match' for r in status.values()) / max(1, len(status))
+    return overall, per_server
+
+
+async def verify(expected, servers, deadline=DEFAULT_DEADLINE, interval=ROUND_INTERVAL,
+                 authoritative=(), labels=None):
+    """
+    Query until every (server, record set) pair matches or the deadline passes.
+
+    Authoritative servers are queried without recursion. Returns the final
+    {(server, (name, type)): result} status.
+    """
+    labels = labels or {}
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    status = {(server, key): 'pending' for server in servers for key in expected}
+    start = time.monotonic()
+    round_number = 0
+    while True:
+        round_number += 1
+        pending = [pair for pair, result in status.items() if result != 'match']
+        results = await asyncio.gather(*(check(server, key, expected[key], semaphore, server not in authoritative)
+                                         for server, key in pending))
+        status.update(zip(pending, results))
+
+        overall, per_server = summarize(status, servers)
+        elapsed = time.monotonic() - start
+        print(f"   Round {round_number} ({elapsed:5.1f}s): {overall:5.1f}% converged "
+              f"({len(pending)} queries) | " +
+              '  '.join(f"{labels.get(s, s[0])} {p:.0f}%" for s, p in per_server.items()))
+        if overall == 100 or elapsed + interval > deadline:
+            return status
+        await asyncio.sleep(interval)
+
+
+# --- Stub server -------------------------------------------------------------
+
+class StubDnsServer:
+    """
+    In-process DNS server (UDP and TCP) answering from DnsRecords.
+
+    delays maps (name, type) to seconds after start() before that record set
+    is served, to imitate propagation. UDP answers over 512 bytes are sent
+    truncated so clients retry over TCP.
+    """
+
+    def __init__(self, records, delays=None, host='127.0.0.1'):
+        self.groups = group_records(records)
+        self.names = {name for name, _ in self.groups}
+        self.delays = delays or {}
+        self.host = host
+        self.port = None
+        self.started = None
+        self.queries = 0
+        self._udp = None
+        self._tcp = None
+
+    @property
+    def address(self):
+        return (self.host, self.port)
+
+    def _visible(self, key):
+        return key in self.groups and time.monotonic() - self.started >= self.delays.get(key, 0)
+
+    def answer(self, message):
+        self.queries += 1
+        query_id, flags, qdcount, _, _, _ = struct.unpack_from('!HHHHHH', message)
+        name, offset = decode_name(message, 12)
+        type_code, _ = struct.unpack_from('!HH', message, offset)
+        question = message[12:offset + 4]
+        record_type = TYPE_NAMES.get(type_code)
+
+        key = (name, record_type)
+        if not self._visible(key) and self._visible((name, 'CNAME')):
+            key = (name, 'CNAME')
+        answers = self.groups[key] if self._visible(key) else []
+        rcode = 0 if answers or name in self.names else 3
+        body = b''.join(
+            encode_name(r.name) + struct.pack('!HHIH', TYPE_CODES[r.type], CLASS_IN, r.ttl or 300, len(rdata))
+            + rdata
+            for r in answers for rdata in [encode_rdata(r)])
+        header = struct.pack('!HHHHHH', query_id, FLAG_QR | FLAG_AA | FLAG_RA | (flags & FLAG_RD) | rcode,
+                             1, len(answers), 0, 0)
+        return header + question + body
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        server = self
+
+        class Udp(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                try:
+                    response = server.answer(data)
+                except (struct.error, DnsQueryError):
+                    return
+                if len(response) > UDP_PAYLOAD_LIMIT:
+                    query_id, flags = struct.unpack_from('!HH', response)
+                    response = struct.pack('!HHHHHH', query_id, flags | FLAG_TC, 1, 0, 0, 0) + \
+                        data[12:]
+                self.transport.sendto(response, addr)
+
+        async def tcp(reader, writer):
+            try:
+                length = struct.unpack('!H', await reader.readexactly(2))[0]
+                response = server.answer(await reader.readexactly(length))
+                writer.write(struct.pack('!H', len(response)) + response)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, struct.error, DnsQueryError):
+                pass
+            finally:
+                writer.close()
+
+        self._udp, _ = await loop.create_datagram_endpoint(Udp, local_addr=(self.host, 0))
+        self.port = self._udp.get_extra_info('sockname')[1]
+        self._tcp = await asyncio.start_server(tcp, self.host, self.port)
+        self.started = time.monotonic()
+        return self
+
+    def close(self):
+        if self._udp is not None:
+            self._udp.close()
+        if self._tcp is not None:
+            self._tcp.close()
+
+
+# --- CLI ---------------------------------------------------------------------
+
+async def run(args, records):
+    records, invalid = partition_valid(records)
+    for record, problems in invalid:
+        print(f"   ⚠️  Skipping {record.name} {record.type}: {'; '.join(problems)}")
+    expected = expected_record_sets(records, args.domain)
+    print(f"📋 {len(expected)} record sets to verify")
+
+    stub = None
+    labels = {}
+    authoritative = []
+    if args.stub:
+        delays = {key: random.uniform(0, args.stub_delay) for key in group_records(records)}
+        stub = await StubDnsServer(records, delays).start()
+        servers = [stub.address]
+        labels[stub.address] = 'stub'
+        print(f"🔎 Stub DNS server on {stub.host}:{stub.port} (record sets appear within {args.stub_delay:g}s)")
+    else:
+        servers = [parse_server(s) for s in (args.resolver or DEFAULT_RESOLVERS)]
+        if args.authoritative:
+            hosts, authoritative = await authoritative_servers(servers[0], args.domain)
+            print(f"🔎 Authoritative: {', '.join(hosts) or 'none found'}")
+            for host, server in zip(hosts, authoritative):
+                labels[server] = host.split('.')[0]
+            servers = authoritative + servers
+    print(f"📡 Querying {len(servers)} resolver(s), deadline {args.deadline:g}s\n")
+
+    try:
+        status = await verify(expected, servers, args.deadline, args.interval, authoritative, labels)
+    finally:
+        if stub is not None:
+            stub.close()
+
+    failures = sorted((key, server, result) for (server, key), result in status.items() if result != 'match')
+    if not failures:
+        print("\n✅ All records resolve as expected on every resolver")
+        return True
+    print(f"\n❌ {len(failures)} record set/resolver pairs still differ:")
+    for (name, record_type), server, result in failures[:50]:
+        print(f"   {labels.get(server, server[0]):15s} {name:40s} {record_type:5s} {result}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that DNS records from the CSV have propagated')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='Parsed DNS records CSV')
+    parser.add_argument('--domain', default=DEFAULT_DOMAIN, help='Zone the records belong to')
+    parser.add_argument('--resolver', action='append', metavar='HOST[:PORT]',
+                        help=f"Resolver to query (repeatable; default {', '.join(DEFAULT_RESOLVERS)})")
+    parser.add_argument('--authoritative', action='store_true', help="Also query the zone's own nameservers")
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE, help='Give up after this many seconds')
+    parser.add_argument('--interval', type=float, default=ROUND_INTERVAL, help='Seconds between rounds')
+    parser.add_argument('--stub', action='store_true', help='Verify against an in-process stub server serving the CSV')
+    parser.add_argument('--stub-delay', type=float, default=0, help='Stub record sets appear within this many seconds')
+    args = parser.parse_args()
+    args.domain = args.domain.lower().rstrip('.')
+
+    try:
+        records = read_csv(args.csv, args.domain)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        print("   Run parse_wix_domains.py first to generate the CSV")
+        sys.exit(1)
+
+    try:
+        converged = asyncio.run(run(args, records))
+    except DnsQueryError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    sys.exit(0 if converged else 1)
+
+
+if __name__ == '__main__':
+    main()
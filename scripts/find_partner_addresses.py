@@ -1,18 +1,35 @@
 #!/usr/bin/env python3
 """
 Script to find partner addresses using Google Places API and Nominatim (OpenStreetMap) as fallback
+
+Answers are cached in .geocode-cache.sqlite3 (see geocoding.py), including
+"no results", so re-runs only query the network for new or changed queries.
+Partners are searched concurrently and each partner's query variants are
+raced, within Nominatim's and Google's rate limits.
+
+Usage:
+    python3 scripts/find_partner_addresses.py
+    python3 scripts/find_partner_addresses.py --refresh          # ignore cached answers
+    python3 scripts/find_partner_addresses.py --fake fixture.json  # offline, canned answers
+    python3 scripts/find_partner_addresses.py --workers 4
 """
 import requests
 import json
-import time
 import os
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from geocoding import default_geocoder, load_google_api_key, DEFAULT_WORKERS
+
 # Load environment variables
 load_dotenv()
 
 # Get Google API key from .env file
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEy") or os.getenv("GOOGLE_API_KEY")
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEy") or load_google_api_key()
+
+OUTPUT_FILE = Path(__file__).parent / "partner_addresses.json"
 
 # Partners to search for - with multiple query attempts
 PARTNERS = [
@@ -28,97 +45,6 @@ PARTNERS = [
     {"name": "Heierling Ski", "location": "Switzerland", "queries": ["Heierling Ski shop Switzerland", "Heierling Ski"]},
 ]
 
-def find_place_google(query):
-    """Find a place using Google Places API Text Search"""
-    if not GOOGLE_API_KEY:
-        return {"error": "No Google API key found"}
-    
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    
-    params = {
-        "query": query,
-        "key": GOOGLE_API_KEY,
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("status") == "OK" and data.get("results"):
-            place = data["results"][0]
-            return {
-                "name": place.get("name"),
-                "formatted_address": place.get("formatted_address"),
-                "place_id": place.get("place_id"),
-            }
-        else:
-            return {"error": data.get("status"), "message": data.get("error_message", "No results found")}
-    except Exception as e:
-        return {"error": str(e)}
-
-def geocode_nominatim(query):
-    """Geocode an address using Nominatim (OpenStreetMap) - free and no API key needed"""
-    url = "https://nominatim.openstreetmap.org/search"
-    
-    params = {
-        "q": query,
-        "format": "json",
-        "limit": 1,
-        "addressdetails": 1,
-    }
-    
-    headers = {
-        "User-Agent": "Agroverse Partner Address Finder"
-    }
-    
-    try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data and len(data) > 0:
-            result = data[0]
-            address = result.get("display_name", "")
-            
-            # Try to format address nicely
-            address_parts = result.get("address", {})
-            formatted_parts = []
-            
-            if address_parts.get("house_number") and address_parts.get("road"):
-                formatted_parts.append(f"{address_parts['house_number']} {address_parts['road']}")
-            elif address_parts.get("road"):
-                formatted_parts.append(address_parts["road"])
-            
-            if address_parts.get("city"):
-                formatted_parts.append(address_parts["city"])
-            elif address_parts.get("town"):
-                formatted_parts.append(address_parts["town"])
-            elif address_parts.get("village"):
-                formatted_parts.append(address_parts["village"])
-            
-            if address_parts.get("state"):
-                formatted_parts.append(address_parts["state"])
-            
-            if address_parts.get("postcode"):
-                formatted_parts.append(address_parts["postcode"])
-            
-            if address_parts.get("country"):
-                formatted_parts.append(address_parts["country"])
-            
-            formatted_address = ", ".join(formatted_parts) if formatted_parts else address
-            
-            return {
-                "formatted_address": formatted_address,
-                "display_name": address,
-                "lat": result.get("lat"),
-                "lon": result.get("lon"),
-            }
-        else:
-            return {"error": "No results found"}
-    except Exception as e:
-        return {"error": str(e)}
-
 def get_place_details(place_id):
     """Get detailed information about a place using place_id"""
     url = "https://maps.googleapis.com/maps/api/place/details/json"
@@ -126,11 +52,11 @@ def get_place_details(place_id):
     params = {
         "place_id": place_id,
         "fields": "formatted_address,formatted_phone_number,website,opening_hours",
-        "key": API_KEY,
+        "key": GOOGLE_API_KEY,
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -141,63 +67,60 @@ def get_place_details(place_id):
     except Exception as e:
         return {"error": str(e)}
 
+def is_relevant(partner, place, provider):
+    """Google matches are trusted; Nominatim ones must mention the partner's location."""
+    if provider != "nominatim":
+        return True
+    address_lower = place["formatted_address"].lower()
+    return any(keyword in address_lower for keyword in partner["location"].lower().split())
+
+def search_partner(geocoder, partner):
+    """Race a partner's query variants. Returns (address or None, log lines)."""
+    name = partner["name"]
+    queries = partner.get("queries", [f"{name} {partner['location']}"])
+    log = [f"  Trying: {query}" for query in queries]
+    
+    place, provider, query, errors = geocoder.race(
+        queries, accept=lambda place, provider: is_relevant(partner, place, provider))
+    for failed, error in errors:
+        if "REQUEST_DENIED" not in error:
+            log.append(f"  {failed}: {error}")
+    if place is None:
+        log.append(f"  ✗ Not found with any query")
+        return None, log
+    log.append(f"  ✓ Found ({provider.title()}, \"{query}\"): {place['formatted_address']}")
+    return place["formatted_address"], log
+
 def main():
+    parser = argparse.ArgumentParser(description="Find partner addresses (Google Places, Nominatim fallback)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached answers and query again")
+    parser.add_argument("--fake", metavar="FIXTURE", help="Answer from a {query: place} JSON file instead of the network")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Partners searched in parallel")
+    args = parser.parse_args()
+
     print("Searching for partner addresses using Google Places API (with Nominatim fallback)...\n")
     
-    if GOOGLE_API_KEY:
+    if args.fake:
+        print(f"✓ Using canned answers from {args.fake}\n")
+    elif GOOGLE_API_KEY:
         print(f"✓ Using Google API key: {GOOGLE_API_KEY[:20]}...\n")
     else:
         print("⚠ No Google API key found, using Nominatim only\n")
     
+    # Rate limits (Nominatim: 1 request/second) are enforced per provider
+    geocoder = default_geocoder(google_api_key=GOOGLE_API_KEY, fake_fixture=args.fake,
+                                refresh=args.refresh, max_workers=args.workers)
     results = {}
     
-    for i, partner in enumerate(PARTNERS):
-        name = partner["name"]
-        queries = partner.get("queries", [f"{name} {partner['location']}"])
-        
-        print(f"[{i+1}/{len(PARTNERS)}] Searching for: {name}")
-        
-        found = False
-        for query in queries:
-            print(f"  Trying: {query}")
-            
-            # Try Google Places API first
-            if GOOGLE_API_KEY:
-                result = find_place_google(query)
-                if "error" not in result:
-                    print(f"  ✓ Found (Google): {result['formatted_address']}")
-                    results[name] = result["formatted_address"]
-                    found = True
-                    break
-                elif result.get("error") != "REQUEST_DENIED":
-                    print(f"  Google API: {result.get('error', 'Unknown error')}")
-            
-            # Fallback to Nominatim
-            result = geocode_nominatim(query)
-            if "error" not in result:
-                # Check if the result seems relevant (contains location keywords)
-                address_lower = result['formatted_address'].lower()
-                location_lower = partner['location'].lower()
-                
-                # Basic relevance check
-                if any(keyword in address_lower for keyword in location_lower.split()):
-                    print(f"  ✓ Found (Nominatim): {result['formatted_address']}")
-                    results[name] = result["formatted_address"]
-                    found = True
-                    break
-                else:
-                    print(f"  ? Found but may not be relevant: {result['formatted_address']}")
-        
-        if not found:
-            print(f"  ✗ Not found with any query")
-            results[name] = None
-        
-        # Rate limiting - Nominatim requires max 1 request per second
-        # Google API has its own rate limits
-        if i < len(PARTNERS) - 1:
-            time.sleep(0.5)  # Reduced delay since we're using Google API
-        
-        print()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        searches = executor.map(lambda partner: search_partner(geocoder, partner), PARTNERS)
+        for i, (partner, (address, log)) in enumerate(zip(PARTNERS, searches)):
+            print(f"[{i+1}/{len(PARTNERS)}] Searching for: {partner['name']}")
+            print("\n".join(log))
+            print()
+            results[partner["name"]] = address
+    
+    geocoder.close()
     
     # Print summary
     print("\n" + "="*60)
@@ -211,10 +134,11 @@ def main():
             print(f"{name}: NOT FOUND\n")
     
     # Save to JSON file
-    with open("/Users/garyjob/Applications/agroverse_shop/scripts/partner_addresses.json", "w") as f:
+    with open(OUTPUT_FILE, "w") as f:
         json.dump(results, f, indent=2)
     
     print("Results saved to partner_addresses.json")
+    print(f"Lookups: {geocoder.summary()}")
 
 if __name__ == "__main__":
     main()
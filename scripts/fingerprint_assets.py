@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Fingerprint static asset references for cache busting
+
+GitHub Pages serves css/, js/ and assets/ with short cache lifetimes, and
+because file names never change we cannot raise them without risking stale
+carts. This script:
+1. Hashes every static asset (CSS, JS, images, fonts) under the site root
+2. Rewrites the local asset references in HTML (src/href/srcset/content
+   attributes, inline url()) and in stylesheets (url(), @import) to carry a
+   ?v=<content hash> version
+3. Processes CSS in dependency order, so a stylesheet whose referenced
+   assets changed gets a new version too
+4. Writes asset-manifest.json (path -> version) for CDNs and other tools
+
+JS files are versioned but never edited: they are sources or the output of
+build_products_catalog.py and bundle_js.py, which would overwrite the edits.
+String literals in JS are therefore versioned where they are generated:
+build_products_catalog.py reads asset-manifest.json and adds ?v= to the
+product image paths, so run this script before the catalog build (and again
+after the CSS steps). Content-hashed artifacts (products.<hash>.js, bundles)
+already carry their version in the name and are left alone entirely.
+
+Versions are derived from content only, so unchanged assets keep the same
+URL across builds and repeat visitors only refetch what actually changed.
+Re-running is idempotent: existing ?v= parameters are replaced in place.
+
+Versions are added as query strings instead of hashed file copies because
+the site is served straight from this repository and duplicating ~250 MB
+of images on every build is not an option.
+
+Usage:
+    python3 scripts/fingerprint_assets.py
+    python3 scripts/fingerprint_assets.py --dry-run
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+MANIFEST_FILE = BASE_DIR / 'asset-manifest.json'
+HASH_CACHE_FILE = BASE_DIR / '.asset-hash-cache.json'
+
+VERSION_LENGTH = 10
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script', 'scripts'}
+
+BINARY_ASSET_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif', '.svg', '.ico',
+                           '.woff', '.woff2', '.ttf', '.otf', '.mp4', '.webm', '.pdf'}
+SCRIPT_EXTENSIONS = {'.js'}
+TEXT_ASSET_EXTENSIONS = {'.css'}
+ASSET_EXTENSIONS = BINARY_ASSET_EXTENSIONS | SCRIPT_EXTENSIONS | TEXT_ASSET_EXTENSIONS
+# products.<hash>.js, js/products/<category>.<hash>.js, js/bundles/bundle.<hash>.js
+HASHED_NAME_PATTERN = re.compile(r'\.[0-9a-f]{%d}\.(?:js|css)$' % VERSION_LENGTH)
+
+_EXT_ALTERNATION = '|'.join(sorted((ext[1:] for ext in ASSET_EXTENSIONS), key=len, reverse=True))
+# A local-looking path ending in an asset extension, delimited by quotes,
+# parentheses, whitespace, commas or '=' (covers attributes, srcset and
+# url()), with an optional existing ?v= version
+REFERENCE_PATTERN = re.compile(
+    r'(?<=[\s"\'(,=])'
+    r'(?P<path>[^\s"\'()<>,?#]+\.(?:' + _EXT_ALTERNATION + r'))'
+    r'(?P<version>\?v=[0-9a-f]+)?'
+    r'(?=[\s"\'),#])',
+    re.IGNORECASE,
+)
+
+def iter_site_files(extensions):
+    """Yield site files with one of the given extensions (excluded dirs and content-hashed files skipped)."""
+    for path in sorted(BASE_DIR.rglob('*')):
+        if path.suffix.lower() not in extensions or not path.is_file():
+            continue
+        if HASHED_NAME_PATTERN.search(path.name):
+            continue
+        if EXCLUDED_DIRS.intersection(path.relative_to(BASE_DIR).parts):
+            continue
+        yield path
+
+class HashCache:
+    """Content hashes cached by (size, mtime) so unchanged images are not re-read."""
+
+    def __init__(self, cache_file=HASH_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        if cache_file.exists():
+            try:
+                self.entries = json.loads(cache_file.read_text(encoding='utf-8'))
+            except ValueError:
+                self.entries = {}
+
+    def version(self, path):
+        key = path.relative_to(BASE_DIR).as_posix()
+        stat = path.stat()
+        entry = self.entries.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['version']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        version = digest.hexdigest()[:VERSION_LENGTH]
+        self.entries[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': version}
+        return version
+
+    def save(self):
+        self.cache_file.write_text(json.dumps(self.entries, sort_keys=True), encoding='utf-8')
+
+def resolve_reference(ref, referrer):
+    """Resolve a reference to a local file, or None if it is external or missing."""
+    if re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', ref, re.IGNORECASE):
+        return None
+    if ref.startswith('/'):
+        path = BASE_DIR / ref.lstrip('/')
+    else:
+        path = referrer.parent / ref
+    try:
+        path = path.resolve()
+        path.relative_to(BASE_DIR.resolve())
+    except (ValueError, OSError):
+        return None
+    return path if path.is_file() else None
+
+def find_references(text, referrer):
+    """All local asset files referenced from a text file."""
+    found = set()
+    for match in REFERENCE_PATTERN.finditer(text):
+        path = resolve_reference(match.group('path'), referrer)
+        if path is not None:
+            found.add(path)
+    return found
+
+def rewrite_references(text, referrer, versions):
+    """Point every local asset reference at ?v=<version>."""
+    def replace(match):
+        path = resolve_reference(match.group('path'), referrer)
+        version = versions.get(path)
+        if version is None:
+            return match.group(0)
+        return f"{match.group('path')}?v={version}"
+    return REFERENCE_PATTERN.sub(replace, text)
+
+def order_text_assets(dependencies):
+    """Order stylesheets so every file comes after the stylesheets it references."""
+    ordered = []
+    state = {}
+
+    def visit(path):
+        if state.get(path) == 'done':
+            return
+        if state.get(path) == 'visiting':
+            return  # reference cycle: fall back to visiting order
+        state[path] = 'visiting'
+        for dependency in sorted(dependencies.get(path, ())):
+            if dependency in dependencies:
+                visit(dependency)
+        state[path] = 'done'
+        ordered.append(path)
+
+    for path in sorted(dependencies):
+        visit(path)
+    return ordered
+
+def fingerprint_site(dry_run=False):
+    """Version every asset reference in the site. Returns the manifest."""
+    cache = HashCache()
+    versions = {}
+
+    binary_assets = list(iter_site_files(BINARY_ASSET_EXTENSIONS | SCRIPT_EXTENSIONS))
+    print(f"🔐 Hashing {len(binary_assets)} image, font and script assets...")
+    for path in binary_assets:
+        versions[path.resolve()] = cache.version(path)
+
+    text_assets = {path.resolve(): path.read_text(encoding='utf-8')
+                   for path in iter_site_files(TEXT_ASSET_EXTENSIONS)}
+    dependencies = {path: find_references(text, path) for path, text in text_assets.items()}
+    print(f"🧩 Rewriting {len(text_assets)} stylesheets in dependency order...")
+
+    changed_files = []
+    for path in order_text_assets(dependencies):
+        text = text_assets[path]
+        new_text = rewrite_references(text, path, versions)
+        if new_text != text:
+            changed_files.append(path)
+            if not dry_run:
+                path.write_text(new_text, encoding='utf-8')
+        versions[path] = hashlib.sha256(new_text.encode('utf-8')).hexdigest()[:VERSION_LENGTH]
+
+    pages = list(iter_site_files({'.html'}))
+    print(f"📄 Rewriting references in {len(pages)} HTML pages...")
+    for page in pages:
+        text = page.read_text(encoding='utf-8')
+        new_text = rewrite_references(text, page.resolve(), versions)
+        if new_text != text:
+            changed_files.append(page)
+            if not dry_run:
+                page.write_text(new_text, encoding='utf-8')
+
+    manifest = {
+        path.relative_to(BASE_DIR.resolve()).as_posix(): version
+        for path, version in sorted(versions.items())
+    }
+
+    if dry_run:
+        print(f"\n🔎 Dry run - {len(changed_files)} files would change")
+        return manifest
+
+    cache.save()
+    manifest_text = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    if not MANIFEST_FILE.exists() or MANIFEST_FILE.read_text(encoding='utf-8') != manifest_text:
+        MANIFEST_FILE.write_text(manifest_text, encoding='utf-8')
+        print(f"   ✅ Wrote {MANIFEST_FILE.name} ({len(manifest)} assets)")
+
+    print(f"\n✅ Updated {len(changed_files)} files")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description='Add content-hash versions to static asset references')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without writing files')
+    args = parser.parse_args()
+
+    try:
+        fingerprint_site(dry_run=args.dry_run)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """
-Generate Facebook Product Feed XML from products.js
+Generate Facebook Product Feed XML from products_catalog.json
 
 This script:
-1. Reads products from js/products.js
+1. Reads products from products_catalog.json (the canonical catalog that
+   build_products_catalog.py compiles into js/products.js)
 2. Generates a Facebook-compatible product feed XML file
-3. Outputs to facebook_product_feed.xml
+3. Outputs to facebook_product_feed.xml (only rewritten when an item changed)
+4. Persists a per-item fingerprint to .facebook-feed-fingerprints.json
+   (dot-prefixed so GitHub Pages does not publish it)
+5. Writes facebook_product_feed_delta.xml with only added, changed and removed
+   items since the previous run (removed items are marked "out of stock";
+   empty when nothing changed)
 
 Facebook Product Feed Requirements (XML format):
 - id (required): Unique product identifier
@@ -23,18 +29,28 @@ Facebook Product Feed Requirements (XML format):
 
 import re
 import json
+import hashlib
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 from pathlib import Path
 from datetime import datetime
 
 BASE_DIR = Path(__file__).parent.parent
+CATALOG_FILE = BASE_DIR / 'products_catalog.json'
 PRODUCTS_JS_FILE = BASE_DIR / 'js' / 'products.js'
 OUTPUT_XML_FILE = BASE_DIR / 'facebook_product_feed.xml'
+DELTA_XML_FILE = BASE_DIR / 'facebook_product_feed_delta.xml'
+FINGERPRINTS_FILE = BASE_DIR / '.facebook-feed-fingerprints.json'
 BASE_URL = 'https://www.agroverse.shop'
 
+def load_catalog_products():
+    """Load products from products_catalog.json, keyed by product id."""
+    with open(CATALOG_FILE, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    return {product['productId']: product for product in catalog['products']}
+
 def parse_products_js():
-    """Parse products.js file and extract product data."""
+    """Parse a hand-written products.js file and extract product data (legacy fallback)."""
     with open(PRODUCTS_JS_FILE, 'r', encoding='utf-8') as f:
         content = f.read()
     
@@ -151,8 +167,75 @@ def generate_description(product):
     
     return description
 
-def generate_xml_feed(products):
-    """Generate Facebook product feed in XML format."""
+def build_item_fields(product_id, product):
+    """Build the ordered (tag, text) pairs for one feed item."""
+    fields = []
+    
+    # Required fields
+    fields.append(('g:id', escape_xml(product_id)))
+    fields.append(('g:title', escape_xml(product.get('name', ''))))
+    
+    # Link (required)
+    fields.append(('g:link', get_product_url(product_id)))
+    
+    # Image link (required)
+    image_path = product.get('image', '')
+    if image_path:
+        fields.append(('g:image_link', get_image_url(image_path)))
+    
+    # Description
+    fields.append(('g:description', escape_xml(generate_description(product))))
+    
+    # Availability (required)
+    category = product.get('category', 'retail')
+    fields.append(('g:availability', 'in stock'))
+    
+    # Price (required)
+    price = product.get('price', 0)
+    try:
+        price_float = float(price) if price else 0.0
+        if price_float > 0:
+            fields.append(('g:price', format_price(price_float)))
+        else:
+            fields.append(('g:price', '0.00 USD'))
+    except (ValueError, TypeError):
+        fields.append(('g:price', '0.00 USD'))
+    
+    # Condition (required)
+    fields.append(('g:condition', 'new'))
+    
+    # Brand
+    fields.append(('g:brand', 'Agroverse'))
+    
+    # Additional fields
+    if product.get('farm'):
+        fields.append(('g:custom_label_0', escape_xml(product.get('farm'))))
+    
+    if product.get('shipment'):
+        fields.append(('g:custom_label_1', escape_xml(product.get('shipment'))))
+    
+    if category:
+        fields.append(('g:product_type', escape_xml(category.title())))
+    
+    # Google product category
+    fields.append(('g:google_product_category', '357'))
+    
+    return fields
+
+def removed_item_fields(product_id):
+    """Fields for an item that disappeared from the catalog (delta feed only)."""
+    return [
+        ('g:id', escape_xml(product_id)),
+        ('g:availability', 'out of stock'),
+    ]
+
+def fingerprint_item(fields):
+    """Stable SHA-256 fingerprint of an item's feed fields."""
+    canonical = json.dumps(fields, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def render_feed(items, last_build_date, title='Agroverse Shop Products'):
+    """Render a list of item field lists to pretty-printed feed XML."""
     # Create XML structure
     rss = ET.Element('rss', {
         'version': '2.0',
@@ -162,68 +245,15 @@ def generate_xml_feed(products):
     channel = ET.SubElement(rss, 'channel')
     
     # Channel metadata
-    ET.SubElement(channel, 'title').text = 'Agroverse Shop Products'
+    ET.SubElement(channel, 'title').text = title
     ET.SubElement(channel, 'link').text = BASE_URL
     ET.SubElement(channel, 'description').text = 'Agroverse regenerative cacao products from Brazilian farms'
-    ET.SubElement(channel, 'lastBuildDate').text = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+    ET.SubElement(channel, 'lastBuildDate').text = last_build_date
     
-    # Add products
-    for product_id, product in products.items():
+    for fields in items:
         item = ET.SubElement(channel, 'item')
-        
-        # Required fields
-        ET.SubElement(item, 'g:id').text = escape_xml(product_id)
-        ET.SubElement(item, 'g:title').text = escape_xml(product.get('name', ''))
-        
-        # Link (required)
-        product_url = get_product_url(product_id)
-        ET.SubElement(item, 'g:link').text = product_url
-        
-        # Image link (required)
-        image_path = product.get('image', '')
-        if image_path:
-            image_url = get_image_url(image_path)
-            ET.SubElement(item, 'g:image_link').text = image_url
-        
-        # Description
-        description = generate_description(product)
-        ET.SubElement(item, 'g:description').text = escape_xml(description)
-        
-        # Availability (required)
-        category = product.get('category', 'retail')
-        availability = 'in stock'
-        ET.SubElement(item, 'g:availability').text = availability
-        
-        # Price (required)
-        price = product.get('price', 0)
-        try:
-            price_float = float(price) if price else 0.0
-            if price_float > 0:
-                price_str = format_price(price_float)
-                ET.SubElement(item, 'g:price').text = price_str
-            else:
-                ET.SubElement(item, 'g:price').text = '0.00 USD'
-        except (ValueError, TypeError):
-            ET.SubElement(item, 'g:price').text = '0.00 USD'
-        
-        # Condition (required)
-        ET.SubElement(item, 'g:condition').text = 'new'
-        
-        # Brand
-        ET.SubElement(item, 'g:brand').text = 'Agroverse'
-        
-        # Additional fields
-        if product.get('farm'):
-            ET.SubElement(item, 'g:custom_label_0').text = escape_xml(product.get('farm'))
-        
-        if product.get('shipment'):
-            ET.SubElement(item, 'g:custom_label_1').text = escape_xml(product.get('shipment'))
-        
-        if category:
-            ET.SubElement(item, 'g:product_type').text = escape_xml(category.title())
-        
-        # Google product category
-        ET.SubElement(item, 'g:google_product_category').text = '357'
+        for tag, text in fields:
+            ET.SubElement(item, tag).text = text
     
     # Convert to string with pretty formatting
     xml_str = ET.tostring(rss, encoding='unicode')
@@ -232,28 +262,112 @@ def generate_xml_feed(products):
     
     # Remove empty lines
     lines = [line for line in pretty_xml.split('\n') if line.strip()]
-    pretty_xml = '\n'.join(lines)
+    return '\n'.join(lines)
+
+def read_previous_build_date(xml_file):
+    """Return the lastBuildDate of an existing feed file, or None."""
+    if not xml_file.exists():
+        return None
+    content = xml_file.read_text(encoding='utf-8')
+    match = re.search(r'<lastBuildDate>([^<]+)</lastBuildDate>', content)
+    return match.group(1) if match else None
+
+def load_fingerprints():
+    """Load per-item fingerprints persisted by the previous run."""
+    if not FINGERPRINTS_FILE.exists():
+        return None
+    with open(FINGERPRINTS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f).get('items', {})
+
+def save_fingerprints(fingerprints):
+    """Persist per-item fingerprints for the next run."""
+    with open(FINGERPRINTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'items': fingerprints}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def diff_fingerprints(previous, current):
+    """Compare two {id: fingerprint} maps. Returns (added, changed, removed) id lists."""
+    added = [pid for pid in current if pid not in previous]
+    changed = [pid for pid in current if pid in previous and previous[pid] != current[pid]]
+    removed = [pid for pid in previous if pid not in current]
+    return added, changed, removed
+
+def write_delta_feed(delta_items, build_date):
+    """Write the delta feed unless it already has exactly this content."""
+    xml = render_feed(delta_items, build_date, title='Agroverse Shop Products (delta)')
+    if DELTA_XML_FILE.exists() and DELTA_XML_FILE.read_text(encoding='utf-8') == xml:
+        return
+    with open(DELTA_XML_FILE, 'w', encoding='utf-8') as f:
+        f.write(xml)
+
+def generate_xml_feed(products):
+    """
+    Generate the full Facebook product feed plus a delta feed.
     
-    # Write to file
+    The full feed is only rewritten (and its lastBuildDate only bumped) when
+    an item actually changed. The delta feed carries added and changed items
+    in full, and removed items as "out of stock" so Commerce Manager drops
+    them without re-ingesting the whole catalog. When nothing changed, or
+    there is no previous run to compare to, the delta feed is emptied so an
+    earlier run's changes are never ingested twice.
+    """
+    items = {pid: build_item_fields(pid, product) for pid, product in products.items()}
+    fingerprints = {pid: fingerprint_item(fields) for pid, fields in items.items()}
+    
+    # Full feed: re-render with the previous date first; identical output means no change
+    previous_date = read_previous_build_date(OUTPUT_XML_FILE)
+    if previous_date:
+        unchanged_xml = render_feed(list(items.values()), previous_date)
+        if unchanged_xml == OUTPUT_XML_FILE.read_text(encoding='utf-8'):
+            print(f"⏭️  No content changes, keeping {OUTPUT_XML_FILE.name} (lastBuildDate {previous_date})")
+            write_delta_feed([], previous_date)
+            save_fingerprints(fingerprints)
+            return False
+    
+    build_date = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
     print(f"Writing XML feed to {OUTPUT_XML_FILE}...")
     with open(OUTPUT_XML_FILE, 'w', encoding='utf-8') as f:
-        f.write(pretty_xml)
-    
+        f.write(render_feed(list(items.values()), build_date))
     print(f"✅ Generated XML feed: {OUTPUT_XML_FILE}")
+    
+    # Delta feed: only meaningful when there is a previous run to compare to
+    previous = load_fingerprints()
+    if previous is None:
+        print("ℹ️  No previous fingerprints found; the full feed is the baseline (empty delta written)")
+        write_delta_feed([], build_date)
+    else:
+        added, changed, removed = diff_fingerprints(previous, fingerprints)
+        print(f"   Added: {len(added)}, changed: {len(changed)}, removed: {len(removed)}")
+        delta_items = [items[pid] for pid in added + changed]
+        delta_items += [removed_item_fields(pid) for pid in removed]
+        print(f"Writing delta feed to {DELTA_XML_FILE}...")
+        write_delta_feed(delta_items, build_date)
+        print(f"✅ Generated delta feed: {DELTA_XML_FILE}")
+    
+    save_fingerprints(fingerprints)
+    return True
 
 def generate_facebook_feed():
     """Generate Facebook product feed in XML format."""
-    print(f"Reading products from {PRODUCTS_JS_FILE}...")
-    products = parse_products_js()
+    if CATALOG_FILE.exists():
+        print(f"Reading products from {CATALOG_FILE}...")
+        products = load_catalog_products()
+    else:
+        print(f"Reading products from {PRODUCTS_JS_FILE}...")
+        products = parse_products_js()
     
     print(f"Found {len(products)} products\n")
     
     # Generate XML feed
-    generate_xml_feed(products)
+    if not generate_xml_feed(products):
+        print(f"\n✅ Facebook product feed is up to date ({len(products)} products)")
+        return
     
     print(f"\n✅ Successfully generated Facebook product feed with {len(products)} products")
     print(f"📄 XML file: {OUTPUT_XML_FILE}")
     print(f"🌐 Feed URL: {BASE_URL}/facebook_product_feed.xml")
+    if DELTA_XML_FILE.exists():
+        print(f"🔁 Delta feed URL: {BASE_URL}/{DELTA_XML_FILE.name}")
     print("\nNext steps:")
     print("1. Commit and push the XML file to GitHub")
     print("2. In Facebook Commerce Manager, add a data source")
@@ -3,18 +3,56 @@
 Generate Legacy Redirects from CSV
 
 This script parses the legacy_agroverse_shop_URL_Redirects_Export.csv file
-and generates a JavaScript redirect map for use in 404.html.
+and generates:
+1. js/legacy-redirects.js - the full redirect map, for review
+2. A static stub page (<old-path>/index.html) for every exact redirect, with
+   meta refresh, canonical link and a JavaScript fallback, so legacy URLs
+   resolve on the first response instead of via 404.html
+3. js/legacy-redirects.json - a compact prefix trie with the wildcard
+   patterns (e.g. /recipes/*) and any exact redirects that could not get a
+   stub; 404.html fetches it only when a request actually misses
+
+Before anything is written, the redirects are compiled as a graph: chains
+(a destination that is itself a legacy source or wildcard match, common
+after two migrations) are collapsed to their final target so visitors take
+one hop, loops and self-redirects are dropped, and internal targets that
+do not exist on the site are reported.
+
+Without a CSV argument the redirects are re-read from the committed
+js/legacy-redirects.js, which regenerates the stubs and trie.
 
 Usage:
     python3 scripts/generate_redirects.py path/to/legacy_agroverse_shop_URL_Redirects_Export.csv
+    python3 scripts/generate_redirects.py            # rebuild stubs/trie from js/legacy-redirects.js
+    python3 scripts/generate_redirects.py --check    # only print the redirect graph report
 """
 
 import csv
+import re
 import sys
 import os
+import json
+import html
+import argparse
 from pathlib import Path
 from urllib.parse import urlparse, urljoin
 
+REPO_ROOT = Path(__file__).parent.parent
+JS_OUTPUT = REPO_ROOT / 'js' / 'legacy-redirects.js'
+TRIE_OUTPUT = REPO_ROOT / 'js' / 'legacy-redirects.json'
+BASE_URL = 'https://www.agroverse.shop'
+
+# Wix wildcard redirects: every path under the prefix goes to the target
+PATTERN_REDIRECTS = {
+    '/recipes/*': '/recipes',
+    '/recipes-1/*': '/recipes-1',
+}
+
+# Marks generated stubs so they can be updated or removed on the next run
+STUB_MARKER = '<meta name="generator" content="generate_redirects.py">'
+STUB_EXCLUDED_DIRS = {'node_modules', '.git', 'scripts', 'docs', 'google-app-script'}
+JS_ENTRY_PATTERN = re.compile(r"^\s*'((?:[^'\\]|\\.)*)'\s*:\s*'((?:[^'\\]|\\.)*)'", re.MULTILINE)
+
 def normalize_path(path):
     """Normalize URL path for redirect map."""
     # Remove leading/trailing slashes, then add one leading slash
@@ -77,8 +115,16 @@ def parse_csv(csv_path):
                 source_path = source_parsed.path or source
                 dest_path = dest_parsed.path or dest
                 
+                # Wildcard sources ("/recipes/*") become prefix redirects
+                if source_path.endswith('*'):
+                    source_key = normalize_path(source_path.rstrip('*')).rstrip('/') + '/*'
+                else:
+                    source_key = None
+
                 # If destination is full URL, keep it as-is
-                if dest_parsed.netloc:
+                if source_key:
+                    redirects[source_key] = dest if dest_parsed.netloc else normalize_path(dest_path)
+                elif dest_parsed.netloc:
                     redirects[normalize_path(source_path)] = dest
                 else:
                     redirects[normalize_path(source_path)] = normalize_path(dest_path)
@@ -104,6 +150,7 @@ def generate_js_file(redirects, output_path):
         " * Format:",
         " *   '/old-url': '/new-url'           - Internal redirect",
         " *   '/old-url': 'https://external'   - External redirect",
+        " *   '/old-dir/*': '/new-url'         - Wildcard (served via js/legacy-redirects.json)",
         " *",
         " * IMPORTANT:",
         " * - All paths should start with '/'",
@@ -143,35 +190,290 @@ def generate_js_file(redirects, output_path):
     print(f"✓ Generated redirect map: {output_path}")
     print(f"  Total redirects: {len(redirects)}")
 
+def load_js_map(js_path):
+    """Read the redirect map back from a generated legacy-redirects.js."""
+    text = js_path.read_text(encoding='utf-8')
+    unescape = lambda value: value.replace("\\'", "'")
+    return {unescape(old): unescape(new) for old, new in JS_ENTRY_PATTERN.findall(text)}
+
+def split_redirects(redirects):
+    """Split a redirect map into exact redirects and wildcard prefix redirects."""
+    exact = {}
+    patterns = dict(PATTERN_REDIRECTS)
+    for old_path, new_path in redirects.items():
+        if old_path.endswith('/*'):
+            patterns[old_path] = new_path
+        else:
+            exact[old_path] = new_path
+    return exact, patterns
+
+def stub_path(old_path, repo_root):
+    """Where the stub for a legacy path lives, or None if it cannot have one."""
+    segments = old_path.strip('/').split('/')
+    if old_path == '/' or any(not re.match(r'^[\w.~-]+$', seg) or seg in ('.', '..') for seg in segments):
+        return None
+    if segments[0] in STUB_EXCLUDED_DIRS or '.' in segments[-1]:
+        return None
+    return repo_root.joinpath(*segments, 'index.html')
+
+def is_stub(path):
+    """Whether an index.html was generated by this script."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return STUB_MARKER in f.read(512)
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def render_stub(new_path):
+    """Static redirect page for one legacy URL."""
+    is_external = new_path.startswith(('http://', 'https://'))
+    canonical = new_path if is_external else BASE_URL + new_path
+    target = html.escape(new_path, quote=True)
+    script_target = json.dumps(new_path).replace('</', '<\\/')
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  {STUB_MARKER}
+  <title>Redirecting...</title>
+  <meta name="robots" content="noindex">
+  <link rel="canonical" href="{html.escape(canonical, quote=True)}">
+  <meta http-equiv="refresh" content="0;url={target}">
+  <script>window.location.replace({script_target});</script>
+</head>
+<body>
+  <p>Redirecting to <a href="{target}">{html.escape(new_path)}</a>...</p>
+</body>
+</html>
+"""
+
+def generate_stub_pages(redirects, repo_root):
+    """
+    Write a static stub for every exact redirect and remove stale stubs.
+
+    Existing (non-stub) pages are never overwritten. Returns the exact
+    redirects that could not get a stub, which go into the trie instead.
+    """
+    written = unchanged = 0
+    without_stub = {}
+    current = set()
+
+    for old_path, new_path in sorted(redirects.items()):
+        path = stub_path(old_path, repo_root)
+        if path is None or (path.exists() and not is_stub(path)):
+            without_stub[old_path] = new_path
+            continue
+        current.add(path.resolve())
+        content = render_stub(new_path)
+        if path.exists() and path.read_text(encoding='utf-8') == content:
+            unchanged += 1
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+        written += 1
+
+    stale = [path for path in repo_root.rglob('index.html')
+             if not STUB_EXCLUDED_DIRS.intersection(path.relative_to(repo_root).parts)
+             and path.resolve() not in current and is_stub(path)]
+    for path in stale:
+        path.unlink()
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # directory still has other content
+    removed = len(stale)
+
+    print(f"✓ Redirect stubs: {written} written, {unchanged} unchanged, {removed} removed")
+    for old_path in sorted(without_stub):
+        print(f"  ⚠️  No stub for {old_path} (existing page or unsupported path) - using 404.html")
+    return without_stub
+
+def build_trie(exact, patterns):
+    """
+    Build a prefix trie keyed by path segment.
+
+    Each node is a dict of child segments; '$' holds the target for an exact
+    match of the node's path and '*' the target for anything below it.
+    """
+    trie = {}
+    for old_path, new_path in exact.items():
+        node = trie
+        for segment in [s for s in old_path.split('/') if s]:
+            node = node.setdefault(segment, {})
+        node['$'] = new_path
+    for pattern, new_path in patterns.items():
+        node = trie
+        for segment in [s for s in pattern[:-2].split('/') if s]:
+            node = node.setdefault(segment, {})
+        node['*'] = new_path
+    return trie
+
+def generate_trie_file(trie, output_path):
+    """Write the trie as compact JSON for 404.html."""
+    content = json.dumps(trie, separators=(',', ':'), sort_keys=True) + '\n'
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(content, encoding='utf-8')
+    print(f"✓ Generated redirect trie: {output_path} ({len(content)} bytes)")
+
+def is_external(url):
+    return url.startswith(('http://', 'https://'))
+
+def page_exists(path, repo_root):
+    """Whether an internal path is served by a real page (not a redirect stub)."""
+    segments = [s for s in urlparse(path).path.split('/') if s]
+    target = repo_root.joinpath(*segments)
+    if segments and target.is_file():
+        return True
+    index = target / 'index.html'
+    return index.is_file() and not is_stub(index)
+
+def match_pattern(trie, path):
+    """Target of the deepest wildcard pattern covering path, or None."""
+    node = trie
+    match = None
+    for segment in [s for s in path.split('/') if s]:
+        if '*' in node:
+            match = node['*']
+        node = node.get(segment)
+        if node is None:
+            break
+    return match
+
+def compile_redirects(exact, patterns, repo_root):
+    """
+    Flatten the redirect graph so every redirect points at its final target.
+
+    Each node (a path) has at most one outgoing edge: its exact redirect, or
+    else the wildcard pattern covering it. Paths served by real pages and
+    external URLs are terminal. Every node is resolved once and memoized, so
+    this runs in linear time. Returns (exact, patterns, report) with loops
+    and self-redirects removed.
+    """
+    pattern_trie = build_trie({}, patterns)
+    resolved = {}  # path -> (final target, hops) or None when it ends in a loop
+
+    def next_hop(target):
+        if is_external(target):
+            return None
+        key = normalize_path(urlparse(target).path)
+        if page_exists(key, repo_root):
+            return None
+        if key in exact:
+            return exact[key]
+        return match_pattern(pattern_trie, key)
+
+    def resolve(target):
+        chain = []
+        position = {}
+        node = target
+        while True:
+            key = node if is_external(node) else normalize_path(urlparse(node).path)
+            if key in resolved:
+                tail = resolved[key]
+                break
+            if key in position:
+                tail = None  # loop
+                break
+            position[key] = len(chain)
+            chain.append((key, node))
+            following = next_hop(node)
+            if following is None:
+                tail = (node, 0)
+                break
+            node = following
+        for i, (key, _) in enumerate(reversed(chain)):
+            if key not in resolved:
+                resolved[key] = None if tail is None else (tail[0], tail[1] + i)
+        return resolved[chain[0][0]] if chain else tail
+
+    report = {'chains': [], 'loops': [], 'self': [], 'missing': []}
+
+    def points_at_itself(source, target):
+        if is_external(target):
+            return False
+        key = normalize_path(urlparse(target).path)
+        if source.endswith('/*'):
+            return key.startswith(source[:-1])
+        return key == source
+
+    def flatten(source, target):
+        if points_at_itself(source, target):
+            report['self'].append(source)
+            return None
+        result = resolve(target)
+        if result is None:
+            report['loops'].append(source)
+            return None
+        final, hops = result
+        if hops:
+            report['chains'].append((source, hops + 1, final))
+        if not is_external(final) and not page_exists(final, repo_root):
+            report['missing'].append((source, final))
+        return final
+
+    flat_exact = {}
+    for source, target in sorted(exact.items()):
+        final = flatten(source, target)
+        if final is not None:
+            flat_exact[source] = final
+    flat_patterns = {}
+    for pattern, target in sorted(patterns.items()):
+        final = flatten(pattern, target)
+        if final is not None:
+            flat_patterns[pattern] = final
+    return flat_exact, flat_patterns, report
+
+def print_graph_report(report):
+    """Summarize chains, loops and missing targets found by compile_redirects."""
+    print(f"✓ Redirect graph: {len(report['chains'])} chains collapsed, "
+          f"{len(report['loops'])} loops, {len(report['self'])} self-redirects, "
+          f"{len(report['missing'])} missing targets")
+    for source, hops, final in report['chains']:
+        print(f"  ⛓️  {source} → {final} ({hops} hops → 1)")
+    for source in report['loops']:
+        print(f"  ❌ Loop: {source} never reaches a page - dropped")
+    for source in report['self']:
+        print(f"  ❌ Self-redirect: {source} - dropped")
+    for source, final in report['missing']:
+        print(f"  ⚠️  {source} → {final}: no such page on this site")
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/generate_redirects.py <csv_file>")
-        print("\nExample:")
-        print("  python3 scripts/generate_redirects.py legacy_agroverse_shop_URL_Redirects_Export.csv")
-        sys.exit(1)
-    
-    csv_path = Path(sys.argv[1])
-    
-    # Default output path
-    script_dir = Path(__file__).parent
-    repo_root = script_dir.parent
-    output_path = repo_root / 'js' / 'legacy-redirects.js'
-    
-    print(f"Parsing CSV: {csv_path}")
-    redirects = parse_csv(csv_path)
-    
+    parser = argparse.ArgumentParser(description='Generate legacy redirects from the Wix CSV export')
+    parser.add_argument('csv_file', nargs='?', help='Redirects CSV (default: re-read js/legacy-redirects.js)')
+    parser.add_argument('--no-stubs', action='store_true', help='Do not write static stub pages')
+    parser.add_argument('--check', action='store_true',
+                        help='Only report chains/loops/missing targets; exit 1 on loops')
+    args = parser.parse_args()
+
+    if args.csv_file:
+        csv_path = Path(args.csv_file)
+        print(f"Parsing CSV: {csv_path}")
+        redirects = parse_csv(csv_path)
+    else:
+        print(f"Reading existing map: {JS_OUTPUT}")
+        redirects = load_js_map(JS_OUTPUT)
+
     if not redirects:
-        print("Warning: No redirects found in CSV file")
+        print("Warning: No redirects found")
         sys.exit(1)
-    
+
     print(f"Found {len(redirects)} redirects")
-    generate_js_file(redirects, output_path)
-    
+    exact, patterns = split_redirects(redirects)
+    exact, patterns, report = compile_redirects(exact, patterns, REPO_ROOT)
+    print_graph_report(report)
+    if args.check:
+        sys.exit(1 if report['loops'] or report['self'] else 0)
+
+    if args.csv_file:
+        generate_js_file({**exact, **patterns}, JS_OUTPUT)
+
+    trie_exact = exact if args.no_stubs else generate_stub_pages(exact, REPO_ROOT)
+    generate_trie_file(build_trie(trie_exact, patterns), TRIE_OUTPUT)
+
     print("\nNext steps:")
     print("1. Review js/legacy-redirects.js to verify redirects")
-    print("2. Test redirects locally using 404.html")
+    print("2. Test redirects locally (stub pages, then 404.html for wildcard paths)")
     print("3. Commit and deploy to GitHub Pages")
 
 if __name__ == '__main__':
     main()
-
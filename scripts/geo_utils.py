@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Geographic helpers shared by the navigation build scripts
+
+- load_js_data() reads the stop data objects in js/*-data.js
+  (window.PARTNERS_DATA, window.FARMS_DATA, window.BRAZILIAN_PATH_DATA, ...)
+- load_js_order() reads a generated stop order (window.BRAZILIAN_PATH_ORDER)
+- haversine_matrix() computes all pairwise great-circle distances at once
+  with NumPy broadcasting
+- nearest_neighbors() returns the k nearest stops for every stop, using a
+  scikit-learn BallTree for large sets when it is installed
+- greedy_tour() and two_opt() order stops into a short route
+- GridIndex buckets points into lat/lon cells for radius and bounding-box
+  queries without comparing every pair
+
+Requirements:
+    pip install numpy
+    pip install scikit-learn    # optional; only used above BALLTREE_MIN_POINTS
+"""
+
+import re
+import math
+from collections import defaultdict
+
+import numpy as np
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:
+    BallTree = None
+
+EARTH_RADIUS_KM = 6371.0
+# Below this many points the full distance matrix is faster than a tree
+BALLTREE_MIN_POINTS = 2000
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# GridIndex cell size; ~111 km north-south, so radius queries of tens of km
+# touch at most a few cells
+DEFAULT_CELL_DEG = 1.0
+
+DATA_ASSIGNMENT_PATTERN = re.compile(r'window\.\w+\s*=\s*\{')
+ENTRY_KEY_PATTERN = re.compile(r"'([\w-]+)'\s*:\s*$")
+FIELD_PATTERN = re.compile(r"(\w+)\s*:\s*('(?:[^'\\]|\\.)*'|-?\d+(?:\.\d+)?)")
+
+
+def _unescape_js(value):
+    return re.sub(r"\\(.)", r"\1", value[1:-1])
+
+
+def load_js_data(path):
+    """
+    Parse the stop entries of a js/*-data.js file.
+
+    Returns {slug: {field: value}} with the scalar fields of each entry
+    (strings unescaped, numbers as float); nested lists such as the
+    Pacific path's partners are skipped.
+    """
+    text = path.read_text(encoding='utf-8')
+    start = DATA_ASSIGNMENT_PATTERN.search(text).end() - 1
+    entries = {}
+    depth = 0
+    key = None
+    body = []
+    i = start
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            end = i + 1
+            while end < n and text[end] != ch:
+                end += 2 if text[end] == '\\' else 1
+            if depth == 2:
+                body.append(text[i:end + 1])
+            i = end + 1
+            continue
+        if text.startswith('//', i):
+            i = text.find('\n', i)
+            i = n if i == -1 else i
+            continue
+        if ch in '{[':
+            if depth == 1 and ch == '{':
+                match = ENTRY_KEY_PATTERN.search(text[max(start, i - 200):i])
+                key = match.group(1) if match else None
+                body = []
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 1 and key:
+                fields = {}
+                for name, value in FIELD_PATTERN.findall(''.join(body)):
+                    fields[name] = _unescape_js(value) if value.startswith("'") else float(value)
+                entries[key] = fields
+                key = None
+            elif depth == 0:
+                break
+        elif depth == 2:
+            body.append(ch)
+        i += 1
+    return entries
+
+
+def load_js_order(path, name):
+    """The slugs of a window.<name> = [...] array, or None if the file has none."""
+    match = re.search(r'window\.%s\s*=\s*\[(.*?)\];' % re.escape(name),
+                      path.read_text(encoding='utf-8'), re.DOTALL)
+    return re.findall(r"'([\w-]+)'", match.group(1)) if match else None
+
+
+def haversine_matrix(lats, lons):
+    """Pairwise great-circle distances in km between all points (N x N)."""
+    lat = np.radians(np.asarray(lats, dtype=float))[:, None]
+    lon = np.radians(np.asarray(lons, dtype=float))[:, None]
+    a = (np.sin((lat - lat.T) / 2) ** 2
+         + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distances in km from one point to each of lats/lons."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lon2 = np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbors(lats, lons, k):
+    """
+    The k nearest other points for every point.
+
+    Returns (indices, distances_km), both N x k arrays sorted by distance.
+    """
+    count = len(lats)
+    k = min(k, count - 1)
+    if k <= 0:
+        return np.empty((count, 0), dtype=int), np.empty((count, 0))
+
+    if BallTree is not None and count >= BALLTREE_MIN_POINTS:
+        points = np.radians(np.column_stack([lats, lons]))
+        distances, indices = BallTree(points, metric='haversine').query(points, k=k + 1)
+        # Drop each point itself (not necessarily column 0 when points coincide)
+        keep = indices != np.arange(count)[:, None]
+        keep[keep.sum(axis=1) > k, -1] = False
+        indices = indices[keep].reshape(count, k)
+        distances = distances[keep].reshape(count, k) * EARTH_RADIUS_KM
+        return indices, distances
+
+    matrix = haversine_matrix(lats, lons)
+    np.fill_diagonal(matrix, np.inf)
+    indices = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+    distances = np.take_along_axis(matrix, indices, axis=1)
+    order = np.argsort(distances, axis=1, kind='stable')
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(distances, order, axis=1)
+
+
+def greedy_tour(matrix, start, end=None):
+    """
+    Nearest-neighbour walk through every point, starting at index start.
+
+    With end given, that point is held back and appended as the last stop.
+    """
+    count = len(matrix)
+    visited = np.zeros(count, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    if end is not None and end != start:
+        visited[end] = True
+    while not visited.all():
+        distances = np.where(visited, np.inf, matrix[tour[-1]])
+        nearest = int(np.argmin(distances))
+        tour.append(nearest)
+        visited[nearest] = True
+    if end is not None and end != start:
+        tour.append(end)
+    return tour
+
+
+def tour_length(matrix, tour):
+    """Total length of an open path through the given indices."""
+    tour = np.asarray(tour)
+    return float(matrix[tour[:-1], tour[1:]].sum())
+
+
+def two_opt(matrix, tour, max_passes=100):
+    """
+    Improve an open path with 2-opt moves, keeping both endpoints fixed.
+
+    Each pass evaluates every segment reversal starting at position i in one
+    vectorized step and applies the best improving one, until no reversal
+    shortens the path.
+    """
+    tour = np.asarray(tour)
+    count = len(tour)
+    if count < 4:
+        return tour.tolist()
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, count - 2):
+            # Reversing tour[i:k + 1] replaces edges (i-1, i) and (k, k+1)
+            # with (i-1, k) and (i, k+1)
+            k = np.arange(i + 1, count - 1)
+            a, b = tour[i - 1], tour[i]
+            c, d = tour[k], tour[k + 1]
+            delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = int(k[best])
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return tour.tolist()
+
+
+class GridIndex:
+    """
+    Points bucketed into cell_deg x cell_deg latitude/longitude cells.
+
+    A query only looks at the cells overlapping its bounding box, then
+    filters those candidates exactly, so lookups stay cheap as the number of
+    stops and events grows.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.lon_cells = max(1, round(360 / cell_deg))
+        self.cells = defaultdict(list)
+        self.points = {}
+
+    def _row(self, lat):
+        return math.floor((lat + 90) / self.cell_deg)
+
+    def _col(self, lon):
+        return math.floor((lon + 180) / self.cell_deg) % self.lon_cells
+
+    def insert(self, key, lat, lon):
+        if key in self.points:
+            self.remove(key)
+        self.points[key] = (lat, lon)
+        self.cells[(self._row(lat), self._col(lon))].append(key)
+
+    def remove(self, key):
+        lat, lon = self.points.pop(key)
+        self.cells[(self._row(lat), self._col(lon))].remove(key)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _candidates(self, south, west, north, east):
+        rows = range(self._row(max(south, -90)), self._row(min(north, 90)) + 1)
+        if east - west >= 360:
+            cols = range(self.lon_cells)
+        else:
+            first, last = self._col(west), self._col(east)
+            # A box crossing the antimeridian wraps around the column range
+            cols = range(first, last + 1) if first <= last else [*range(first, self.lon_cells), *range(last + 1)]
+        for row in rows:
+            for col in cols:
+                yield from self.cells.get((row, col), ())
+
+    def within_bbox(self, south, west, north, east):
+        """Keys of the points inside a box; west > east means it crosses the antimeridian."""
+        crosses = west > east
+        if crosses:
+            east += 360
+        keys = []
+        for key in self._candidates(south, west, north, east):
+            lat, lon = self.points[key]
+            if crosses and lon < west:
+                lon += 360
+            if south <= lat <= north and west <= lon <= east:
+                keys.append(key)
+        return keys
+
+    def within_radius(self, lat, lon, km):
+        """[(key, distance_km)] for the points within km of (lat, lon), nearest first."""
+        dlat = km / KM_PER_DEGREE
+        # A circle reaching a pole covers every longitude
+        if abs(lat) + dlat >= 90:
+            dlon = 360
+        else:
+            dlon = min(360, dlat / math.cos(math.radians(abs(lat) + dlat)))
+        keys = list(self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon))
+        if not keys:
+            return []
+        coords = np.array([self.points[key] for key in keys])
+        distances = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+        order = np.argsort(distances, kind='stable')
+        return [(keys[i], float(distances[i])) for i in order if distances[i] <= km]
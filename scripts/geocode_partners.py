@@ -2,113 +2,112 @@
 """
 Script to geocode partner locations using Google Places API
 Requires GOOGLE_PLACES_API_KEY environment variable or .env file
+
+Lookups are cached in .geocode-cache.sqlite3 (see geocoding.py), so only
+new partners or partners whose name/location changed hit the API. Uncached
+partners are geocoded concurrently, within GOOGLE_QPS.
+
+Usage:
+    python3 scripts/geocode_partners.py
+    python3 scripts/geocode_partners.py --refresh          # ignore cached answers
+    python3 scripts/geocode_partners.py --fake fixture.json  # offline, canned answers
 """
 
-import os
 import json
-import requests
 import sys
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from geocoding import default_geocoder, load_google_api_key, DEFAULT_WORKERS
 
 # Load partner locations
 script_dir = Path(__file__).parent
 repo_root = script_dir.parent
 locations_file = repo_root / 'partner_locations.json'
+output_file = repo_root / 'partner_coordinates.json'
+
 
-if not locations_file.exists():
-    print(f"❌ Error: {locations_file} not found")
-    sys.exit(1)
-
-with open(locations_file, 'r') as f:
-    partner_locations = json.load(f)
-
-# Get API key from environment or .env file
-api_key = os.getenv('GOOGLE_PLACES_API_KEY') or os.getenv('GOOGLE_MAPS_API_KEY')
-
-if not api_key:
-    # Try to load from .env file
-    env_file = repo_root / '.env'
-    if env_file.exists():
-        with open(env_file, 'r') as f:
-            for line in f:
-                if line.startswith('GOOGLE_PLACES_API_KEY=') or line.startswith('GOOGLE_MAPS_API_KEY='):
-                    api_key = line.split('=', 1)[1].strip().strip('"').strip("'")
-                    break
-
-if not api_key:
-    print("❌ Error: GOOGLE_PLACES_API_KEY or GOOGLE_MAPS_API_KEY not found")
-    print("   Please set it as an environment variable or in .env file")
-    sys.exit(1)
-
-print(f"✅ Using Google Places API key: {api_key[:10]}...")
-
-# Geocode each partner location
-partner_coordinates = {}
-
-for slug, data in partner_locations.items():
-    location = data['location']
-    name = data['name']
-    
-    print(f"\n📍 Geocoding: {name} - {location}")
-    
-    # Use Google Places API Text Search
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        'query': f"{name}, {location}",
-        'key': api_key
+def not_found(name, location):
+    return {
+        'name': name,
+        'location': location,
+        'lat': None,
+        'lng': None,
+        'formatted_address': location,
+        'place_id': None
     }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        result = response.json()
-        
-        if result['status'] == 'OK' and result['results']:
-            place = result['results'][0]
-            lat = place['geometry']['location']['lat']
-            lng = place['geometry']['location']['lng']
-            formatted_address = place.get('formatted_address', location)
-            
-            partner_coordinates[slug] = {
-                'name': name,
-                'location': location,
-                'lat': lat,
-                'lng': lng,
-                'formatted_address': formatted_address,
-                'place_id': place.get('place_id', '')
-            }
-            
-            print(f"   ✅ Found: {formatted_address}")
-            print(f"   Coordinates: {lat}, {lng}")
-        else:
-            print(f"   ⚠️  Status: {result.get('status', 'UNKNOWN')}")
-            if result.get('error_message'):
-                print(f"   Error: {result['error_message']}")
-            partner_coordinates[slug] = {
-                'name': name,
-                'location': location,
-                'lat': None,
-                'lng': None,
-                'formatted_address': location,
-                'place_id': None
-            }
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        partner_coordinates[slug] = {
-            'name': name,
-            'location': location,
-            'lat': None,
-            'lng': None,
-            'formatted_address': location,
-            'place_id': None
-        }
-
-# Save coordinates
-output_file = repo_root / 'partner_coordinates.json'
-with open(output_file, 'w') as f:
-    json.dump(partner_coordinates, f, indent=2)
 
-print(f"\n✅ Saved coordinates to {output_file}")
-print(f"   Successfully geocoded: {sum(1 for p in partner_coordinates.values() if p['lat'] is not None)}/{len(partner_coordinates)} partners")
+
+def main():
+    parser = argparse.ArgumentParser(description='Geocode partner_locations.json with Google Places')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached answers and query again')
+    parser.add_argument('--fake', metavar='FIXTURE', help='Answer from a {query: place} JSON file instead of the API')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Partners geocoded in parallel')
+    args = parser.parse_args()
+
+    if not locations_file.exists():
+        print(f"❌ Error: {locations_file} not found")
+        sys.exit(1)
+
+    with open(locations_file, 'r') as f:
+        partner_locations = json.load(f)
+
+    api_key = None
+    if not args.fake:
+        # Get API key from environment or .env file
+        api_key = load_google_api_key(repo_root)
+        if not api_key:
+            print("❌ Error: GOOGLE_PLACES_API_KEY or GOOGLE_MAPS_API_KEY not found")
+            print("   Please set it as an environment variable or in .env file")
+            sys.exit(1)
+        print(f"✅ Using Google Places API key: {api_key[:10]}...")
+
+    geocoder = default_geocoder(google_api_key=api_key, nominatim=False, fake_fixture=args.fake,
+                                refresh=args.refresh, max_workers=args.workers)
+
+    # Geocode each partner location
+    partner_coordinates = {}
+
+    def lookup(data):
+        return geocoder.geocode(f"{data['name']}, {data['location']}")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        answers = executor.map(lookup, partner_locations.values())
+        for (slug, data), (place, _, errors) in zip(partner_locations.items(), answers):
+            location = data['location']
+            name = data['name']
+
+            print(f"\n📍 Geocoding: {name} - {location}")
+
+            if place is not None:
+                partner_coordinates[slug] = {
+                    'name': name,
+                    'location': location,
+                    'lat': place['lat'],
+                    'lng': place['lon'],
+                    'formatted_address': place.get('formatted_address') or location,
+                    'place_id': place.get('place_id', '')
+                }
+                print(f"   ✅ Found: {partner_coordinates[slug]['formatted_address']}")
+                print(f"   Coordinates: {place['lat']}, {place['lon']}")
+            else:
+                for provider, error in errors:
+                    print(f"   ❌ Error ({provider}): {error}")
+                if not errors:
+                    print("   ⚠️  Status: ZERO_RESULTS")
+                partner_coordinates[slug] = not_found(name, location)
+
+    geocoder.close()
+
+    # Save coordinates
+    with open(output_file, 'w') as f:
+        json.dump(partner_coordinates, f, indent=2)
+
+    print(f"\n✅ Saved coordinates to {output_file}")
+    print(f"   Successfully geocoded: {sum(1 for p in partner_coordinates.values() if p['lat'] is not None)}/{len(partner_coordinates)} partners")
+    print(f"   Lookups: {geocoder.summary()}")
 
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Shared geocoding layer for geocode_partners.py and find_partner_addresses.py
+
+Lookups go through a Geocoder that tries its providers in order and keeps
+every answer in an on-disk SQLite cache (.geocode-cache.sqlite3 in the repo
+root), keyed by provider and normalized query:
+- a found place is reused for POSITIVE_TTL_DAYS
+- "no results" is cached too (negative caching), for NEGATIVE_TTL_DAYS,
+  so hopeless queries are not retried on every run
+- API and network errors are never cached
+
+Re-running a script therefore only hits the network for partners that are
+new or whose name/location changed.
+
+Network lookups are concurrent: providers share one pooled requests.Session,
+each provider draws from its own token bucket (Nominatim's 1 request/second
+policy, GOOGLE_QPS for Google), and Geocoder.race() runs a partner's query
+variants in parallel, cancelling the rest once one returns an accepted match.
+The endpoints can be pointed at a local stub server with the
+GEOCODER_GOOGLE_URL and GEOCODER_NOMINATIM_URL environment variables.
+
+Providers:
+- GooglePlacesProvider: Places Text Search (needs an API key)
+- NominatimProvider: OpenStreetMap, free, limited to 1 request per second
+- FakeProvider: canned answers from a JSON file ({query: result | null}),
+  for running the scripts offline
+
+Every provider returns a place dict
+    {'name', 'formatted_address', 'lat', 'lon', 'place_id', 'address'}
+or None when nothing matched.
+
+Requirements:
+    pip install requests
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_DIR = Path(__file__).parent.parent
+CACHE_FILE = BASE_DIR / '.geocode-cache.sqlite3'
+POSITIVE_TTL_DAYS = 90
+NEGATIVE_TTL_DAYS = 7
+REQUEST_TIMEOUT = 10  # seconds
+
+GOOGLE_TEXT_SEARCH_URL = 'https://maps.googleapis.com/maps/api/place/textsearch/json'
+NOMINATIM_SEARCH_URL = 'https://nominatim.openstreetmap.org/search'
+NOMINATIM_USER_AGENT = 'Agroverse Partner Address Finder'
+NOMINATIM_RATE = 1.0  # requests per second, per Nominatim's usage policy
+GOOGLE_QPS = 10.0
+DEFAULT_WORKERS = 8
+GOOGLE_KEY_NAMES = ('GOOGLE_PLACES_API_KEY', 'GOOGLE_MAPS_API_KEY', 'GOOGLE_API_KEY')
+
+
+class GeocodingError(Exception):
+    """A provider failed to answer (network error, quota, denied key)."""
+
+
+class LookupCancelled(Exception):
+    """A raced lookup was abandoned because another query variant already matched."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, bursts of up to capacity."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, cancelled=None):
+        """Wait for a token. Returns False if cancelled is set while waiting."""
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                return False
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if cancelled is not None:
+                cancelled.wait(wait)
+            else:
+                time.sleep(wait)
+
+
+def pooled_session(pool_size=DEFAULT_WORKERS):
+    """A requests.Session keeping up to pool_size connections open per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def normalize_query(query):
+    """Cache key for a query: case, accents, punctuation and spacing don't matter."""
+    text = unicodedata.normalize('NFKD', query)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def load_google_api_key(repo_root=BASE_DIR):
+    """Google API key from the environment or the repo's .env file, or None."""
+    for name in GOOGLE_KEY_NAMES:
+        if os.getenv(name):
+            return os.getenv(name)
+    env_file = repo_root / '.env'
+    if env_file.exists():
+        for line in env_file.read_text(encoding='utf-8').splitlines():
+            name, _, value = line.partition('=')
+            if name.strip() in GOOGLE_KEY_NAMES and value.strip():
+                return value.strip().strip('"').strip("'")
+    return None
+
+
+class GeocodeCache:
+    """SQLite cache of provider answers with per-entry expiry."""
+
+    def __init__(self, path=CACHE_FILE, positive_ttl_days=POSITIVE_TTL_DAYS,
+                 negative_ttl_days=NEGATIVE_TTL_DAYS):
+        self.path = path
+        self.positive_ttl = positive_ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        # Shared by the lookup threads; every access goes through self.lock
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS geocode ('
+            ' provider TEXT NOT NULL,'
+            ' query TEXT NOT NULL,'
+            ' result TEXT,'
+            ' fetched_at REAL NOT NULL,'
+            ' PRIMARY KEY (provider, query))'
+        )
+        self.connection.commit()
+
+    def get(self, provider, query):
+        """(True, place or None) for a fresh entry, (False, None) on a miss."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT result, fetched_at FROM geocode WHERE provider = ? AND query = ?',
+                (provider, normalize_query(query)),
+            ).fetchone()
+        if row is None:
+            return False, None
+        result, fetched_at = row
+        ttl = self.positive_ttl if result is not None else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return False, None
+        return True, json.loads(result) if result is not None else None
+
+    def set(self, provider, query, place):
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO geocode (provider, query, result, fetched_at) VALUES (?, ?, ?, ?)',
+                (provider, normalize_query(query),
+                 json.dumps(place, ensure_ascii=False) if place is not None else None, time.time()),
+            )
+            self.connection.commit()
+
+    def purge_expired(self):
+        """Delete expired entries. Returns the number removed."""
+        now = time.time()
+        with self.lock:
+            cursor = self.connection.execute(
+                'DELETE FROM geocode WHERE (result IS NOT NULL AND fetched_at < ?)'
+                ' OR (result IS NULL AND fetched_at < ?)',
+                (now - self.positive_ttl, now - self.negative_ttl),
+            )
+            self.connection.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.connection.close()
+
+
+class GooglePlacesProvider:
+    name = 'google'
+
+    def __init__(self, api_key, session=None, url=GOOGLE_TEXT_SEARCH_URL, qps=GOOGLE_QPS):
+        self.api_key = api_key
+        self.session = session or pooled_session()
+        self.url = url
+        self.limiter = TokenBucket(qps, capacity=max(1, int(qps)))
+
+    def lookup(self, query):
+        try:
+            response = self.session.get(self.url, params={'query': query, 'key': self.api_key},
+                                        timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+
+        status = data.get('status')
+        if status == 'ZERO_RESULTS' or (status == 'OK' and not data.get('results')):
+            return None
+        if status != 'OK':
+            raise GeocodingError(f"{status}: {data.get('error_message', 'no error message')}")
+
+        place = data['results'][0]
+        location = place['geometry']['location']
+        return {
+            'name': place.get('name'),
+            'formatted_address': place.get('formatted_address'),
+            'lat': location['lat'],
+            'lon': location['lng'],
+            'place_id': place.get('place_id', ''),
+            'address': {},
+        }
+
+
+class NominatimProvider:
+    name = 'nominatim'
+
+    def __init__(self, session=None, url=NOMINATIM_SEARCH_URL, rate=NOMINATIM_RATE):
+        self.session = session or pooled_session()
+        self.url = url
+        self.limiter = TokenBucket(rate)
+
+    def lookup(self, query):
+        try:
+            response = self.session.get(
+                self.url,
+                params={'q': query, 'format': 'json', 'limit': 1, 'addressdetails': 1},
+                headers={'User-Agent': NOMINATIM_USER_AGENT},
+                timeout=REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+
+        if not data:
+            return None
+        result = data[0]
+        address = result.get('address', {})
+        return {
+            'name': result.get('name') or query,
+            'formatted_address': format_nominatim_address(address) or result.get('display_name', ''),
+            'lat': float(result['lat']),
+            'lon': float(result['lon']),
+            'place_id': str(result.get('place_id', '')),
+            'address': address,
+        }
+
+
+def format_nominatim_address(address):
+    """'<number> <road>, <city>, <state>, <postcode>, <country>' from Nominatim address parts."""
+    parts = []
+    if address.get('house_number') and address.get('road'):
+        parts.append(f"{address['house_number']} {address['road']}")
+    elif address.get('road'):
+        parts.append(address['road'])
+    city = address.get('city') or address.get('town') or address.get('village')
+    if city:
+        parts.append(city)
+    for key in ('state', 'postcode', 'country'):
+        if address.get(key):
+            parts.append(address[key])
+    return ', '.join(parts)
+
+
+class FakeProvider:
+    """Answers from a {query: place | null} JSON fixture; unknown queries find nothing."""
+
+    limiter = None
+
+    def __init__(self, fixture, name='fake'):
+        self.name = name
+        self.lookups = 0
+        places = json.loads(Path(fixture).read_text(encoding='utf-8')) if not isinstance(fixture, dict) else fixture
+        self.places = {normalize_query(query): place for query, place in places.items()}
+
+    def lookup(self, query):
+        self.lookups += 1
+        return self.places.get(normalize_query(query))
+
+
+class Geocoder:
+    """Cached, rate-limited lookups across an ordered list of providers."""
+
+    def __init__(self, providers, cache=None, refresh=False, max_workers=DEFAULT_WORKERS):
+        self.providers = providers
+        self.cache = cache
+        self.refresh = refresh
+        self.max_workers = max_workers
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0, 'cancelled': 0}
+        self.stats_lock = threading.Lock()
+        self._executor = None
+
+    def _count(self, stat):
+        with self.stats_lock:
+            self.stats[stat] += 1
+
+    @property
+    def executor(self):
+        """Thread pool for raced query variants (separate from any caller pool)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def lookup(self, provider, query, cancelled=None):
+        """One provider's answer for a query, from the cache when fresh."""
+        if self.cache is not None and not self.refresh:
+            found, place = self.cache.get(provider.name, query)
+            if found:
+                self._count('hits')
+                return place
+        if provider.limiter is not None and not provider.limiter.acquire(cancelled):
+            self._count('cancelled')
+            raise LookupCancelled(query)
+        if cancelled is not None and cancelled.is_set():
+            self._count('cancelled')
+            raise LookupCancelled(query)
+        self._count('misses')
+        try:
+            place = provider.lookup(query)
+        except GeocodingError:
+            self._count('errors')
+            raise
+        if self.cache is not None:
+            self.cache.set(provider.name, query, place)
+        return place
+
+    def geocode(self, query, accept=None, cancelled=None):
+        """
+        First place any provider finds for the query: (place, provider name, errors).
+
+        accept(place, provider_name) can reject a match (e.g. one in the
+        wrong city) so the next provider is tried. place and provider name
+        are None when nothing matched; errors lists (provider name, message)
+        for providers that failed.
+        """
+        errors = []
+        for provider in self.providers:
+            try:
+                place = self.lookup(provider, query, cancelled)
+            except GeocodingError as e:
+                errors.append((provider.name, str(e)))
+                continue
+            if place is not None and (accept is None or accept(place, provider.name)):
+                return place, provider.name, errors
+        return None, None, errors
+
+    def race(self, queries, accept=None):
+        """
+        Geocode several variants of one query concurrently.
+
+        Returns (place, provider name, matching query, errors) for the
+        earliest-listed variant that produces an accepted match, so the
+        answer does not depend on which lookup finishes first: a later
+        variant only wins once every variant before it has failed. Variants
+        still waiting for a rate-limit token are then cancelled. Nones when
+        no variant matched.
+        """
+        if len(queries) == 1:
+            place, provider, errors = self.geocode(queries[0], accept)
+            return place, provider, queries[0] if place else None, errors
+
+        cancelled = threading.Event()
+        futures = [self.executor.submit(self.geocode, query, accept, cancelled) for query in queries]
+        errors = []
+        next_index = 0
+        try:
+            for _ in as_completed(futures):
+                while next_index < len(futures) and futures[next_index].done():
+                    index = next_index
+                    next_index += 1
+                    try:
+                        place, provider, variant_errors = futures[index].result()
+                    except LookupCancelled:
+                        continue
+                    errors.extend(variant_errors)
+                    if place is not None:
+                        return place, provider, queries[index], errors
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+        return None, None, None, errors
+
+    def summary(self):
+        return (f"{self.stats['hits']} cached, {self.stats['misses']} looked up, "
+                f"{self.stats['cancelled']} cancelled, {self.stats['errors']} errors")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self.cache is not None:
+            self.cache.close()
+
+
+def default_geocoder(google_api_key=None, nominatim=True, fake_fixture=None, refresh=False,
+                     cache_file=CACHE_FILE, max_workers=DEFAULT_WORKERS):
+    """Google (when a key is given) then Nominatim, or a FakeProvider, with the shared cache."""
+    if fake_fixture:
+        providers = [FakeProvider(fake_fixture)]
+    else:
+        session = pooled_session(max_workers)
+        providers = []
+        if google_api_key:
+            providers.append(GooglePlacesProvider(
+                google_api_key, session, url=os.getenv('GEOCODER_GOOGLE_URL') or GOOGLE_TEXT_SEARCH_URL))
+        if nominatim:
+            providers.append(NominatimProvider(
+                session, url=os.getenv('GEOCODER_NOMINATIM_URL') or NOMINATIM_SEARCH_URL))
+    return Geocoder(providers, GeocodeCache(cache_file), refresh=refresh, max_workers=max_workers)
@@ -7,37 +7,32 @@ Usage:
 """
 
 import json
-import csv
 import sys
-from pathlib import Path
+
+from dns_records import DnsRecord, unique_records, write_csv
 
 def parse_dns_json(json_data, records=None):
-    """Recursively parse JSON to find DNS records."""
+    """Recursively parse JSON to find DNS records (as DnsRecords)."""
     if records is None:
         records = []
     
-    if isinstance(json_data, dict):
-        # Check if this object looks like a DNS record
-        if any(key in json_data for key in ['hostname', 'host', 'name', 'record']):
-            record = {
-                'hostname': json_data.get('hostname') or json_data.get('host') or json_data.get('name') or json_data.get('record') or '',
-                'value': json_data.get('value') or json_data.get('data') or json_data.get('target') or json_data.get('content') or '',
-                'ttl': str(json_data.get('ttl') or json_data.get('TTL') or json_data.get('ttl_seconds') or '')
-            }
-            
-            # Also check for record type
-            record_type = json_data.get('type') or json_data.get('recordType') or ''
+    stack = [json_data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            # Check if this object looks like a DNS record
+            hostname = item.get('hostname') or item.get('host') or item.get('name') or item.get('record') or ''
+            value = item.get('value') or item.get('data') or item.get('target') or item.get('content') or ''
+            if isinstance(hostname, str) and isinstance(value, str) and (hostname or value):
+                ttl = item.get('ttl') or item.get('TTL') or item.get('ttl_seconds')
+                record_type = item.get('type') or item.get('recordType')
+                records.append(DnsRecord.parse(hostname, value, ttl,
+                                               record_type if isinstance(record_type, str) else None))
             
-            if record['hostname'] or record['value']:
-                records.append(record)
-        
-        # Recurse into nested objects
-        for value in json_data.values():
-            parse_dns_json(value, records)
-    
-    elif isinstance(json_data, list):
-        for item in json_data:
-            parse_dns_json(item, records)
+            # Recurse into nested objects
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
     
     return records
 
@@ -68,29 +63,18 @@ def main():
         print("\nPlease check the structure and update the parser if needed.")
         return
     
-    # Remove duplicates
-    seen = set()
-    unique_records = []
-    for record in records:
-        key = (record['hostname'].lower(), record['value'].lower())
-        if key not in seen:
-            seen.add(key)
-            unique_records.append(record)
-    
-    # Write to CSV
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['hostname', 'value', 'ttl'])
-        writer.writeheader()
-        writer.writerows(unique_records)
+    # Remove duplicates and write to CSV
+    records = unique_records(records)
+    write_csv(records, output_file)
     
-    print(f"\n✅ Extracted {len(unique_records)} DNS records")
+    print(f"\n✅ Extracted {len(records)} DNS records")
     print(f"📄 Output written to: {output_file}")
     
     # Print preview
-    if unique_records:
+    if records:
         print("\n📋 First 10 records:")
-        for i, record in enumerate(unique_records[:10], 1):
-            print(f"  {i}. {record['hostname']} → {record['value']} (TTL: {record['ttl']})")
+        for i, record in enumerate(records[:10], 1):
+            print(f"  {i}. {record.name} {record.type} → {record.value} (TTL: {record.ttl})")
 
 if __name__ == '__main__':
     main()
@@ -4,6 +4,12 @@ List all Route53 hosted zones in AWS account
 
 This script lists all Route53 hosted zones and optionally shows DNS records for each zone.
 
+Zones are paged through with list_hosted_zones, and each zone's name servers
+and record sets are fetched concurrently through a bounded thread pool (with
+botocore's adaptive retries absorbing Route53's 5 requests/second throttle).
+The inventory is cached in .route53-inventory-cache.json for --cache-ttl
+seconds, and can be written as JSON or CSV for audits.
+
 Requirements:
     pip install boto3 python-dotenv
 
@@ -17,13 +23,30 @@ Setup:
     Or:
     2. Configure AWS CLI:
        aws configure
+
+Usage:
+    python3 scripts/list_route53_zones.py
+    python3 scripts/list_route53_zones.py --records
+    python3 scripts/list_route53_zones.py --records --format json --output inventory.json
+    python3 scripts/list_route53_zones.py --records --format csv --refresh
+    python3 scripts/list_route53_zones.py --local zone.json   # the local stand-in used by migrate_dns_route53.py
 """
 
 import os
 import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
 import boto3
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from route53_sync import fetch_hosted_zones, fetch_record_sets, InMemoryRoute53
+
 # Try to load from .env file
 try:
     from dotenv import load_dotenv
@@ -31,6 +54,15 @@ try:
 except ImportError:
     pass
 
+BASE_DIR = Path(__file__).parent.parent
+CACHE_FILE = BASE_DIR / '.route53-inventory-cache.json'
+CACHE_TTL = 900  # seconds
+DEFAULT_WORKERS = 8
+MAX_RETRY_ATTEMPTS = 10
+RECORDS_SHOWN = 20  # per zone in the text listing
+# Cache entries are keyed by these prefixes; anything else (older formats) is dropped on save
+CACHE_KEY_PREFIXES = ('local:', 'account:')
+
 def get_aws_credentials():
     """Get AWS credentials from environment or .env file."""
     access_key = os.getenv('AWS_ACCESS_KEY_ID')
@@ -39,34 +71,162 @@ def get_aws_credentials():
     
     return access_key, secret_key, region
 
-def list_route53_zones(show_records=False):
-    """List all Route53 hosted zones."""
-    print("=" * 70)
-    print("AWS Route53 - List Hosted Zones")
+def account_cache_key():
+    """Cache key for the configured AWS account; the access key is hashed, never stored."""
+    identity = os.getenv('AWS_ACCESS_KEY_ID') or os.getenv('AWS_PROFILE') or 'default'
+    return f"account:{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+
+def create_route53_client(log=print, workers=DEFAULT_WORKERS):
+    """boto3 Route53 client with adaptive retries (Route53 allows 5 requests/second per account)."""
+    access_key, secret_key, region = get_aws_credentials()
+    config = Config(retries={'mode': 'adaptive', 'max_attempts': MAX_RETRY_ATTEMPTS},
+                    max_pool_connections=max(1, workers) * 2)
+    if access_key and secret_key:
+        log(f"✅ Using AWS credentials from environment")
+        return boto3.client('route53', aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+                            region_name=region, config=config)
+    # Try using default credentials (from AWS CLI or IAM role)
+    log(f"✅ Using AWS default credentials (AWS CLI or IAM role)")
+    return boto3.client('route53', region_name=region, config=config)
+
+def zone_details(client, zone, with_records):
+    """One zone's inventory entry: summary, name servers and (optionally) every record set."""
+    zone_id = zone['Id'].split('/')[-1]
+    entry = {
+        'id': zone_id,
+        'name': zone['Name'].rstrip('.'),
+        'record_count': zone.get('ResourceRecordSetCount', 0),
+        'private': zone.get('Config', {}).get('PrivateZone', False),
+        'name_servers': [],
+        'errors': [],
+    }
+    try:
+        zone_info = client.get_hosted_zone(Id=zone_id)
+        entry['name_servers'] = zone_info.get('DelegationSet', {}).get('NameServers', [])
+    except ClientError as e:
+        entry['errors'].append(f"name servers: {e}")
+    if with_records:
+        entry['records'] = []
+        try:
+            for record in fetch_record_sets(client, zone_id):
+                values = [rr['Value'] for rr in record.get('ResourceRecords', [])]
+                if 'AliasTarget' in record:
+                    values = [record['AliasTarget']['DNSName']]
+                entry['records'].append({'name': record['Name'].rstrip('.'), 'type': record['Type'],
+                                         'ttl': record.get('TTL'), 'values': values,
+                                         'alias': 'AliasTarget' in record})
+        except ClientError as e:
+            entry['errors'].append(f"records: {e}")
+    return entry
+
+def build_inventory(client, with_records=False, workers=DEFAULT_WORKERS):
+    """Every zone's details, fetched concurrently by at most `workers` threads."""
+    zones = fetch_hosted_zones(client)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(lambda zone: zone_details(client, zone, with_records), zones))
+
+def load_cached_inventory(cache_file, key, ttl):
+    """Cached zones for this account/mode if younger than ttl seconds, else None."""
+    try:
+        cache = json.loads(Path(cache_file).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    entry = cache.get(key)
+    if entry and time.time() - entry['fetched_at'] < ttl:
+        return entry
+    return None
+
+def save_cached_inventory(cache_file, key, zones):
+    cache_file = Path(cache_file)
+    try:
+        cache = json.loads(cache_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+    cache = {k: v for k, v in cache.items() if k.startswith(CACHE_KEY_PREFIXES)}
+    cache[key] = {'fetched_at': time.time(), 'zones': zones}
+    cache_file.write_text(json.dumps(cache, indent=2) + '\n', encoding='utf-8')
+
+def print_inventory(zones, show_records=False):
+    """Human-readable listing (the script's original output)."""
+    if not zones:
+        print("ℹ️  No hosted zones found in this AWS account")
+        print()
+        print("To create a hosted zone:")
+        print("  aws route53 create-hosted-zone --name yourdomain.com --caller-reference $(date +%s)")
+        return
+    
+    print(f"✅ Found {len(zones)} hosted zone(s)\n")
     print("=" * 70)
     print()
     
-    # Get credentials
-    access_key, secret_key, region = get_aws_credentials()
+    for i, zone in enumerate(zones, 1):
+        print(f"{i}. Zone: {zone['name']}")
+        print(f"   Zone ID: {zone['id']}")
+        print(f"   Record Count: {zone['record_count']}")
+        print(f"   Private Zone: {zone['private']}")
+        if zone['name_servers']:
+            print(f"   Name Servers:")
+            for ns in zone['name_servers']:
+                print(f"     - {ns}")
+        for error in zone['errors']:
+            print(f"   ⚠️  Could not fetch {error}")
+        
+        if show_records and zone.get('records'):
+            print(f"\n   DNS Records:")
+            for j, record in enumerate(zone['records'][:RECORDS_SHOWN], 1):
+                value_str = ', '.join(record['values'][:2])  # Show first 2 values
+                if len(record['values']) > 2:
+                    value_str += f" (+{len(record['values'])-2} more)"
+                ttl = record['ttl'] if record['ttl'] is not None else 'N/A'
+                print(f"      {j:2d}. {record['name']:40s} {record['type']:5s} → {value_str:50s} (TTL: {ttl})")
+            if len(zone['records']) > RECORDS_SHOWN:
+                print(f"      ... and {len(zone['records']) - RECORDS_SHOWN} more records")
+        
+        print()
+        print("-" * 70)
+        print()
+    
+    print("=" * 70)
+    print(f"✅ Total: {len(zones)} hosted zone(s)")
+    print("=" * 70)
+
+def write_csv_inventory(zones, out, with_records):
+    """One row per record set with --records, otherwise one row per zone."""
+    writer = csv.writer(out)
+    if with_records:
+        writer.writerow(['zone', 'zone_id', 'name', 'type', 'ttl', 'alias', 'values'])
+        for zone in zones:
+            for record in zone.get('records', []):
+                writer.writerow([zone['name'], zone['id'], record['name'], record['type'],
+                                 '' if record['ttl'] is None else record['ttl'], record['alias'],
+                                 ' | '.join(record['values'])])
+    else:
+        writer.writerow(['zone', 'zone_id', 'record_count', 'private', 'name_servers', 'errors'])
+        for zone in zones:
+            writer.writerow([zone['name'], zone['id'], zone['record_count'], zone['private'],
+                             ' '.join(zone['name_servers']), '; '.join(zone['errors'])])
+
+def list_route53_zones(show_records=False, output_format='text', output_file=None,
+                       workers=DEFAULT_WORKERS, cache_file=CACHE_FILE, cache_ttl=CACHE_TTL,
+                       refresh=False, local_state=None):
+    """List all Route53 hosted zones."""
+    text = output_format == 'text'
+    log = print if text else (lambda *a, **k: print(*a, file=sys.stderr, **k))
+    if text:
+        print("=" * 70)
+        print("AWS Route53 - List Hosted Zones")
+        print("=" * 70)
+        print()
     
     # Initialize Route53 client
     try:
-        if access_key and secret_key:
-            route53_client = boto3.client(
-                'route53',
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                region_name=region
-            )
-            print(f"✅ Using AWS credentials from environment")
+        if local_state:
+            route53_client = InMemoryRoute53(local_state)
+            cache_key = f"local:{Path(local_state).resolve()}"
         else:
-            # Try using default credentials (from AWS CLI or IAM role)
-            route53_client = boto3.client('route53', region_name=region)
-            print(f"✅ Using AWS default credentials (AWS CLI or IAM role)")
-        
-        print(f"✅ Region: {region}")
-        print()
-        
+            route53_client = create_route53_client(log, workers)
+            cache_key = account_cache_key()
+        cache_key += ':records' if show_records else ':zones'
     except NoCredentialsError:
         print("❌ Error: AWS credentials not found")
         print("\nPlease set AWS credentials:")
@@ -81,108 +241,58 @@ def list_route53_zones(show_records=False):
         print(f"❌ Error initializing Route53 client: {e}")
         sys.exit(1)
     
-    # List hosted zones
-    print("📋 Fetching Route53 hosted zones...")
-    print()
+    cached = None if refresh else load_cached_inventory(cache_file, cache_key, cache_ttl)
+    if cached:
+        zones = cached['zones']
+        log(f"📋 Using cached inventory ({time.time() - cached['fetched_at']:.0f}s old, --refresh to refetch)\n")
+    else:
+        log("📋 Fetching Route53 hosted zones...\n")
+        start = time.perf_counter()
+        try:
+            zones = build_inventory(route53_client, show_records, workers)
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
+            error_msg = e.response.get('Error', {}).get('Message', str(e))
+            print(f"❌ AWS API Error ({error_code}): {error_msg}")
+            sys.exit(1)
+        except NoCredentialsError:
+            print("❌ Error: AWS credentials not found (add them to .env or run aws configure)")
+            sys.exit(1)
+        log(f"⏱️  Fetched {len(zones)} zone(s) in {time.perf_counter() - start:.1f}s with {workers} workers\n")
+        save_cached_inventory(cache_file, cache_key, zones)
+    
+    if text:
+        print_inventory(zones, show_records)
+        return zones
     
+    out = open(output_file, 'w', newline='', encoding='utf-8') if output_file else sys.stdout
     try:
-        response = route53_client.list_hosted_zones()
-        zones = response.get('HostedZones', [])
-        
-        if not zones:
-            print("ℹ️  No hosted zones found in this AWS account")
-            print()
-            print("To create a hosted zone:")
-            print("  aws route53 create-hosted-zone --name yourdomain.com --caller-reference $(date +%s)")
-            return
-        
-        print(f"✅ Found {len(zones)} hosted zone(s)\n")
-        print("=" * 70)
-        print()
-        
-        for i, zone in enumerate(zones, 1):
-            zone_id = zone['Id'].split('/')[-1]
-            zone_name = zone['Name'].rstrip('.')
-            record_count = zone.get('ResourceRecordSetCount', 0)
-            is_private = zone.get('Config', {}).get('PrivateZone', False)
-            
-            print(f"{i}. Zone: {zone_name}")
-            print(f"   Zone ID: {zone_id}")
-            print(f"   Record Count: {record_count}")
-            print(f"   Private Zone: {is_private}")
-            
-            # Get name servers
-            try:
-                zone_info = route53_client.get_hosted_zone(Id=zone_id)
-                name_servers = zone_info.get('DelegationSet', {}).get('NameServers', [])
-                if name_servers:
-                    print(f"   Name Servers:")
-                    for ns in name_servers:
-                        print(f"     - {ns}")
-            except ClientError as e:
-                print(f"   ⚠️  Could not fetch name servers: {e}")
-            
-            # Optionally show DNS records
-            if show_records and record_count > 0:
-                print(f"\n   DNS Records:")
-                try:
-                    records_response = route53_client.list_resource_record_sets(
-                        HostedZoneId=zone_id,
-                        MaxItems='100'
-                    )
-                    records = records_response.get('ResourceRecordSets', [])
-                    
-                    for j, record in enumerate(records[:20], 1):  # Show first 20 records
-                        name = record['Name'].rstrip('.')
-                        record_type = record['Type']
-                        ttl = record.get('TTL', 'N/A')
-                        
-                        # Get record values
-                        values = []
-                        if 'ResourceRecords' in record:
-                            values = [rr['Value'] for rr in record['ResourceRecords']]
-                        elif 'AliasTarget' in record:
-                            values = [record['AliasTarget']['DNSName']]
-                        
-                        value_str = ', '.join(values[:2])  # Show first 2 values
-                        if len(values) > 2:
-                            value_str += f" (+{len(values)-2} more)"
-                        
-                        print(f"      {j:2d}. {name:40s} {record_type:5s} → {value_str:50s} (TTL: {ttl})")
-                    
-                    if len(records) > 20:
-                        print(f"      ... and {len(records) - 20} more records")
-                        
-                except ClientError as e:
-                    print(f"      ⚠️  Error fetching records: {e}")
-            
-            print()
-            print("-" * 70)
-            print()
-        
-        print("=" * 70)
-        print(f"✅ Total: {len(zones)} hosted zone(s)")
-        print("=" * 70)
-        
-    except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-        error_msg = e.response.get('Error', {}).get('Message', str(e))
-        print(f"❌ AWS API Error ({error_code}): {error_msg}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        sys.exit(1)
+        if output_format == 'json':
+            json.dump(zones, out, indent=2)
+            out.write('\n')
+        else:
+            write_csv_inventory(zones, out, show_records)
+    finally:
+        if output_file:
+            out.close()
+            log(f"📄 Inventory written to {output_file}")
+    return zones
 
 def main():
-    import argparse
-    
     parser = argparse.ArgumentParser(description='List Route53 hosted zones')
     parser.add_argument('--records', '-r', action='store_true',
                        help='Also show DNS records for each zone')
+    parser.add_argument('--format', choices=('text', 'json', 'csv'), default='text', help='Output format')
+    parser.add_argument('--output', '-o', help='Write JSON/CSV here instead of stdout')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Zones fetched in parallel')
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL, help='Reuse a cached inventory this many seconds')
+    parser.add_argument('--refresh', action='store_true', help='Ignore the cached inventory')
+    parser.add_argument('--local', metavar='STATE_JSON', help='Read the local Route53 stand-in stored in this file')
     args = parser.parse_args()
     
-    list_route53_zones(show_records=args.records)
+    list_route53_zones(show_records=args.records, output_format=args.format, output_file=args.output,
+                       workers=args.workers, cache_ttl=args.cache_ttl, refresh=args.refresh,
+                       local_state=args.local)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Unified store of every located place on the site, with a spatial index
+
+Location data is spread over several files:
+- js/partners-data.js, js/farms-data.js and the journey path data
+  (coordinates for partners, farms, cooperatives and experiences)
+- partner_coordinates.json (precise coordinates written by geocode_partners.py)
+- partner_locations.json (names and location strings)
+- event-details-registration/*/index.html (free-text venue written by
+  generate_event_pages.py)
+
+LocationStore loads all of them into one set of places keyed
+'<kind>:<slug>' and indexes them in a geo_utils.GridIndex, so build
+scripts can ask "partners within 50 km of X" or "events near this partner"
+without comparing every pair.
+
+Event venues are free text ("San Francisco", "Okanogan Family Faire") and
+are resolved, in order, by:
+1. a partner whose name contains every word of the venue
+2. a partner or farm city ("San Francisco" -> partners in San Francisco)
+3. the geocoding cache shared with geocode_partners.py (network lookups
+   only with --geocode)
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python3 scripts/location_store.py                              # summary
+    python3 scripts/location_store.py --near kikis-cocoa --radius 25
+    python3 scripts/location_store.py --bbox 37,-123,38.5,-121.5 --kind event
+"""
+
+import re
+import sys
+import json
+import argparse
+from html import unescape
+
+from geo_utils import GridIndex
+from build_neighbors import BASE_DIR, load_stops
+
+PARTNER_COORDINATES_FILE = BASE_DIR / 'partner_coordinates.json'
+PARTNER_LOCATIONS_FILE = BASE_DIR / 'partner_locations.json'
+EVENTS_DIR = BASE_DIR / 'event-details-registration'
+
+KINDS = ('partner', 'farm', 'cooperative', 'experience', 'event')
+DEFAULT_RADIUS_KM = 50
+
+EVENT_TITLE_PATTERN = re.compile(r'<h1>(.*?)</h1>', re.DOTALL)
+EVENT_VENUE_PATTERN = re.compile(r'<span>📍</span>\s*<span>(.*?)</span>', re.DOTALL)
+EVENT_DATE_PATTERN = re.compile(r'<span>📅</span>\s*<span>(.*?)</span>', re.DOTALL)
+
+
+def _words(text):
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+class LocationStore:
+    """Every located place, indexed for radius and bounding-box queries."""
+
+    def __init__(self, geocoder=None):
+        self.places = {}
+        self.unresolved = []
+        self.index = GridIndex()
+        self.geocoder = geocoder
+        self._load_stops()
+        self._load_partner_files()
+        self._load_events()
+
+    def add(self, kind, slug, name, lat, lon, **fields):
+        key = f'{kind}:{slug}'
+        self.places[key] = {'key': key, 'kind': kind, 'slug': slug, 'name': name,
+                            'lat': float(lat), 'lon': float(lon), **fields}
+        self.index.insert(key, float(lat), float(lon))
+        return self.places[key]
+
+    def _load_stops(self):
+        for slug, stop in load_stops().items():
+            self.add(stop['type'], slug, stop['name'], stop['lat'], stop['lon'],
+                     location=stop['location'], page=stop['page'])
+
+    def _load_partner_files(self):
+        """Prefer geocoded partner coordinates; add partners only listed in the JSON files."""
+        coordinates = {}
+        if PARTNER_COORDINATES_FILE.exists():
+            coordinates = json.loads(PARTNER_COORDINATES_FILE.read_text(encoding='utf-8'))
+        locations = {}
+        if PARTNER_LOCATIONS_FILE.exists():
+            locations = json.loads(PARTNER_LOCATIONS_FILE.read_text(encoding='utf-8'))
+
+        for slug in {**locations, **coordinates}:
+            data = {**locations.get(slug, {}), **coordinates.get(slug, {})}
+            existing = self.places.get(f'partner:{slug}')
+            lat, lon = data.get('lat'), data.get('lng')
+            if lat is None or lon is None:
+                if existing is not None:
+                    continue
+                place = self._geocode(f"{data.get('name', slug)}, {data.get('location', '')}")
+                if place is None:
+                    self.unresolved.append(('partner', slug, data.get('location', '')))
+                    continue
+                lat, lon = place['lat'], place['lon']
+            page = BASE_DIR / 'partners' / slug / 'index.html'
+            self.add('partner', slug, data.get('name', slug), lat, lon,
+                     location=data.get('location') or (existing or {}).get('location', ''),
+                     page=(existing or {}).get('page', page))
+
+    def _load_events(self):
+        if not EVENTS_DIR.exists():
+            return
+        for page in sorted(EVENTS_DIR.glob('*/index.html')):
+            text = page.read_text(encoding='utf-8', errors='ignore')
+            venue_match = EVENT_VENUE_PATTERN.search(text)
+            if not venue_match:
+                continue
+            title_match = EVENT_TITLE_PATTERN.search(text)
+            date_match = EVENT_DATE_PATTERN.search(text)
+            venue = unescape(venue_match.group(1)).strip()
+            slug = page.parent.name
+            resolved = self.resolve_venue(venue)
+            if resolved is None:
+                self.unresolved.append(('event', slug, venue))
+                continue
+            lat, lon, source = resolved
+            self.add('event', slug, unescape(title_match.group(1)).strip() if title_match else slug,
+                     lat, lon, location=venue, page=page, resolved_by=source,
+                     date=unescape(date_match.group(1)).strip() if date_match else None)
+
+    def _geocode(self, query):
+        """A place from the geocoding cache (or the network when a geocoder is given)."""
+        if self.geocoder is None:
+            try:
+                from geocoding import GeocodeCache, CACHE_FILE
+            except ImportError:
+                return None
+            if not CACHE_FILE.exists():
+                return None
+            cache = GeocodeCache(CACHE_FILE)
+            try:
+                for provider in ('google', 'nominatim'):
+                    found, place = cache.get(provider, query)
+                    if found and place is not None:
+                        return place
+            finally:
+                cache.close()
+            return None
+        place, _, _ = self.geocoder.geocode(query)
+        return place
+
+    def resolve_venue(self, venue):
+        """(lat, lon, how) for a free-text event venue, or None."""
+        words = set(_words(venue))
+        if not words:
+            return None
+        located = [p for p in self.places.values() if p['kind'] != 'event']
+
+        # 1. A partner or stop named after the venue
+        for place in located:
+            if words <= set(_words(place['name'])):
+                return place['lat'], place['lon'], place['key']
+
+        # 2. A city some partner or farm is in
+        in_city = [p for p in located
+                   if p.get('location') and words == set(_words(p['location'].split(',')[0]))]
+        if in_city:
+            lat = sum(p['lat'] for p in in_city) / len(in_city)
+            lon = sum(p['lon'] for p in in_city) / len(in_city)
+            return lat, lon, f"city of {in_city[0]['key']}"
+
+        # 3. Geocoding cache / network
+        place = self._geocode(venue)
+        if place is not None:
+            return place['lat'], place['lon'], 'geocoded'
+        return None
+
+    def near(self, lat, lon, km=DEFAULT_RADIUS_KM, kinds=None, exclude=None):
+        """[(place, distance_km)] within km of a point, nearest first."""
+        results = []
+        for key, distance in self.index.within_radius(lat, lon, km):
+            place = self.places[key]
+            if key == exclude or (kinds and place['kind'] not in kinds):
+                continue
+            results.append((place, distance))
+        return results
+
+    def near_place(self, key, km=DEFAULT_RADIUS_KM, kinds=None):
+        """Places within km of another place (excluding itself)."""
+        place = self.places[key]
+        return self.near(place['lat'], place['lon'], km, kinds, exclude=key)
+
+    def in_bbox(self, south, west, north, east, kinds=None):
+        places = [self.places[key] for key in self.index.within_bbox(south, west, north, east)]
+        return [p for p in places if not kinds or p['kind'] in kinds]
+
+    def find(self, slug):
+        """The place key for a slug (or full key), preferring partners."""
+        if slug in self.places:
+            return slug
+        for kind in KINDS:
+            if f'{kind}:{slug}' in self.places:
+                return f'{kind}:{slug}'
+        raise KeyError(f"no place named {slug!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the unified location store')
+    parser.add_argument('--near', metavar='SLUG', help='List places around this partner, farm or event')
+    parser.add_argument('--bbox', metavar='S,W,N,E', help='List places inside a bounding box')
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_KM, help='Radius in km for --near')
+    parser.add_argument('--kind', action='append', choices=KINDS, help='Only places of this kind (repeatable)')
+    parser.add_argument('--geocode', action='store_true', help='Geocode unknown venues over the network')
+    args = parser.parse_args()
+
+    geocoder = None
+    if args.geocode:
+        from geocoding import default_geocoder, load_google_api_key
+        geocoder = default_geocoder(google_api_key=load_google_api_key())
+
+    try:
+        store = LocationStore(geocoder)
+
+        if args.near:
+            key = store.find(args.near)
+            print(f"📍 Within {args.radius:g} km of {store.places[key]['name']}:")
+            for place, distance in store.near_place(key, args.radius, args.kind):
+                print(f"   {distance:7.1f} km  {place['kind']:<11} {place['name']}")
+        elif args.bbox:
+            south, west, north, east = (float(v) for v in args.bbox.split(','))
+            for place in store.in_bbox(south, west, north, east, args.kind):
+                print(f"   {place['kind']:<11} {place['name']} ({place['lat']:.4f}, {place['lon']:.4f})")
+        else:
+            counts = {}
+            for place in store.places.values():
+                counts[place['kind']] = counts.get(place['kind'], 0) + 1
+            print(f"📊 {len(store.places)} places: " + ', '.join(f"{n} {k}" for k, n in sorted(counts.items())))
+            for kind, slug, venue in store.unresolved:
+                print(f"   ⚠️  Unresolved {kind} {slug}: {venue!r}")
+    except (OSError, KeyError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        if geocoder is not None:
+            geocoder.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,10 @@
 """
 Migrate DNS records to Namecheap using their API
 
-This script reads DNS records from CSV and populates them in Namecheap.
+This script reads DNS records from CSV and merges them into the domain's
+Namecheap hosts. setHosts replaces every host at once, so the live hosts are
+read and merged first (see namecheap_sync.py): hosts added in the dashboard
+are kept, and setHosts is only called when something changed.
 
 Requirements:
     pip install requests
@@ -15,13 +18,26 @@ Setup:
        export NAMECHEAP_API_USER="your_username"
        export NAMECHEAP_API_KEY="your_api_key"
        export NAMECHEAP_CLIENT_IP="your_server_ip"
+
+Usage:
+    python3 scripts/migrate_dns_namecheap.py --dry-run
+    python3 scripts/migrate_dns_namecheap.py --yes
+    python3 scripts/migrate_dns_namecheap.py --sandbox
+    python3 scripts/migrate_dns_namecheap.py --local /tmp/namecheap.json   # rehearse against a local fake
+                                            # (last-applied state in /tmp/namecheap.last-applied.json)
 """
 
-import csv
 import os
 import sys
+import argparse
 import requests
-from urllib.parse import urlencode
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from dns_records import read_csv, partition_valid
+from namecheap_sync import (sync_domain, host_record, NamecheapClient, NamecheapError,
+                            FakeNamecheapServer, NAMECHEAP_API_URL, NAMECHEAP_SANDBOX_URL,
+                            STATE_FILE)
 
 # Try to load from .env file
 try:
@@ -30,9 +46,6 @@ try:
 except ImportError:
     pass  # python-dotenv not installed, will use environment variables only
 
-# Namecheap API endpoint
-NAMECHEAP_API_URL = "https://api.namecheap.com/xml.response"
-
 def get_namecheap_credentials():
     """Get Namecheap API credentials from .env file or environment variables."""
     username = os.getenv('NAMECHEAP_API_USER')
@@ -53,195 +66,136 @@ def get_namecheap_credentials():
     
     return username, api_key, client_ip
 
-def read_dns_records(csv_file):
-    """Read DNS records from CSV file."""
-    records = []
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['hostname'] and row['value']:
-                records.append({
-                    'hostname': row['hostname'],
-                    'value': row['value'],
-                    'ttl': row.get('ttl', '3600')
-                })
-    return records
+def desired_hosts(records, domain):
+    """Namecheap HostRecords for the CSV records (host names relative to the domain)."""
+    hosts = {}
+    for record in records:
+        # The domain's own nameservers are set at the registrar, not with setHosts
+        if record.type == 'NS' and record.relative_name(domain) == '@':
+            continue
+        host = host_record(record.relative_name(domain), record.type, record.value,
+                           mx_pref=record.priority, ttl=record.ttl)
+        hosts.setdefault(host, None)
+    return list(hosts)
 
-def determine_record_type(hostname, value):
-    """
-    Determine DNS record type based on hostname and value.
-    This is a simplified version - you may need to adjust based on your records.
-    """
-    # MX records (value contains priority)
-    if value.isdigit() or ('.' in value and any(x in value for x in ['aspmx', 'mail', 'mx'])):
-        # Check if it's actually an MX record by looking at the value
-        if 'aspmx' in value.lower() or 'mail' in value.lower():
-            return 'MX'
-    
-    # CNAME records (value is a domain name, not an IP)
-    if not value.replace('.', '').replace('-', '').isdigit() and '.' in value:
-        # Check if it's a domain name (not an IP)
-        if not all(part.isdigit() for part in value.split('.') if part):
-            # Could be CNAME or TXT
-            if value.startswith('v=') or 'include:' in value or '=' in value:
-                return 'TXT'
-            return 'CNAME'
-    
-    # A records (IPv4 address)
-    if all(part.isdigit() for part in value.split('.') if part) and len(value.split('.')) == 4:
-        return 'A'
-    
-    # NS records
-    if 'ns' in value.lower() and '.net' in value.lower():
-        return 'NS'
-    
-    # Default to A record
-    return 'A'
+def describe_host(action, host):
+    return f"{action:7s} {host.name:30s} {host.type:5s} → {host.address[:50]}"
 
-def set_namecheap_dns_records(domain, records, username, api_key, client_ip):
+def set_namecheap_dns_records(domain, records, client, dry_run=False, state_file=STATE_FILE):
     """
-    Set DNS records in Namecheap using their API.
+    Merge the CSV records into the domain's Namecheap hosts. Returns True on success.
     
-    Note: Namecheap API requires all records to be set at once.
-    You need to get existing records first, then merge with new ones.
+    Namecheap's setHosts replaces all hosts at once, so the live hosts are
+    read first and hosts added outside this script are kept (see namecheap_sync.py).
     """
-    print(f"\n📡 Migrating DNS records to Namecheap for {domain}...")
-    print(f"   Found {len(records)} records to migrate\n")
-    
-    # First, get existing records
-    print("1️⃣  Fetching existing DNS records...")
-    get_params = {
-        'ApiUser': username,
-        'ApiKey': api_key,
-        'UserName': username,
-        'Command': 'namecheap.domains.dns.getHosts',
-        'ClientIp': client_ip,
-        'SLD': domain.split('.')[0],  # Second-level domain (e.g., 'agroverse')
-        'TLD': domain.split('.')[1]     # Top-level domain (e.g., 'shop')
-    }
+    print(f"\n📡 Syncing DNS records to Namecheap for {domain}...")
+    print(f"   Found {len(records)} records in CSV\n")
     
-    try:
-        response = requests.get(NAMECHEAP_API_URL, params=get_params)
-        response.raise_for_status()
-        
-        # Parse XML response (simplified - you may want to use xml.etree.ElementTree)
-        print("   ✅ Retrieved existing records")
-        
-        # For now, we'll set new records
-        # In production, you'd merge with existing records
-        
-    except requests.exceptions.RequestException as e:
-        print(f"   ⚠️  Could not fetch existing records: {e}")
-        print("   Continuing with new records only...")
-    
-    # Prepare records for Namecheap API
-    # Namecheap API format: HostName, RecordType, Address, MXPref, TTL
-    print("\n2️⃣  Preparing records for migration...")
-    
-    prepared_records = []
-    for i, record in enumerate(records, 1):
-        record_type = determine_record_type(record['hostname'], record['value'])
-        
-        # Extract subdomain from hostname
-        hostname = record['hostname']
-        if hostname == domain:
-            subdomain = '@'  # Namecheap uses '@' for root domain
-        elif hostname.endswith('.' + domain):
-            subdomain = hostname.replace('.' + domain, '')
-        else:
-            subdomain = hostname
-        
-        prepared_records.append({
-            'HostName': subdomain,
-            'RecordType': record_type,
-            'Address': record['value'],
-            'MXPref': '10' if record_type == 'MX' else '10',  # Default MX priority
-            'TTL': record.get('ttl', '3600')
-        })
-        
-        print(f"   {i:2d}. {subdomain:30s} {record_type:5s} → {record['value']:50s}")
-    
-    # Set records via Namecheap API
-    print("\n3️⃣  Setting DNS records via Namecheap API...")
-    
-    # Note: Namecheap API requires all records in a single request
-    # You need to build the request with all records
-    set_params = {
-        'ApiUser': username,
-        'ApiKey': api_key,
-        'UserName': username,
-        'Command': 'namecheap.domains.dns.setHosts',
-        'ClientIp': client_ip,
-        'SLD': domain.split('.')[0],
-        'TLD': domain.split('.')[1],
-    }
-    
-    # Add each record (Namecheap API format)
-    for i, record in enumerate(prepared_records):
-        set_params[f'hostname{i+1}'] = record['HostName']
-        set_params[f'recordtype{i+1}'] = record['RecordType']
-        set_params[f'address{i+1}'] = record['Address']
-        if record['RecordType'] == 'MX':
-            set_params[f'mxpref{i+1}'] = record['MXPref']
-        set_params[f'ttl{i+1}'] = record['TTL']
+    print("1️⃣  Preparing records...")
+    valid, invalid = partition_valid(records)
+    for record, problems in invalid:
+        print(f"   ⚠️  Skipping {record.name} {record.type}: {'; '.join(problems)}")
+    desired = desired_hosts(valid, domain)
+    print(f"   ✅ {len(desired)} unique hosts\n")
     
+    print("2️⃣  Merging with the live hosts..." if dry_run else "2️⃣  Merging and applying...")
     try:
-        response = requests.post(NAMECHEAP_API_URL, data=set_params)
-        response.raise_for_status()
-        
-        # Check response for errors
-        if 'ERROR' in response.text:
-            print(f"   ❌ API Error: {response.text}")
-            return False
-        
-        print("   ✅ DNS records successfully migrated!")
-        return True
-        
-    except requests.exceptions.RequestException as e:
-        print(f"   ❌ Error setting DNS records: {e}")
+        result = sync_domain(client, domain, desired, dry_run=dry_run, state_file=state_file)
+    except (requests.exceptions.RequestException, NamecheapError, ET.ParseError) as e:
+        print(f"   ❌ Error: {e}")
         return False
+    
+    report = result['report']
+    for action in ('added', 'updated', 'removed'):
+        for host in report[action]:
+            print(f"   {describe_host(action, host)}")
+    for host in report['overridden']:
+        print(f"   ⚠️  Edited outside this script, replaced by the CSV: {describe_host('', host).strip()}")
+    for host in report['kept']:
+        print(f"   ⏭️  Not managed by this script (kept): {host.name} {host.type}")
+    
+    print(f"\n📊 Sync Summary:")
+    print(f"   Live hosts: {len(result['live'])}, after merge: {len(result['merged'])}")
+    print(f"   Added {len(report['added'])}, updated {len(report['updated'])}, "
+          f"removed {len(report['removed'])}, kept {len(report['kept'])}")
+    if dry_run:
+        print("   🔎 Dry run - setHosts not called")
+    elif result['applied']:
+        print("   ✅ setHosts applied the merged hosts")
+    else:
+        print("   ✅ Already in sync - setHosts not called")
+    print(f"   API calls: {sum(client.calls.values())} ({client.retries} retried)")
+    return True
 
 def main():
-    csv_file = 'assets/raw/agroverse_wix_domains_parsed.csv'
-    domain = 'agroverse.shop'  # Change this to your domain
+    parser = argparse.ArgumentParser(description='Sync DNS records from CSV to Namecheap')
+    parser.add_argument('--csv', default='assets/raw/agroverse_wix_domains_parsed.csv', help='Parsed DNS records CSV')
+    parser.add_argument('--domain', default='agroverse.shop', help='Domain to update')
+    parser.add_argument('--dry-run', action='store_true', help='Show the merge without calling setHosts')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+    parser.add_argument('--sandbox', action='store_true', help='Use the Namecheap sandbox API')
+    parser.add_argument('--api-url', help='Namecheap API endpoint (e.g. a fake started with namecheap_sync.py --serve)')
+    parser.add_argument('--local', metavar='STATE_JSON', help='Use an in-process fake Namecheap API stored in this file')
+    parser.add_argument('--state', help='Last-applied state file (default: .namecheap-last-applied.json, '
+                                        'or <STATE_JSON>.last-applied.json next to the --local file)')
+    args = parser.parse_args()
+    
+    csv_file = args.csv
+    domain = args.domain
     
     if not os.path.exists(csv_file):
         print(f"❌ Error: CSV file not found: {csv_file}")
-        print("   Run parse_wix_domains_final.py first to generate the CSV")
+        print("   Run parse_wix_domains.py first to generate the CSV")
         sys.exit(1)
     
-    # Get credentials
-    username, api_key, client_ip = get_namecheap_credentials()
-    
     # Read DNS records
-    records = read_dns_records(csv_file)
+    records = read_csv(csv_file, domain)
     
     if not records:
         print("❌ No DNS records found in CSV file")
         sys.exit(1)
     
-    print(f"📋 Found {len(records)} DNS records to migrate")
+    print(f"📋 Found {len(records)} DNS records to sync")
     
     # Confirm before proceeding
-    print(f"\n⚠️  This will overwrite existing DNS records for {domain}")
-    confirm = input("   Continue? (yes/no): ")
-    if confirm.lower() != 'yes':
-        print("   Cancelled.")
-        sys.exit(0)
-    
-    # Migrate records
-    success = set_namecheap_dns_records(domain, records, username, api_key, client_ip)
+    if not args.dry_run and not args.yes:
+        print(f"\n⚠️  This will update DNS records for {domain} (hosts added outside this script are kept)")
+        confirm = input("   Continue? (yes/no): ")
+        if confirm.lower() != 'yes':
+            print("   Cancelled.")
+            sys.exit(0)
+    
+    state_file = args.state or STATE_FILE
+    fake_server = None
+    if args.local:
+        # A rehearsal must not touch the last-applied state the next real sync deletes hosts by
+        state_file = args.state or Path(args.local).with_suffix('.last-applied.json')
+        fake_server = FakeNamecheapServer(args.local).start()
+        client = NamecheapClient('local', 'local', '127.0.0.1', url=fake_server.url)
+    else:
+        username, api_key, client_ip = get_namecheap_credentials()
+        url = args.api_url or (NAMECHEAP_SANDBOX_URL if args.sandbox else NAMECHEAP_API_URL)
+        client = NamecheapClient(username, api_key, client_ip, url=url)
     
-    if success:
-        print("\n✅ DNS migration completed successfully!")
+    try:
+        success = set_namecheap_dns_records(domain, records, client, dry_run=args.dry_run,
+                                            state_file=state_file)
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
+    
+    if success and args.dry_run:
+        print("\n✅ Dry run complete")
+    elif success:
+        print("\n✅ DNS sync completed successfully!")
         print("\n📝 Next steps:")
         print("   1. Verify DNS records in Namecheap dashboard")
-        print("   2. Wait for DNS propagation (can take up to 48 hours)")
+        print("   2. Wait for DNS propagation (can take up to 48 hours):")
+        print(f"      python3 scripts/dns_verify.py --csv {csv_file} --domain {domain} --authoritative")
         print("   3. Test your domain to ensure everything works")
     else:
-        print("\n❌ DNS migration failed. Please check the errors above.")
+        print("\n❌ DNS sync failed. Please check the errors above.")
         sys.exit(1)
 
 if __name__ == '__main__':
     main()
-
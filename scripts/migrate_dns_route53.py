@@ -2,7 +2,9 @@
 """
 Migrate DNS records to AWS Route53 using boto3
 
-This script reads DNS records from CSV and populates them in AWS Route53.
+This script reads DNS records from CSV and syncs them to AWS Route53.
+Only record sets that differ from the live zone are submitted (see
+route53_sync.py), so re-running it with an unchanged CSV makes no changes.
 
 Requirements:
     pip install boto3 python-dotenv
@@ -11,15 +13,25 @@ Setup:
     1. AWS credentials configured (via .env, AWS CLI, or IAM role)
     2. Create hosted zone in Route53 for your domain
     3. Update nameservers at your domain registrar
+
+Usage:
+    python3 scripts/migrate_dns_route53.py --dry-run
+    python3 scripts/migrate_dns_route53.py --yes --zone-id Z0123456789
+    python3 scripts/migrate_dns_route53.py --prune             # also delete records not in the CSV
+    python3 scripts/migrate_dns_route53.py --local zone.json   # rehearse against a local stand-in
+    python3 scripts/migrate_dns_route53.py --endpoint-url http://localhost:5000   # e.g. moto_server
 """
 
-import csv
 import os
 import sys
+import argparse
 import boto3
-from collections import defaultdict
 from botocore.exceptions import ClientError, NoCredentialsError
 
+from dns_records import read_csv, group_records, partition_valid
+from route53_sync import (sync_zone, find_hosted_zone, CountingClient, InMemoryRoute53,
+                          InvalidChangeBatch)
+
 # Try to load from .env file
 try:
     from dotenv import load_dotenv
@@ -27,63 +39,13 @@ try:
 except ImportError:
     pass
 
-def read_dns_records(csv_file):
-    """Read DNS records from CSV file."""
-    records = []
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['hostname'] and row['value']:
-                records.append({
-                    'hostname': row['hostname'],
-                    'value': row['value'],
-                    'ttl': int(row.get('ttl', '3600'))
-                })
-    return records
-
-def determine_record_type(hostname, value):
-    """Determine DNS record type based on hostname and value."""
-    # MX records (Google mail servers)
-    if 'aspmx' in value.lower() or ('mail' in value.lower() and 'google' in value.lower()):
-        return 'MX'
-    
-    # TXT records (SPF, DMARC, verification)
-    if value.startswith('v=') or 'include:' in value or '_dmarc' in value.lower() or 'google-site-verification' in value.lower():
-        return 'TXT'
-    
-    # NS records (skip these - Route53 manages its own NS records)
-    if 'ns' in value.lower() and ('wixdns' in value.lower() or '.net' in value.lower() or '.com' in value.lower()):
-        return 'NS'
-    
-    # CNAME records (domain name, not IP, and not a TXT record)
-    if not value.startswith('v=') and not 'include:' in value:
-        # Check if it's an IP address
-        parts = value.split('.')
-        is_ip = len(parts) == 4 and all(part.isdigit() and 0 <= int(part) <= 255 for part in parts)
-        
-        if not is_ip and '.' in value:
-            # Could be CNAME
-            # But check if it's actually a domain name
-            if not all(part.isdigit() for part in parts if part):
-                return 'CNAME'
-    
-    # A records (IPv4)
-    parts = value.split('.')
-    if len(parts) == 4 and all(part.isdigit() and 0 <= int(part) <= 255 for part in parts):
-        return 'A'
-    
-    # Default to A
-    return 'A'
-
 def get_hosted_zone_id(route53_client, domain):
     """Get Route53 hosted zone ID for the domain."""
     try:
-        response = route53_client.list_hosted_zones()
-        for zone in response['HostedZones']:
-            # Route53 stores domain with trailing dot
-            zone_name = zone['Name'].rstrip('.')
-            if zone_name == domain:
-                return zone['Id'].split('/')[-1]
+        # list_hosted_zones_by_name starts at the domain, so no paging through every zone
+        zone_id = find_hosted_zone(route53_client, domain)
+        if zone_id:
+            return zone_id
         
         print(f"❌ No hosted zone found for {domain}")
         print("\n💡 Create a hosted zone first:")
@@ -94,234 +56,178 @@ def get_hosted_zone_id(route53_client, domain):
         print(f"❌ Error listing hosted zones: {e}")
         return None
 
-def group_records_by_name_and_type(records, domain):
-    """Group records by name and type for Route53 (allows multiple values per record)."""
-    grouped = defaultdict(lambda: defaultdict(list))
-    
-    for record in records:
-        hostname = record['hostname']
-        value = record['value']
-        ttl = record['ttl']
-        record_type = determine_record_type(hostname, value)
-        
+def desired_record_sets(records):
+    """Route53 record sets for the CSV records, one per (name, type)."""
+    record_sets = []
+    for (name, record_type), members in group_records(records).items():
         # Skip NS records (Route53 manages these)
         if record_type == 'NS':
             continue
-        
-        # Normalize hostname
-        if hostname == domain:
-            name = domain + '.'
-        elif hostname.endswith('.' + domain):
-            name = hostname + '.'
-        else:
-            name = hostname + '.'
-        
-        # For MX records, add priority
-        if record_type == 'MX':
-            # Check if priority is already in value
-            parts = value.split()
-            if parts and parts[0].isdigit():
-                mx_value = value  # Already has priority
-            else:
-                # Default priority based on server type
-                if 'aspmx.l.google.com' in value:
-                    priority = 10
-                elif 'alt1' in value:
-                    priority = 20
-                elif 'alt2' in value:
-                    priority = 30
-                elif 'alt3' in value:
-                    priority = 40
-                elif 'alt4' in value:
-                    priority = 50
-                else:
-                    priority = 10
-                mx_value = f"{priority} {value}"
-        else:
-            mx_value = None
-        
-        # Store the processed value
-        final_value = mx_value if mx_value else value
-        grouped[name][record_type].append({
-            'value': final_value,
-            'ttl': ttl
+        record_sets.append({
+            'Name': name + '.',
+            'Type': record_type,
+            'TTL': members[0].ttl,  # Route53 has one TTL per record set
+            'ResourceRecords': [{'Value': record.route53_value()} for record in members]
         })
-    
-    return grouped
+    return record_sets
 
-def create_route53_records(route53_client, zone_id, grouped_records):
-    """Create DNS records in Route53, grouped by name and type."""
-    changes = []
-    success_count = 0
-    failed_count = 0
-    
-    for name, types in grouped_records.items():
-        for record_type, values in types.items():
-            # Get TTL from first record (should be same for all)
-            ttl = values[0]['ttl']
-            
-            # Prepare resource records
-            resource_records = []
-            for val in values:
-                value = val['value']
-                # TXT records must be quoted in Route53
-                if record_type == 'TXT':
-                    # Ensure value is properly quoted
-                    if not (value.startswith('"') and value.endswith('"')):
-                        value = f'"{value}"'
-                resource_records.append({'Value': value})
-            
-            change = {
-                'Action': 'UPSERT',
-                'ResourceRecordSet': {
-                    'Name': name,
-                    'Type': record_type,
-                    'TTL': ttl,
-                    'ResourceRecords': resource_records
-                }
-            }
-            changes.append(change)
-    
-    # Create records one at a time to see which ones fail
-    print()
-    for i, change in enumerate(changes, 1):
-        name = change['ResourceRecordSet']['Name'].rstrip('.')
-        record_type = change['ResourceRecordSet']['Type']
-        values = [rr['Value'] for rr in change['ResourceRecordSet']['ResourceRecords']]
-        value_display = values[0]
-        if len(values) > 1:
-            value_display += f" (+{len(values)-1} more)"
-        
-        print(f"   {i:2d}. Creating {name:40s} {record_type:5s} → {value_display[:50]}", end=' ... ')
-        
-        change_batch = {'Changes': [change]}
-        
-        try:
-            response = route53_client.change_resource_record_sets(
-                HostedZoneId=zone_id,
-                ChangeBatch=change_batch
-            )
-            print("✅")
-            success_count += 1
-        except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-            error_msg = e.response.get('Error', {}).get('Message', str(e))
-            print(f"❌")
-            print(f"      Error: {error_code} - {error_msg[:150]}")
-            failed_count += 1
-    
-    return success_count, failed_count
+def describe_change(change):
+    record_set = change['ResourceRecordSet']
+    values = [rr['Value'] for rr in record_set.get('ResourceRecords', [])]
+    value_display = values[0] if values else record_set.get('AliasTarget', {}).get('DNSName', '')
+    if len(values) > 1:
+        value_display += f" (+{len(values)-1} more)"
+    return f"{change['Action']:6s} {record_set['Name'].rstrip('.'):40s} {record_set['Type']:5s} → {value_display[:50]}"
 
-def migrate_to_route53(domain, records):
-    """Migrate all DNS records to Route53."""
-    print(f"\n📡 Migrating DNS records to AWS Route53 for {domain}...")
+def create_route53_client(endpoint_url=None):
+    """boto3 Route53 client from .env / AWS CLI credentials."""
+    access_key = os.getenv('AWS_ACCESS_KEY_ID')
+    secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
+    region = os.getenv('AWS_DEFAULT_REGION') or os.getenv('AWS_REGION') or 'us-east-1'
+    
+    options = {'region_name': region}
+    if endpoint_url:
+        options['endpoint_url'] = endpoint_url
+    if access_key and secret_key:
+        options['aws_access_key_id'] = access_key
+        options['aws_secret_access_key'] = secret_key
+    return boto3.client('route53', **options)
+
+def migrate_to_route53(domain, records, route53_client, dry_run=False, prune=False, zone_id=None):
+    """Sync all DNS records to Route53. Returns True on success."""
+    print(f"\n📡 Syncing DNS records to AWS Route53 for {domain}...")
     print(f"   Found {len(records)} records in CSV\n")
     
-    # Initialize Route53 client
-    try:
-        access_key = os.getenv('AWS_ACCESS_KEY_ID')
-        secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
-        region = os.getenv('AWS_DEFAULT_REGION') or os.getenv('AWS_REGION') or 'us-east-1'
-        
-        if access_key and secret_key:
-            route53_client = boto3.client(
-                'route53',
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                region_name=region
-            )
-        else:
-            route53_client = boto3.client('route53', region_name=region)
-    except NoCredentialsError:
-        print("❌ Error: AWS credentials not found")
-        print("\nPlease configure AWS credentials:")
-        print("  1. Add to .env file:")
-        print("     AWS_ACCESS_KEY_ID=your_key")
-        print("     AWS_SECRET_ACCESS_KEY=your_secret")
-        print("     AWS_DEFAULT_REGION=us-east-1")
-        print("\n  2. Or configure AWS CLI: aws configure")
-        sys.exit(1)
-    except Exception as e:
-        print(f"❌ Error initializing Route53 client: {e}")
-        sys.exit(1)
+    client = CountingClient(route53_client)
     
     # Get hosted zone ID
-    print("1️⃣  Finding Route53 hosted zone...")
-    zone_id = get_hosted_zone_id(route53_client, domain)
-    if not zone_id:
-        sys.exit(1)
-    print(f"   ✅ Found hosted zone: {zone_id}\n")
+    if zone_id:
+        print(f"1️⃣  Using hosted zone: {zone_id}\n")
+    else:
+        print("1️⃣  Finding Route53 hosted zone...")
+        zone_id = get_hosted_zone_id(client, domain)
+        if not zone_id:
+            return False
+        print(f"   ✅ Found hosted zone: {zone_id} (pass --zone-id to skip this lookup)\n")
     
-    # Group records by name and type
+    # Validate and group records by name and type
     print("2️⃣  Processing DNS records...")
-    grouped_records = group_records_by_name_and_type(records, domain)
-    
-    print(f"   ✅ Grouped into {sum(len(types) for types in grouped_records.values())} unique record sets\n")
-    
-    # Display what will be created
-    print("3️⃣  Records to create:")
-    record_num = 1
-    for name, types in sorted(grouped_records.items()):
-        for record_type, values in sorted(types.items()):
-            value_display = values[0]['value']
-            if len(values) > 1:
-                value_display += f" (+{len(values)-1} more)"
-            print(f"   {record_num:2d}. {name.rstrip('.'):40s} {record_type:5s} → {value_display[:50]}")
-            record_num += 1
-    
-    print()
-    
-    # Create records
-    print("4️⃣  Creating DNS records in Route53...")
-    success_count, failed_count = create_route53_records(route53_client, zone_id, grouped_records)
-    
-    print(f"\n📊 Migration Summary:")
-    print(f"   ✅ Success: {success_count} record sets")
-    print(f"   ❌ Failed: {failed_count} record sets")
+    valid, invalid = partition_valid(records)
+    for record, problems in invalid:
+        print(f"   ⚠️  Skipping {record.name} {record.type}: {'; '.join(problems)}")
+    desired = desired_record_sets(valid)
+    print(f"   ✅ Grouped into {len(desired)} unique record sets\n")
+    
+    # Diff against the live zone and submit only the changes
+    print("3️⃣  Comparing with the live zone..." if dry_run else "3️⃣  Applying changes...")
+    try:
+        result = sync_zone(client, zone_id, domain, desired, prune=prune, dry_run=dry_run)
+    except (ClientError, InvalidChangeBatch) as e:
+        print(f"❌ Error: {e}")
+        return False
+    
+    for i, change in enumerate(result['changes'], 1):
+        print(f"   {i:2d}. {describe_change(change)}")
+    if not prune:
+        for record_set in result['stale']:
+            print(f"   ⏭️  Not in CSV (kept, use --prune to delete): "
+                  f"{record_set['Name'].rstrip('.')} {record_set['Type']}")
+    
+    print(f"\n📊 Sync Summary:")
+    print(f"   Changes: {len(result['changes'])} record sets in {len(result['batches'])} batch(es)")
+    if dry_run:
+        print("   🔎 Dry run - nothing submitted")
+    else:
+        not_synced = [change_id for change_id, status in result['statuses'].items() if status != 'INSYNC']
+        print(f"   ✅ In sync: {len(result['statuses']) - len(not_synced)} change batch(es)")
+        if not_synced:
+            print(f"   ⏳ Still pending: {', '.join(not_synced)}")
+    print(f"   API calls: {client.reads} read, {client.writes} write")
     
-    return success_count > 0
+    return True
 
 def main():
-    csv_file = 'assets/raw/agroverse_wix_domains_parsed.csv'
-    domain = 'agroverse.shop'
+    parser = argparse.ArgumentParser(description='Sync DNS records from CSV to AWS Route53')
+    parser.add_argument('--csv', default='assets/raw/agroverse_wix_domains_parsed.csv', help='Parsed DNS records CSV')
+    parser.add_argument('--domain', default='agroverse.shop', help='Hosted zone domain')
+    parser.add_argument('--zone-id', help='Hosted zone id (skips the zone lookup call)')
+    parser.add_argument('--dry-run', action='store_true', help='Show the diff without submitting changes')
+    parser.add_argument('--prune', action='store_true', help='Delete live record sets that are not in the CSV')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+    parser.add_argument('--endpoint-url', help='Route53 endpoint (e.g. a local moto_server)')
+    parser.add_argument('--local', metavar='STATE_JSON', help='Use a local in-memory Route53 stored in this file')
+    args = parser.parse_args()
+    
+    csv_file = args.csv
+    domain = args.domain
     
     if not os.path.exists(csv_file):
         print(f"❌ Error: CSV file not found: {csv_file}")
-        print("   Run parse_wix_domains_final.py first to generate the CSV")
+        print("   Run parse_wix_domains.py first to generate the CSV")
         sys.exit(1)
     
     # Read DNS records
-    records = read_dns_records(csv_file)
+    records = read_csv(csv_file, domain)
     
     if not records:
         print("❌ No DNS records found in CSV file")
         sys.exit(1)
     
-    print(f"📋 Found {len(records)} DNS records to migrate")
+    print(f"📋 Found {len(records)} DNS records to sync")
     
     # Confirm before proceeding
-    print(f"\n⚠️  This will create/update DNS records in Route53 for {domain}")
-    print("   Make sure you've:")
-    print("   1. Created a hosted zone in Route53")
-    print("   2. Updated nameservers at your domain registrar")
-    confirm = input("\n   Continue? (yes/no): ")
-    if confirm.lower() != 'yes':
-        print("   Cancelled.")
-        sys.exit(0)
+    if not args.dry_run and not args.yes:
+        print(f"\n⚠️  This will create/update{'/delete' if args.prune else ''} DNS records in Route53 for {domain}")
+        print("   Make sure you've:")
+        print("   1. Created a hosted zone in Route53")
+        print("   2. Updated nameservers at your domain registrar")
+        confirm = input("\n   Continue? (yes/no): ")
+        if confirm.lower() != 'yes':
+            print("   Cancelled.")
+            sys.exit(0)
     
-    # Migrate records
-    success = migrate_to_route53(domain, records)
+    # Initialize Route53 client
+    if args.local:
+        route53_client = InMemoryRoute53(args.local)
+        if not find_hosted_zone(route53_client, domain):
+            route53_client.create_hosted_zone(Name=domain)
+    else:
+        try:
+            route53_client = create_route53_client(args.endpoint_url)
+        except NoCredentialsError:
+            print("❌ Error: AWS credentials not found")
+            print("\nPlease configure AWS credentials:")
+            print("  1. Add to .env file:")
+            print("     AWS_ACCESS_KEY_ID=your_key")
+            print("     AWS_SECRET_ACCESS_KEY=your_secret")
+            print("     AWS_DEFAULT_REGION=us-east-1")
+            print("\n  2. Or configure AWS CLI: aws configure")
+            sys.exit(1)
+        except Exception as e:
+            print(f"❌ Error initializing Route53 client: {e}")
+            sys.exit(1)
+    
+    # Sync records
+    try:
+        success = migrate_to_route53(domain, records, route53_client, dry_run=args.dry_run,
+                                     prune=args.prune, zone_id=args.zone_id)
+    except NoCredentialsError:
+        print("❌ Error: AWS credentials not found (add them to .env or run aws configure)")
+        sys.exit(1)
     
-    if success:
-        print("\n✅ DNS migration completed!")
+    if success and args.dry_run:
+        print("\n✅ Dry run complete")
+    elif success:
+        print("\n✅ DNS sync completed!")
         print("\n📝 Next steps:")
         print("   1. Verify DNS records in Route53 console")
         print("   2. Update nameservers at your domain registrar to Route53 nameservers")
-        print("   3. Wait for DNS propagation (usually 5-60 minutes)")
+        print("   3. Wait for DNS propagation (usually 5-60 minutes):")
+        print(f"      python3 scripts/dns_verify.py --csv {csv_file} --domain {domain} --authoritative")
         print("   4. Test your domain to ensure everything works")
         print("   5. Monitor Route53 metrics in CloudWatch")
     else:
-        print("\n❌ DNS migration failed. Please check the errors above.")
+        print("\n❌ DNS sync failed. Please check the errors above.")
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Merge-aware Namecheap DNS sync used by migrate_dns_namecheap.py
+
+Namecheap's setHosts replaces every host of a domain in one call, so
+blindly posting the CSV loses anything edited in the dashboard since. Instead
+sync_domain():
+1. Reads the live hosts with getHosts and parses the XML into HostRecords
+2. Three-way merges live, desired (the CSV) and last-applied state (what
+   the previous sync set, kept in .namecheap-last-applied.json):
+   - desired hosts are added or updated
+   - hosts that were last applied but are no longer desired are removed
+   - hosts added outside this script (live but never applied) are kept
+3. Calls setHosts only when the merged set differs from the live one
+4. Retries both calls with exponential backoff on network errors,
+   HTTP 429/5xx and Namecheap's "too many requests" errors
+
+FakeNamecheapServer serves getHosts/setHosts on localhost from a JSON file,
+with optional injected failures, so syncs can be rehearsed offline:
+
+    python3 scripts/namecheap_sync.py --serve 8089 --state /tmp/namecheap.json
+    python3 scripts/migrate_dns_namecheap.py --api-url http://127.0.0.1:8089/xml.response
+
+Requirements:
+    pip install requests
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from collections import namedtuple
+from urllib.parse import parse_qs
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import quoteattr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+BASE_DIR = Path(__file__).parent.parent
+STATE_FILE = BASE_DIR / '.namecheap-last-applied.json'
+
+NAMECHEAP_API_URL = "https://api.namecheap.com/xml.response"
+NAMECHEAP_SANDBOX_URL = "https://api.sandbox.namecheap.com/xml.response"
+
+DEFAULT_TTL = 1800
+DEFAULT_MX_PREF = 10
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0  # seconds, doubled after each failed attempt
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 30
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Namecheap error numbers worth retrying ("Too many requests")
+RETRY_ERROR_NUMBERS = ('500000',)
+# Types that can only have one host per name; a new value replaces the old one
+SINGLE_VALUE_TYPES = ('CNAME', 'ALIAS', 'URL', 'URL301', 'FRAME')
+
+HostRecord = namedtuple('HostRecord', ['name', 'type', 'address', 'mx_pref', 'ttl'])
+HostRecord.__doc__ = "One Namecheap host: name ('@' for the apex), type, address, MX preference, TTL."
+
+
+def host_record(name, record_type, address, mx_pref=None, ttl=None):
+    """A normalized HostRecord (lower-case name, upper-case type, int MX pref and TTL)."""
+    record_type = record_type.upper()
+    address = address.strip()
+    if record_type in ('CNAME', 'MX', 'NS', 'ALIAS'):
+        address = address.rstrip('.').lower() + '.'
+    if record_type != 'MX':
+        mx_pref = None
+    elif mx_pref in (None, ''):
+        mx_pref = DEFAULT_MX_PREF
+    ttl = int(ttl) if ttl not in (None, '') else DEFAULT_TTL
+    return HostRecord(name.strip().lower() or '@', record_type, address,
+                      None if mx_pref is None else int(mx_pref), ttl)
+
+
+def host_key(record):
+    """What identifies a host across syncs; TTL and MX preference are attributes."""
+    if record.type in SINGLE_VALUE_TYPES:
+        return (record.name, record.type, '')
+    return (record.name, record.type, record.address)
+
+
+def record_to_json(record):
+    return record._asdict()
+
+
+def record_from_json(data):
+    return host_record(data['name'], data['type'], data['address'], data.get('mx_pref'), data.get('ttl'))
+
+
+def merge_hosts(live, desired, last_applied):
+    """
+    Three-way merge of host lists.
+
+    Returns (merged, report) where report lists the keys 'added',
+    'updated', 'removed' (last applied, no longer desired), 'kept'
+    (live hosts this script never applied) and 'overridden' (live hosts
+    edited outside this script that a desired host replaces).
+    """
+    live_by_key = {host_key(r): r for r in live}
+    desired_by_key = {host_key(r): r for r in desired}
+    applied_by_key = {host_key(r): r for r in last_applied}
+    report = {'added': [], 'updated': [], 'removed': [], 'kept': [], 'overridden': []}
+
+    merged = []
+    for key, current in live_by_key.items():
+        if key in desired_by_key:
+            wanted = desired_by_key[key]
+            if wanted != current:
+                report['updated'].append(wanted)
+                previous = applied_by_key.get(key)
+                if previous is not None and previous != current:
+                    report['overridden'].append(current)
+            merged.append(wanted)
+        elif key in applied_by_key:
+            report['removed'].append(current)
+        else:
+            report['kept'].append(current)
+            merged.append(current)
+    for key, wanted in desired_by_key.items():
+        if key not in live_by_key:
+            report['added'].append(wanted)
+            merged.append(wanted)
+    return merged, report
+
+
+def same_hosts(a, b):
+    return sorted(a) == sorted(b)
+
+
+def split_domain(domain):
+    """('agroverse', 'shop') for agroverse.shop."""
+    sld, _, tld = domain.lower().rstrip('.').partition('.')
+    if not tld:
+        raise ValueError(f"not a registrable domain: {domain!r}")
+    return sld, tld
+
+
+def _local(tag):
+    """Tag name without the XML namespace Namecheap puts on every element."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _find_all(root, name):
+    return [element for element in root.iter() if _local(element.tag) == name]
+
+
+class NamecheapError(Exception):
+    """An ERROR response from the Namecheap API."""
+
+    def __init__(self, errors):
+        self.errors = errors  # [(number, message)]
+        super().__init__('; '.join(f"{number}: {message}" for number, message in errors))
+
+    @property
+    def retryable(self):
+        return any(number in RETRY_ERROR_NUMBERS for number, _ in self.errors)
+
+
+def parse_response(text):
+    """The <CommandResponse> element of an API response; raises NamecheapError on Status="ERROR"."""
+    root = ET.fromstring(text)
+    if root.get('Status', '').upper() == 'ERROR':
+        raise NamecheapError([(e.get('Number', ''), (e.text or '').strip())
+                              for e in _find_all(root, 'Error')] or [('', 'unknown error')])
+    found = _find_all(root, 'CommandResponse')
+    if not found:
+        raise NamecheapError([('', 'response has no CommandResponse')])
+    return found[0]
+
+
+def parse_hosts(text):
+    """(hosts, email_type) from a getHosts response."""
+    result = _find_all(parse_response(text), 'DomainDNSGetHostsResult')
+    if not result:
+        raise NamecheapError([('', 'getHosts response has no DomainDNSGetHostsResult')])
+    hosts = [host_record(h.get('Name', '@'), h.get('Type', 'A'), h.get('Address', ''),
+                         h.get('MXPref'), h.get('TTL'))
+             for h in _find_all(result[0], 'host')]
+    return hosts, result[0].get('EmailType', 'NONE')
+
+
+def set_hosts_params(hosts, email_type):
+    """Form fields for setHosts (HostName1, RecordType1, ... plus EmailType)."""
+    params = {}
+    for i, record in enumerate(hosts, 1):
+        params[f'HostName{i}'] = record.name
+        params[f'RecordType{i}'] = record.type
+        params[f'Address{i}'] = record.address
+        params[f'TTL{i}'] = str(record.ttl)
+        if record.type == 'MX':
+            params[f'MXPref{i}'] = str(record.mx_pref)
+    # MX hosts are ignored unless EmailType says the domain uses them
+    if any(record.type == 'MX' for record in hosts):
+        email_type = 'MX'
+    elif email_type == 'MX':
+        email_type = 'NONE'
+    params['EmailType'] = email_type
+    return params
+
+
+def _retryable(error):
+    """Network errors, HTTP 429/5xx and Namecheap's temporary errors are worth another try."""
+    if isinstance(error, NamecheapError):
+        return error.retryable
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRY_STATUS_CODES
+
+
+class NamecheapClient:
+    """getHosts/setHosts over the XML API, retried with exponential backoff."""
+
+    def __init__(self, username, api_key, client_ip, url=NAMECHEAP_API_URL,
+                 max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_BASE, session=None):
+        self.auth = {'ApiUser': username, 'ApiKey': api_key, 'UserName': username, 'ClientIp': client_ip}
+        self.url = url
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.session = session or requests.Session()
+        self.calls = {}
+        self.retries = 0
+
+    def _call(self, command, domain, data=None):
+        sld, tld = split_domain(domain)
+        params = {**self.auth, 'Command': f'namecheap.domains.dns.{command}', 'SLD': sld, 'TLD': tld}
+        for attempt in range(1, self.max_attempts + 1):
+            self.calls[command] = self.calls.get(command, 0) + 1
+            try:
+                if data is None:
+                    response = self.session.get(self.url, params=params, timeout=REQUEST_TIMEOUT)
+                else:
+                    # setHosts can exceed URL length limits, so the hosts go in the body
+                    response = self.session.post(self.url, params=params, data=data, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+                return response.text if command != 'setHosts' else self._check_set(response.text)
+            except (requests.exceptions.RequestException, NamecheapError) as e:
+                if not _retryable(e) or attempt == self.max_attempts:
+                    raise
+                self.retries += 1
+                delay = min(BACKOFF_MAX, self.backoff * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    def _check_set(text):
+        result = _find_all(parse_response(text), 'DomainDNSSetHostsResult')
+        if not result or result[0].get('IsSuccess', '').lower() != 'true':
+            raise NamecheapError([('', 'setHosts did not report IsSuccess="true"')])
+        return text
+
+    def get_hosts(self, domain):
+        return parse_hosts(self._call('getHosts', domain))
+
+    def set_hosts(self, domain, hosts, email_type='NONE'):
+        self._call('setHosts', domain, data=set_hosts_params(hosts, email_type))
+
+
+def load_last_applied(domain, state_file=STATE_FILE):
+    state_file = Path(state_file)
+    if not state_file.exists():
+        return []
+    state = json.loads(state_file.read_text(encoding='utf-8'))
+    return [record_from_json(r) for r in state.get(domain.lower(), [])]
+
+
+def save_last_applied(domain, hosts, state_file=STATE_FILE):
+    state_file = Path(state_file)
+    state = json.loads(state_file.read_text(encoding='utf-8')) if state_file.exists() else {}
+    state[domain.lower()] = [record_to_json(r) for r in sorted(hosts)]
+    state_file.write_text(json.dumps(state, indent=2) + '\n', encoding='utf-8')
+
+
+def sync_domain(client, domain, desired, dry_run=False, state_file=STATE_FILE):
+    """
+    Merge desired hosts into a domain's live hosts and apply the result.
+
+    Returns a dict with the 'live', 'merged' and 'report' (see merge_hosts)
+    and 'applied': True if setHosts was called.
+    """
+    live, email_type = client.get_hosts(domain)
+    merged, report = merge_hosts(live, desired, load_last_applied(domain, state_file))
+    result = {'live': live, 'merged': merged, 'report': report, 'applied': False}
+    if dry_run:
+        return result
+    if not same_hosts(live, merged):
+        client.set_hosts(domain, merged, email_type)
+        result['applied'] = True
+    save_last_applied(domain, desired, state_file)
+    return result
+
+
+class FakeNamecheapServer:
+    """
+    Local stand-in for the Namecheap XML API (getHosts and setHosts only).
+
+    Hosts live in a JSON file ({domain: {'email_type': ..., 'hosts': [...]}})
+    so repeated runs see each other's changes. fail_next=N answers the next
+    N requests with HTTP 503 to exercise retries.
+    """
+
+    def __init__(self, state_file, port=0, fail_next=0):
+        self.state_file = Path(state_file)
+        self.fail_next = fail_next
+        self.requests = []
+        self.lock = threading.Lock()
+        self.domains = {}
+        if self.state_file.exists():
+            self.domains = json.loads(self.state_file.read_text(encoding='utf-8'))
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/xml.response"
+
+    def _save(self):
+        self.state_file.write_text(json.dumps(self.domains, indent=2) + '\n', encoding='utf-8')
+
+    def _respond(self, params):
+        command = params.get('Command', '').rsplit('.', 1)[-1]
+        domain = f"{params.get('SLD', '')}.{params.get('TLD', '')}".lower()
+        entry = self.domains.setdefault(domain, {'email_type': 'NONE', 'hosts': []})
+        if command == 'getHosts':
+            hosts = ''.join(
+                f'<host HostId="{i}" Name={quoteattr(h["name"])} Type={quoteattr(h["type"])} '
+                f'Address={quoteattr(h["address"])} MXPref="{h.get("mx_pref") or DEFAULT_MX_PREF}" '
+                f'TTL="{h["ttl"]}" />'
+                for i, h in enumerate(entry['hosts'], 1))
+            body = (f'<DomainDNSGetHostsResult Domain={quoteattr(domain)} '
+                    f'EmailType={quoteattr(entry["email_type"])} IsUsingOurDNS="true">{hosts}'
+                    '</DomainDNSGetHostsResult>')
+        elif command == 'setHosts':
+            hosts = []
+            i = 1
+            while f'HostName{i}' in params:
+                hosts.append(record_to_json(host_record(
+                    params[f'HostName{i}'], params.get(f'RecordType{i}', 'A'), params.get(f'Address{i}', ''),
+                    params.get(f'MXPref{i}'), params.get(f'TTL{i}'))))
+                i += 1
+            entry['hosts'] = hosts
+            entry['email_type'] = params.get('EmailType', 'NONE')
+            self._save()
+            body = f'<DomainDNSSetHostsResult Domain={quoteattr(domain)} IsSuccess="true" />'
+        else:
+            return ('<ApiResponse Status="ERROR" xmlns="http://api.namecheap.com/xml.response">'
+                    f'<Errors><Error Number="2030166">Unsupported command {command}</Error></Errors>'
+                    '</ApiResponse>')
+        return ('<ApiResponse Status="OK" xmlns="http://api.namecheap.com/xml.response"><Errors />'
+                f'<CommandResponse Type="namecheap.domains.dns.{command}">{body}</CommandResponse>'
+                '</ApiResponse>')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, body=''):
+                query = self.path.partition('?')[2]
+                params = {k: v[-1] for k, v in parse_qs(query, keep_blank_values=True).items()}
+                params.update({k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()})
+                with server.lock:
+                    server.requests.append(params.get('Command', ''))
+                    if server.fail_next > 0:
+                        server.fail_next -= 1
+                        self.send_response(503)
+                        self.end_headers()
+                        return
+                    text = server._respond(params).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(text)))
+                self.end_headers()
+                self.wfile.write(text)
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self._handle(self.rfile.read(length).decode('utf-8'))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake of the Namecheap DNS XML API')
+    parser.add_argument('--serve', type=int, metavar='PORT', required=True, help='Port to listen on')
+    parser.add_argument('--state', default='namecheap-fake.json', help='JSON file holding the fake hosts')
+    parser.add_argument('--fail-next', type=int, default=0, help='Answer the first N requests with HTTP 503')
+    args = parser.parse_args()
+
+    try:
+        server = FakeNamecheapServer(args.state, port=args.serve, fail_next=args.fail_next)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    print(f"🔎 Fake Namecheap API on {server.url} (state in {args.state}), Ctrl+C to stop")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Optimize the stop order of the Brazilian and Pacific West Coast journeys
+
+The journey order used to be maintained by hand in drift-navigation.js
+(Brazilian) or recomputed in the browser as a plain north-to-south sort
+(Pacific), so adding a stop meant reordering lists in several files.
+This script:
+1. Collects the stops of each journey (the path data entries, plus the
+   west-coast partners for the Pacific journey)
+2. Builds the pairwise haversine distance matrix in one NumPy pass
+3. Seeds a route with a nearest-neighbour walk and improves it with 2-opt,
+   keeping each journey's first and last stop fixed
+4. Writes the order into js/brazilian-path-data.js and js/pacific-path-data.js
+   (window.BRAZILIAN_PATH_ORDER / window.PACIFIC_PATH_ORDER) and into the
+   Brazilian journey page's itinerary
+5. Re-renders the static prev/next links with build_neighbors.py
+
+Adding a stop is a data edit followed by a re-run of this script.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python3 scripts/optimize_routes.py
+    python3 scripts/optimize_routes.py --dry-run
+"""
+
+import re
+import sys
+import argparse
+
+from geo_utils import load_js_data, haversine_matrix, greedy_tour, tour_length, two_opt
+from build_neighbors import (BASE_DIR, JS_DIR, BRAZILIAN_JOURNEY_DIR, PACIFIC_EXPERIENCES,
+                             load_stops, pacific_partners, build)
+
+# Each journey: path data file, order variable, fixed first and last stop
+# (None starts from the northernmost stop)
+JOURNEYS = {
+    'brazilian': {
+        'data_file': JS_DIR / 'brazilian-path-data.js',
+        'variable': 'BRAZILIAN_PATH_ORDER',
+        'start': 'founderhaus',
+        'end': 'cargo-boat-manaus-leticia',
+    },
+    'pacific': {
+        'data_file': JS_DIR / 'pacific-path-data.js',
+        'variable': 'PACIFIC_PATH_ORDER',
+        'start': None,
+        'end': 'winter-desert-gatherings',
+    },
+}
+ORDER_COMMENT = '// Stop order generated by scripts/optimize_routes.py - do not edit by hand'
+JOURNEY_PAGE_ORDER_PATTERN = re.compile(
+    r'(?:[ \t]*//[^\n]*\n)*([ \t]*)const journeyOrder = \[.*?\];', re.DOTALL)
+
+def journey_stops(name, stops):
+    """Slugs of every stop on a journey."""
+    slugs = list(load_js_data(JOURNEYS[name]['data_file']))
+    if name == 'pacific':
+        slugs = pacific_partners(stops) + [s for s in PACIFIC_EXPERIENCES if s in slugs]
+    return [slug for slug in slugs if slug in stops]
+
+def optimize(name, stops):
+    """Near-optimal order of a journey's stops: (slugs, length_km, seed_length_km)."""
+    config = JOURNEYS[name]
+    slugs = journey_stops(name, stops)
+    if len(slugs) < 2:
+        return slugs, 0.0, 0.0
+    matrix = haversine_matrix([stops[s]['lat'] for s in slugs], [stops[s]['lon'] for s in slugs])
+
+    if config['start'] in slugs:
+        start = slugs.index(config['start'])
+    else:
+        start = max(range(len(slugs)), key=lambda i: stops[slugs[i]]['lat'])
+    end = slugs.index(config['end']) if config['end'] in slugs else None
+
+    seed = greedy_tour(matrix, start, end)
+    tour = two_opt(matrix, seed)
+    return [slugs[i] for i in tour], tour_length(matrix, tour), tour_length(matrix, seed)
+
+def render_order(declaration, order, indent='    '):
+    """The generated comment plus '<declaration> = [...];' with one slug per line."""
+    lines = [f"{indent}{ORDER_COMMENT}", f"{indent}{declaration} = ["]
+    lines += [f"{indent}    '{slug}'," for slug in order]
+    lines[-1] = lines[-1].rstrip(',')
+    lines.append(f"{indent}];")
+    return '\n'.join(lines)
+
+def write_order(data_file, variable, order):
+    """Write the order array into a path data file. Returns True if changed."""
+    text = data_file.read_text(encoding='utf-8')
+    block = render_order(f'window.{variable}', order)
+    pattern = re.compile(r'[ \t]*%s\n[ \t]*window\.%s = \[.*?\];' % (re.escape(ORDER_COMMENT), variable), re.DOTALL)
+    if pattern.search(text):
+        new_text = pattern.sub(lambda m: block, text, count=1)
+    else:
+        # Inside the IIFE, after the data object
+        close = text.rindex('})();')
+        new_text = text[:close].rstrip() + '\n    \n' + block + '\n' + text[close:]
+    if new_text == text:
+        return False
+    data_file.write_text(new_text, encoding='utf-8')
+    return True
+
+def write_journey_page(page, order):
+    """Replace the itinerary order in a journey page's inline script. Returns True if changed."""
+    text = page.read_text(encoding='utf-8')
+    new_text, count = JOURNEY_PAGE_ORDER_PATTERN.subn(
+        lambda m: render_order('const journeyOrder', order, m.group(1)), text, count=1)
+    if not count or new_text == text:
+        return False
+    page.write_text(new_text, encoding='utf-8')
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimize the journey stop order and rebuild navigation')
+    parser.add_argument('--dry-run', action='store_true', help='Print the optimized routes without writing')
+    args = parser.parse_args()
+
+    try:
+        stops = load_stops()
+        changed = False
+        for name, config in JOURNEYS.items():
+            order, length, seed_length = optimize(name, stops)
+            print(f"\n🗺️  {name.title()} journey: {len(order)} stops, {length:,.0f} km "
+                  f"(nearest-neighbour seed {seed_length:,.0f} km)")
+            for i, slug in enumerate(order, 1):
+                print(f"   {i:2d}. {slug}")
+            if args.dry_run:
+                continue
+            if write_order(config['data_file'], config['variable'], order):
+                changed = True
+                print(f"✅ Wrote {config['data_file'].relative_to(BASE_DIR)}")
+            else:
+                print(f"⏭️  {config['data_file'].relative_to(BASE_DIR)} already up to date")
+            if name == 'brazilian' and write_journey_page(BRAZILIAN_JOURNEY_DIR / 'index.html', order):
+                print(f"✅ Updated itinerary in {(BRAZILIAN_JOURNEY_DIR / 'index.html').relative_to(BASE_DIR)}")
+
+        if args.dry_run:
+            print("\n🔎 Dry run - nothing written")
+            return
+
+        print("\n🔗 Rebuilding static navigation")
+        build()
+        if not changed:
+            print("\n✅ Routes unchanged")
+    except (OSError, KeyError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
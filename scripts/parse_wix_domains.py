@@ -1,195 +1,324 @@
 #!/usr/bin/env python3
 """
-Parse Wix Domains HTML file and extract DNS records to CSV
+Parse a Wix Domains dashboard export and extract DNS records to CSV
 
-This script extracts hostname, value, and TTL from the Wix domains HTML export.
+The export (a saved "Domains → DNS Records" page) is read once, in chunks,
+by an event-driven HTML tokenizer (html.parser) instead of regexes over the
+whole document:
+1. Table rows marked data-table-row are split into fields by their
+   data-hook attributes (host name, value / MX points-to, TTL)
+2. Elements carrying data-hostname / data-value / data-ttl attributes are
+   read directly
+3. Embedded state (<script type="application/json"> and
+   window.__STATE__ = {...} assignments) is decoded with json's own
+   scanner and searched for objects that look like DNS records
+
+Records are dns_records.DnsRecord objects, classified and normalized the
+same way the migrate scripts read them back.
+
+Every step is linear in the size of the export; --benchmark compares this
+against the regexes the old parse_wix_domains*.py scripts used, on synthetic
+exports of growing size.
+
+Usage:
+    python3 scripts/parse_wix_domains.py
+    python3 scripts/parse_wix_domains.py --input export.htm --output records.csv
+    python3 scripts/parse_wix_domains.py --benchmark
 """
 
 import re
-import csv
-import json
 import sys
+import json
+import time
+import argparse
 from html.parser import HTMLParser
-from urllib.parse import unquote
 
-def extract_json_data(html_content):
-    """Extract JSON data from HTML that might contain DNS records."""
+from dns_records import DnsRecord, unique_records, write_csv
+
+INPUT_FILE = 'assets/raw/wix_agroverse_Domains.htm'
+OUTPUT_FILE = 'assets/raw/agroverse_wix_domains_parsed.csv'
+CHUNK_SIZE = 64 * 1024
+
+HOOK_PREFIX = 'dns-records--table-content--'
+HOOK_FIELDS = {
+    'host-name--view': 'hostname',
+    'value--view': 'value',
+    'mx-points-to--view': 'value',
+    'ttl--view': 'ttl',
+}
+ATTRIBUTE_FIELDS = {
+    'data-hostname': 'hostname', 'data-host': 'hostname',
+    'data-value': 'value', 'data-target': 'value',
+    'data-ttl': 'ttl',
+}
+JSON_HOSTNAME_KEYS = ('hostname', 'hostName', 'host', 'record')
+JSON_VALUE_KEYS = ('value', 'data', 'target', 'content', 'pointsTo')
+JSON_TTL_KEYS = ('ttl', 'TTL', 'ttl_seconds')
+JSON_TYPE_KEYS = ('type', 'recordType')
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+ROW_CONTAINERS = {'table', 'tbody', 'thead', 'tfoot'}
+
+# Only the start of an assignment is matched; json.JSONDecoder.raw_decode
+# scans the value itself, so there is nothing for a regex to backtrack over.
+STATE_ASSIGNMENT_PATTERN = re.compile(r'window\.__[A-Za-z0-9_]+__\s*=\s*')
+TTL_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400, 'week': 604800}
+
+
+
+def convert_ttl_to_seconds(ttl_text):
+    """Seconds for TTL text like '1 Hour', '2 days' or '3600'; None if unrecognised."""
+    if ttl_text is None:
+        return None
+    ttl_text = str(ttl_text).strip().lower()
+    if ttl_text.isdigit():
+        return int(ttl_text)
+    number = re.match(r'(\d+)\s*([a-z]+)', ttl_text)
+    if not number:
+        return None
+    unit = number.group(2).rstrip('s')
+    return int(number.group(1)) * TTL_UNITS[unit] if unit in TTL_UNITS else None
+
+
+def find_json_records(data):
+    """DnsRecords for every object in decoded JSON with a host name and a value."""
     records = []
-    
-    # Look for JSON objects in script tags
-    json_pattern = r'<script[^>]*>(.*?)</script>'
-    script_matches = re.findall(json_pattern, html_content, re.DOTALL | re.IGNORECASE)
-    
-    for script_content in script_matches:
-        # Skip if it's CSS or minified JS
-        if 'function' in script_content[:100] or len(script_content) < 50:
-            continue
-            
-        # Try to find JSON-like structures
-        # Look for patterns like: "hostname": "...", "value": "...", "ttl": ...
-        hostname_pattern = r'["\']hostname["\']\s*:\s*["\']([^"\']+)["\']'
-        value_pattern = r'["\']value["\']\s*:\s*["\']([^"\']+)["\']'
-        ttl_pattern = r'["\']ttl["\']\s*:\s*(\d+)'
-        
-        hostnames = re.findall(hostname_pattern, script_content, re.IGNORECASE)
-        values = re.findall(value_pattern, script_content, re.IGNORECASE)
-        ttls = re.findall(ttl_pattern, script_content, re.IGNORECASE)
-        
-        if hostnames or values:
-            # Try to match them up
-            for i, hostname in enumerate(hostnames):
-                value = values[i] if i < len(values) else ''
-                ttl = ttls[i] if i < len(ttls) else ''
-                records.append({
-                    'hostname': hostname,
-                    'value': value,
-                    'ttl': ttl
-                })
-    
-    # Also try to parse as JSON directly
-    try:
-        # Look for window.__WIX_DATA__ or similar
-        data_pattern = r'window\.__[A-Z_]+__\s*=\s*({.*?});'
-        data_matches = re.findall(data_pattern, html_content, re.DOTALL)
-        
-        for data_str in data_matches:
-            try:
-                data = json.loads(data_str)
-                # Recursively search for DNS records
-                records.extend(find_dns_records(data))
-            except:
-                pass
-    except:
-        pass
-    
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            record_type = next((item[k] for k in JSON_TYPE_KEYS if isinstance(item.get(k), str)), None)
+            # A bare 'name' only counts next to a record type ({'name': 'color', 'value': 'red'} is not DNS)
+            hostname_keys = JSON_HOSTNAME_KEYS + (('name',) if record_type else ())
+            hostname = next((item[k] for k in hostname_keys if isinstance(item.get(k), str)), None)
+            value = next((item[k] for k in JSON_VALUE_KEYS if isinstance(item.get(k), str)), None)
+            if hostname and value:
+                ttl = next((item[k] for k in JSON_TTL_KEYS if item.get(k) not in (None, '')), None)
+                records.append(DnsRecord.parse(hostname, value, convert_ttl_to_seconds(ttl), record_type))
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
     return records
 
-def find_dns_records(obj, path=''):
-    """Recursively search for DNS record structures in JSON."""
+
+def decode_script_state(text, is_json=False):
+    """DnsRecords from one <script>'s embedded JSON state."""
+    if is_json:
+        try:
+            return find_json_records(json.loads(text))
+        except ValueError:
+            return []
     records = []
-    
-    if isinstance(obj, dict):
-        # Check if this looks like a DNS record
-        if 'hostname' in obj or 'host' in obj or 'name' in obj:
-            record = {
-                'hostname': obj.get('hostname') or obj.get('host') or obj.get('name') or '',
-                'value': obj.get('value') or obj.get('data') or obj.get('target') or '',
-                'ttl': str(obj.get('ttl') or obj.get('TTL') or '')
-            }
-            if record['hostname'] or record['value']:
-                records.append(record)
-        
-        # Recurse into nested objects
-        for key, value in obj.items():
-            records.extend(find_dns_records(value, f"{path}.{key}"))
-    
-    elif isinstance(obj, list):
-        for item in obj:
-            records.extend(find_dns_records(item, path))
-    
+    decoder = json.JSONDecoder()
+    for match in STATE_ASSIGNMENT_PATTERN.finditer(text):
+        try:
+            data, _ = decoder.raw_decode(text, match.end())
+        except ValueError:
+            continue
+        records.extend(find_json_records(data))
     return records
 
-def parse_html_file(file_path):
-    """Parse the HTML file and extract DNS records."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
-    
-    records = []
-    
-    # Method 1: Extract from JSON data
-    records.extend(extract_json_data(html_content))
-    
-    # Method 2: Look for table data
-    # Wix might render DNS records in tables
-    table_pattern = r'<table[^>]*>(.*?)</table>'
-    tables = re.findall(table_pattern, html_content, re.DOTALL | re.IGNORECASE)
-    
-    for table in tables:
-        # Look for rows with DNS-like data
-        row_pattern = r'<tr[^>]*>(.*?)</tr>'
-        rows = re.findall(row_pattern, table, re.DOTALL | re.IGNORECASE)
-        
-        for row in rows:
-            # Extract text from cells
-            cell_pattern = r'<t[dh][^>]*>(.*?)</t[dh]>'
-            cells = re.findall(cell_pattern, row, re.DOTALL | re.IGNORECASE)
-            
-            # Clean HTML tags
-            cells = [re.sub(r'<[^>]+>', '', cell).strip() for cell in cells]
-            
-            # If we have 3+ cells, might be a DNS record
-            if len(cells) >= 3:
-                # Try to identify which is hostname, value, TTL
-                # Common patterns: hostname, IP/domain, number
-                potential_record = {
-                    'hostname': cells[0] if cells[0] else '',
-                    'value': cells[1] if len(cells) > 1 else '',
-                    'ttl': cells[2] if len(cells) > 2 else ''
-                }
-                
-                # Validate it looks like a DNS record
-                if (potential_record['hostname'] and 
-                    (potential_record['value'] or potential_record['ttl'].isdigit())):
-                    records.append(potential_record)
-    
-    # Method 3: Look for data attributes
-    data_pattern = r'data-[^=]*=["\']([^"\']+)["\']'
-    data_attrs = re.findall(data_pattern, html_content, re.IGNORECASE)
-    
-    # Remove duplicates
-    seen = set()
-    unique_records = []
-    for record in records:
-        key = (record.get('hostname', ''), record.get('value', ''))
-        if key not in seen and key != ('', ''):
-            seen.add(key)
-            unique_records.append(record)
-    
-    return unique_records
+
+class WixDnsParser(HTMLParser):
+    """
+    Single-pass tokenizer over a Wix export; feed() it chunks, then read
+    .records (table rows and data-* attributes) and .state_records
+    (embedded JSON state).
+
+    Rows may omit </tr> (valid HTML): a new <tr> or the end of the table
+    closes the open row.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = []
+        self.state_records = []
+        self._row = None          # {'hostname': [...], 'value': [...], 'ttl': [...], 'type': ...}
+        self._field = None        # field the text currently belongs to
+        self._field_depth = 0     # open elements inside the data-hook element
+        self._script = None       # (chunks, is_json) while inside <script>
+        self._in_style = False
+
+    def _finish_row(self):
+        row, self._row, self._field = self._row, None, None
+        if row is None:
+            return
+        hostname = ' '.join(''.join(row['hostname']).split())
+        value = ' '.join(''.join(row['value']).split())
+        if hostname or value:
+            ttl = convert_ttl_to_seconds(' '.join(''.join(row['ttl']).split()) or None)
+            self.records.append(DnsRecord.parse(hostname, value, ttl, row['type']))
+
+    def handle_starttag(self, tag, attrs):
+        if self._script is not None or self._in_style:
+            return
+        attributes = dict(attrs)
+        if tag == 'script':
+            self._script = ([], 'json' in (attributes.get('type') or ''))
+            return
+        if tag == 'style':
+            self._in_style = True
+            return
+        if tag == 'tr':
+            self._finish_row()
+            if 'data-table-row' in attributes:
+                self._row = {'hostname': [], 'value': [], 'ttl': [], 'type': None}
+            return
+
+        if self._row is not None:
+            if self._field is not None:
+                if tag not in VOID_TAGS:
+                    self._field_depth += 1
+            else:
+                hook = attributes.get('data-hook') or ''
+                if hook.startswith(HOOK_PREFIX) and hook[len(HOOK_PREFIX):] in HOOK_FIELDS:
+                    name = hook[len(HOOK_PREFIX):]
+                    self._field = HOOK_FIELDS[name]
+                    self._field_depth = 0 if tag in VOID_TAGS else 1
+                    if name == 'mx-points-to--view':
+                        self._row['type'] = 'MX'
+                    if self._field_depth == 0:
+                        self._field = None
+
+        found = {field: attributes[name] for name, field in ATTRIBUTE_FIELDS.items() if attributes.get(name)}
+        if found.get('hostname') or found.get('value'):
+            self.records.append(DnsRecord.parse(found.get('hostname', ''), found.get('value', ''),
+                                                convert_ttl_to_seconds(found.get('ttl'))))
+
+    def handle_endtag(self, tag):
+        if self._script is not None:
+            if tag == 'script':
+                chunks, is_json = self._script
+                self._script = None
+                self.state_records.extend(decode_script_state(''.join(chunks), is_json))
+            return
+        if self._in_style:
+            self._in_style = tag != 'style'
+            return
+        if tag == 'tr' or tag in ROW_CONTAINERS:
+            self._finish_row()
+        elif self._field is not None and tag not in VOID_TAGS:
+            self._field_depth -= 1
+            if self._field_depth <= 0:
+                self._field = None
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script[0].append(data)
+        elif self._field is not None:
+            self._row[self._field].append(data)
+
+    def close(self):
+        super().close()
+        self._finish_row()
+
+
+def parse_stream(chunks):
+    """DnsRecords from an iterable of text chunks (rendered rows before embedded state)."""
+    parser = WixDnsParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser.records + parser.state_records
+
+
+def parse_file(path, chunk_size=CHUNK_SIZE):
+    """DnsRecords from an export file, read chunk by chunk."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_stream(iter(lambda: f.read(chunk_size), ''))
+
+
+def synthetic_export(rows, close_rows=True):
+    """A Wix-like export with the given number of DNS rows (and matching JSON state)."""
+    hook = f'data-hook="{HOOK_PREFIX}'
+    parts = ['<html><head><style>.a{color:red}</style></head><body><table><tbody>']
+    state = []
+    for i in range(rows):
+        host, value = f'host{i}.agroverse.shop', f'target{i}.example.com'
+        parts.append(
+            f'<tr class="row" data-table-row="true"><td><span {hook}host-name--view"><span>{host}</span></span></td>'
+            f'<td><span {hook}value--view">{value}</span></td>'
+            f'<td><span {hook}ttl--view">1 Hour</span></td>' + ('</tr>' if close_rows else ''))
+        state.append({'hostName': host, 'value': value, 'ttl': 3600})
+    parts.append('</tbody></table>')
+    parts.append(f'<script>window.__DNS_STATE__ = {json.dumps({"records": state})}; render();</script>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def legacy_extract(html_content):
+    """The row, host-name and script-state regexes the old parse_wix_domains*.py scripts ran."""
+    content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    rows = re.findall(r'<tr[^>]*data-table-row[^>]*>(.*?)</tr>', content, re.DOTALL | re.IGNORECASE)
+    pattern = (r'data-hook="dns-records--table-content--host-name--view"[^>]*>(?:[^<]|<(?!span[^>]*>))*'
+               r'<span[^>]*>([^<]+)</span>(?:[^<]|<(?!span))*</span>')
+    found = [re.search(pattern, row, re.DOTALL | re.IGNORECASE) for row in rows]
+    re.findall(r'window\.__[A-Z_]+__\s*=\s*({.*?});', html_content, re.DOTALL)
+    return found
+
+
+def benchmark(sizes=(500, 1000, 2000, 4000, 8000), legacy_limit=10.0):
+    """Time both parsers on growing exports; the new one should scale linearly."""
+    print("📊 Parse time by export size (rows)\n")
+    print(f"   {'rows':>6} {'layout':<10} {'MB':>6} {'streaming':>10} {'legacy regex':>13}")
+    legacy_skipped = set()
+    for close_rows in (True, False):
+        layout = 'closed' if close_rows else 'no </tr>'
+        for rows in sizes:
+            html_content = synthetic_export(rows, close_rows)
+            chunks = [html_content[i:i + CHUNK_SIZE] for i in range(0, len(html_content), CHUNK_SIZE)]
+            start = time.perf_counter()
+            records = parse_stream(chunks)
+            streaming = time.perf_counter() - start
+            assert len(unique_records(records)) == rows, f"expected {rows} records, got {len(records)}"
+
+            legacy = '(skipped)'
+            if layout not in legacy_skipped:
+                start = time.perf_counter()
+                legacy_extract(html_content)
+                elapsed = time.perf_counter() - start
+                legacy = f"{elapsed:.3f}s"
+                if elapsed > legacy_limit:
+                    legacy_skipped.add(layout)
+            print(f"   {rows:>6} {layout:<10} {len(html_content) / 1e6:>6.2f} {streaming:>9.3f}s {legacy:>13}")
+    print("\n   Legacy runs are skipped after one takes more than "
+          f"{legacy_limit:g}s; rows without </tr> make its row pattern scan to the end of the file")
+
 
 def main():
-    input_file = 'assets/raw/wix_agroverse_Domains.htm'
-    output_file = 'assets/raw/agroverse_wix_domains_parsed.csv'
-    
-    print(f"Parsing {input_file}...")
-    records = parse_html_file(input_file)
-    
-    if not records:
-        print("No DNS records found. The file might be in a different format.")
-        print("Trying alternative parsing methods...")
-        
-        # Try to extract any structured data
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Look for any patterns that might be DNS-related
-        # This is a fallback - might need manual inspection
-        print("\nFile appears to be a Wix dashboard HTML export.")
-        print("DNS records might be loaded dynamically via JavaScript.")
-        print("Please check if there's a JSON export or API endpoint available.")
-        return
-    
-    # Write to CSV
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['hostname', 'value', 'ttl'])
-        writer.writeheader()
-        writer.writerows(records)
-    
-    print(f"\nExtracted {len(records)} DNS records")
-    print(f"Output written to: {output_file}")
-    
-    # Print first few records as preview
-    if records:
-        print("\nFirst 5 records:")
-        for i, record in enumerate(records[:5], 1):
-            print(f"{i}. Hostname: {record['hostname']}, Value: {record['value']}, TTL: {record['ttl']}")
+    parser = argparse.ArgumentParser(description='Extract DNS records from a Wix Domains export')
+    parser.add_argument('--input', default=INPUT_FILE, help='Saved Wix Domains page')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='CSV to write')
+    parser.add_argument('--benchmark', action='store_true', help='Time the parser on synthetic exports')
+    args = parser.parse_args()
 
-if __name__ == '__main__':
-    main()
+    if args.benchmark:
+        benchmark()
+        return
 
+    print(f"Parsing {args.input}...")
+    try:
+        records = unique_records(parse_file(args.input))
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
 
+    if not records:
+        print("\n⚠️  No DNS records found in the HTML file.")
+        print("\nThe Wix dashboard may load DNS records dynamically, so they are not in the saved page.")
+        print("See scripts/README_DNS_PARSING.md for other ways to export them.")
+        return
 
+    write_csv(records, args.output)
 
+    print(f"\n✅ Extracted {len(records)} unique DNS records")
+    print(f"📄 Output written to: {args.output}")
 
+    print("\n📋 All records:")
+    for i, record in enumerate(records, 1):
+        ttl_display = record.ttl if record.ttl is not None else 'N/A'
+        print(f"  {i:2d}. {record.name:40s} {record.type:5s} → {record.value:50s} (TTL: {ttl_display})")
 
 
+if __name__ == '__main__':
+    main()
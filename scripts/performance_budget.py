@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Page-weight and request-count budgets for every page
+
+index.html alone is over 80 KB of HTML and hero images of several MB are
+common, but nothing tracked which pages got heavier. For every page this
+script:
+1. Lists what the page loads: stylesheets, scripts, images (img src, video
+   posters, inline-style and <style> url()s), fonts (@font-face in local
+   stylesheets and preloads), resolved through site_index.SiteIndex
+2. Measures each local file on disk, with a gzip estimate for text assets
+   (HTML, CSS, JS, SVG, JSON); images and fonts count at their on-disk size.
+   External resources count as requests but not as bytes
+3. Counts render-blocking resources (stylesheets and synchronous scripts
+   in <head>) and finds the largest image above the fold: <img>s in the
+   critical_css.py fold skeleton and backgrounds of the inline rules that
+   match it
+4. Compares the totals against BUDGETS (or a --budgets JSON file) and
+   against the previous run's report (.performance-report.json), printing
+   every violation and every metric that moved by more than DIFF_THRESHOLD
+
+Budgets file format (page globs override the defaults, later globs win):
+
+    {"default": {"transfer_bytes": 1500000},
+     "pages": {"shipments/*": {"html_bytes": 80000}}}
+
+Requirements:
+    pip install beautifulsoup4
+
+Usage:
+    python3 scripts/performance_budget.py
+    python3 scripts/performance_budget.py --strict            # exit 1 on budget violations
+    python3 scripts/performance_budget.py --budgets budgets.json --report perf.json
+    python3 scripts/performance_budget.py --top 20            # 20 heaviest pages
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import argparse
+from fnmatch import fnmatch
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from site_index import BASE_DIR, SiteIndex
+from critical_css import HEAD_PATTERN, above_the_fold_skeleton, critical_css, parse_attrs
+from profiling import profiled
+
+PREVIOUS_REPORT_FILE = BASE_DIR / '.performance-report.json'
+
+BUDGETS = {
+    'html_bytes': 100_000,
+    'transfer_bytes': 2_000_000,
+    'requests': 60,
+    'render_blocking': 4,
+    'largest_fold_image_bytes': 500_000,
+}
+METRICS = tuple(BUDGETS)
+# Relative change (and absolute floor) below which a metric counts as unchanged
+DIFF_THRESHOLD = 0.05
+DIFF_MIN_BYTES = 1024
+
+TEXT_EXTENSIONS = {'.html', '.css', '.js', '.mjs', '.svg', '.json', '.xml', '.txt'}
+FONT_EXTENSIONS = {'.woff2', '.woff', '.ttf', '.otf', '.eot'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg', '.ico'}
+
+INLINE_CODE_PATTERN = re.compile(r'(<(script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+STYLE_BLOCK_PATTERN = re.compile(r'<style\b[^>]*>(.*?)</style\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+TAG_PATTERN = re.compile(r'<([a-zA-Z][\w-]*)\b([^>]*)>')
+CSS_URL_PATTERN = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)', re.IGNORECASE)
+FONT_FACE_PATTERN = re.compile(r'@font-face\s*{[^}]*}', re.IGNORECASE)
+SRC_ATTR_PATTERN = re.compile(r'<img\b[^>]*\ssrc="([^"]*)"', re.IGNORECASE)
+
+_index = None
+
+
+def _init_worker(index):
+    global _index
+    _index = index
+
+
+def resource_kind(path):
+    suffix = os.path.splitext(path.split('?')[0])[1].lower()
+    if suffix in FONT_EXTENSIONS:
+        return 'font'
+    if suffix in IMAGE_EXTENSIONS:
+        return 'image'
+    if suffix == '.css':
+        return 'css'
+    if suffix in ('.js', '.mjs'):
+        return 'js'
+    return 'other'
+
+
+def _font_urls(css_file):
+    """url()s of the fonts a local stylesheet declares, relative to the site root."""
+    try:
+        css = (_index.root / css_file).read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return []
+    fonts = []
+    for block in FONT_FACE_PATTERN.finditer(css):
+        for url in CSS_URL_PATTERN.findall(block.group(0)):
+            kind, target, _ = _index.resolve(url.strip(), css_file)
+            if kind == 'file':
+                fonts.append(target)
+    return fonts
+
+
+def scan_page(page):
+    """
+    What one page loads: {'page', 'html_bytes', 'resources': [(key, kind, local, blocking, fold)]}.
+
+    key is the site-relative file for local resources and the URL for
+    external ones; each key appears once.
+    """
+    html = (_index.root / page).read_text(encoding='utf-8', errors='replace')
+    head = HEAD_PATTERN.search(html)
+    head_end = head.end() if head else 0
+    text = INLINE_CODE_PATTERN.sub(lambda m: m.group(1) + ' ' * len(m.group(3)) + m.group(4),
+                                   COMMENT_PATTERN.sub(lambda m: ' ' * len(m.group(0)), html))
+    skeleton = above_the_fold_skeleton(html)
+    style_blocks = [block.group(1) for block in STYLE_BLOCK_PATTERN.finditer(html)]
+    # Above the fold: <img>s in the fold skeleton and url()s of the inline rules that style it (hero backgrounds)
+    fold_urls = set()
+    if skeleton:
+        fold_urls.update(SRC_ATTR_PATTERN.findall(skeleton))
+        fold_urls.update(url.strip() for url in CSS_URL_PATTERN.findall(critical_css('\n'.join(style_blocks), skeleton)))
+
+    found = []  # (url, kind or None to infer, blocking, fold)
+    for tag in TAG_PATTERN.finditer(text):
+        name = tag.group(1).lower()
+        attrs = parse_attrs(tag.group(2))
+        in_head = tag.start() < head_end
+        if name == 'link':
+            rel = attrs.get('rel', '').lower().split()
+            href = attrs.get('href', '')
+            if 'stylesheet' in rel:
+                blocking = in_head and attrs.get('media', 'all') not in ('print', 'not all')
+                found.append((href, 'css', blocking, False))
+            elif 'preload' in rel and attrs.get('as') in ('style', 'script', 'font', 'image'):
+                kind = {'style': 'css', 'script': 'js'}.get(attrs['as'], attrs['as'])
+                found.append((href, kind, False, False))
+        elif name == 'script' and attrs.get('src'):
+            blocking = in_head and not ({'async', 'defer'} & set(attrs)) and attrs.get('type') != 'module'
+            found.append((attrs['src'], 'js', blocking, False))
+        elif name == 'img' and attrs.get('src'):
+            found.append((attrs['src'], 'image', False, attrs['src'] in fold_urls))
+        elif name == 'video' and attrs.get('poster'):
+            found.append((attrs['poster'], 'image', False, False))
+        for url in CSS_URL_PATTERN.findall(attrs.get('style', '')):
+            found.append((url, 'image', False, False))
+    for block in style_blocks:
+        for url in CSS_URL_PATTERN.findall(block):
+            found.append((url, None, False, url.strip() in fold_urls))
+
+    resources = {}
+    stylesheets = []
+    for url, kind, blocking, fold in found:
+        url = url.strip()
+        resolved, target, _ = _index.resolve(url, page)
+        if resolved == 'external' and url.lower().startswith(('http://', 'https://', '//')):
+            key, local = url, False
+        elif resolved == 'file' and target != page:
+            key, local = target, True
+        else:
+            continue
+        kind = kind or resource_kind(key)
+        if key in resources:
+            _, _, was_blocking, was_fold = resources[key]
+            resources[key] = (key, kind, blocking or was_blocking, fold or was_fold)
+            continue
+        resources[key] = (key, kind, blocking, fold)
+        if local and kind == 'css':
+            stylesheets.append(key)
+    for css_file in stylesheets:
+        for font in _font_urls(css_file):
+            resources.setdefault(font, (font, 'font', False, False))
+    return {
+        'page': page,
+        'html_bytes': len(html.encode('utf-8')),
+        'resources': [(key, kind, key in _index.files, blocking, fold)
+                      for key, kind, blocking, fold in resources.values()],
+    }
+
+
+class AssetSizes:
+    """On-disk and estimated transfer size of each local file, measured once."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._sizes = {}
+
+    def __call__(self, path):
+        """(bytes on disk, estimated bytes over the wire)."""
+        if path not in self._sizes:
+            data = (self.root / path).read_bytes()
+            if os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS:
+                self._sizes[path] = (len(data), len(gzip.compress(data, compresslevel=6, mtime=0)))
+            else:
+                self._sizes[path] = (len(data), len(data))
+        return self._sizes[path]
+
+
+def measure_page(scan, sizes):
+    """Budget metrics for one scanned page."""
+    html_raw, html_transfer = sizes(scan['page'])
+    by_kind = {'html': html_transfer}
+    transfer = html_transfer
+    blocking = []
+    largest_fold = (None, 0)
+    external = 0
+    for key, kind, local, is_blocking, fold in scan['resources']:
+        if is_blocking:
+            blocking.append(key)
+        if not local:
+            external += 1
+            continue
+        raw, wire = sizes(key)
+        transfer += wire
+        by_kind[kind] = by_kind.get(kind, 0) + wire
+        if fold and kind == 'image' and raw > largest_fold[1]:
+            largest_fold = (key, raw)
+    return {
+        'html_bytes': html_raw,
+        'transfer_bytes': transfer,
+        'requests': 1 + len(scan['resources']),
+        'render_blocking': len(blocking),
+        'largest_fold_image_bytes': largest_fold[1],
+        'largest_fold_image': largest_fold[0],
+        'external_requests': external,
+        'bytes_by_kind': by_kind,
+        'blocking_resources': blocking,
+    }
+
+
+def load_budgets(budgets_file=None):
+    """{'default': {...}, 'pages': {glob: {...}}} with BUDGETS as the base."""
+    config = {'default': dict(BUDGETS), 'pages': {}}
+    if budgets_file:
+        with open(budgets_file, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        config['default'].update(loaded.get('default', {}))
+        config['pages'].update(loaded.get('pages', {}))
+    unknown = {name for budgets in [config['default'], *config['pages'].values()] for name in budgets} - set(METRICS)
+    if unknown:
+        raise ValueError(f"unknown budget metric(s): {', '.join(sorted(unknown))}")
+    return config
+
+
+def budgets_for(page, config):
+    budgets = dict(config['default'])
+    for pattern, overrides in config['pages'].items():
+        if fnmatch(page, pattern):
+            budgets.update(overrides)
+    return budgets
+
+
+def find_violations(pages, config):
+    """[(page, metric, value, budget)] for every metric over its budget."""
+    violations = []
+    for page, metrics in pages.items():
+        for metric, budget in budgets_for(page, config).items():
+            if budget is not None and metrics[metric] > budget:
+                violations.append((page, metric, metrics[metric], budget))
+    return violations
+
+
+def _changed(metric, before, after):
+    delta = abs(after - before)
+    if not metric.endswith('bytes'):
+        return delta > 0
+    return delta >= DIFF_MIN_BYTES and delta > DIFF_THRESHOLD * max(before, 1)
+
+
+def diff_reports(previous, current):
+    """[(page, metric, before, after)] for metrics that moved beyond the threshold, plus added/removed pages."""
+    changes = []
+    for page, metrics in current.items():
+        before = previous.get(page)
+        if before is None:
+            changes.append((page, 'page', None, 'added'))
+            continue
+        changes.extend((page, metric, before.get(metric, 0), metrics[metric]) for metric in METRICS
+                       if _changed(metric, before.get(metric, 0), metrics[metric]))
+    changes.extend((page, 'page', 'removed', None) for page in previous if page not in current)
+    return changes
+
+
+def format_value(metric, value):
+    if value is None or isinstance(value, str):
+        return str(value)
+    return f"{value / 1024:,.0f} KB" if metric.endswith('bytes') else f"{value:,}"
+
+
+def run(root=BASE_DIR, budgets_file=None, report=None, workers=None, top=10, previous_file=PREVIOUS_REPORT_FILE):
+    """Audit every page and print budget violations and changes since the previous run."""
+    start = time.perf_counter()
+    config = load_budgets(budgets_file)
+    index = SiteIndex(root)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index,)) as executor:
+        scans = list(executor.map(scan_page, index.pages, chunksize=8))
+    sizes = AssetSizes(index.root)
+    pages = {scan['page']: measure_page(scan, sizes) for scan in scans}
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 Audited {len(pages)} pages in {elapsed:.1f}s\n")
+    heaviest = sorted(pages.items(), key=lambda item: item[1]['transfer_bytes'], reverse=True)[:top]
+    print(f"   {'page':50s} {'transfer':>10s} {'html':>8s} {'reqs':>5s} {'block':>5s} {'fold img':>9s}")
+    for page, m in heaviest:
+        print(f"   {page[:50]:50s} {format_value('bytes', m['transfer_bytes']):>10s} "
+              f"{format_value('bytes', m['html_bytes']):>8s} {m['requests']:5d} {m['render_blocking']:5d} "
+              f"{format_value('bytes', m['largest_fold_image_bytes']):>9s}")
+
+    violations = find_violations(pages, config)
+    if violations:
+        print(f"\n❌ {len(violations)} budget violations on {len({v[0] for v in violations})} pages:")
+        for page, metric, value, budget in violations:
+            print(f"   {page}: {metric} {format_value(metric, value)} > {format_value(metric, budget)}")
+    else:
+        print("\n✅ Every page is within budget")
+
+    previous = {}
+    if previous_file and Path(previous_file).exists():
+        try:
+            previous = json.loads(Path(previous_file).read_text(encoding='utf-8')).get('pages', {})
+        except ValueError:
+            previous = {}
+    changes = diff_reports(previous, pages) if previous else []
+    if previous:
+        print(f"\n📋 {len(changes)} changes since the previous run")
+        for page, metric, before, after in changes:
+            if metric == 'page':
+                print(f"   {'+' if after else '-'} {page}")
+                continue
+            marker = '⚠️ ' if after > before else '✅'
+            print(f"   {marker} {page}: {metric} {format_value(metric, before)} → {format_value(metric, after)}")
+
+    result = {
+        'pages': pages,
+        'budgets': config,
+        'violations': [{'page': p, 'metric': m, 'value': v, 'budget': b} for p, m, v, b in violations],
+        'changes': [{'page': p, 'metric': m, 'before': b, 'after': a} for p, m, b, a in changes],
+        'seconds': round(elapsed, 3),
+    }
+    if previous_file:
+        Path(previous_file).write_text(json.dumps({'pages': pages}, indent=1, sort_keys=True), encoding='utf-8')
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"📋 Report written to {report}")
+    return result
+
+
+@profiled
+def main():
+    parser = argparse.ArgumentParser(description='Check page weight and request counts against budgets')
+    parser.add_argument('--root', default=str(BASE_DIR), help='Site root (default: repository root)')
+    parser.add_argument('--budgets', help='JSON file with budget overrides')
+    parser.add_argument('--report', help='Write a JSON report to this file')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--top', type=int, default=10, help='Show the N heaviest pages')
+    parser.add_argument('--strict', action='store_true', help='Exit 1 if any page is over budget')
+    args = parser.parse_args()
+
+    try:
+        result = run(args.root, args.budgets, args.report, args.workers, args.top)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if args.strict and result['violations']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Per-phase wall and CPU timings for unmodified scripts
+
+The page generators and fixers interleave reading files, parsing HTML,
+transforming it and writing it back inside one function, so timing them
+by phase would mean editing every script. instrument() instead wraps the
+library calls each phase goes through for as long as it is active:
+- read:      open(...).read*() in text/binary read mode, Path.read_text/read_bytes
+- parse:     BeautifulSoup(...), HTMLParser.feed, json.load/loads
+- serialize: Tag.decode (str(soup), prettify), json.dump/dumps
+- write:     open(...).write*() in write/append mode, Path.write_text/write_bytes
+Everything else in the timed block counts as transform.
+
+Nested calls (read_text opening a file, decode recursing into children)
+are only counted once, by the outermost phase.
+
+    timer = PhaseTimer()
+    with timer, instrument(timer):
+        fix_blog_nav_links.main()
+    print(timer.summary())
+"""
+
+import json
+import time
+import builtins
+from pathlib import Path
+from html.parser import HTMLParser
+from contextlib import contextmanager
+
+try:
+    import bs4
+    from bs4.element import Tag
+except ImportError:
+    bs4 = None
+
+PHASES = ('read', 'parse', 'transform', 'serialize', 'write')
+
+
+class PhaseTimer:
+    """Accumulates wall and CPU seconds per phase; used as a context manager around the whole run."""
+
+    def __init__(self):
+        self.wall = dict.fromkeys(PHASES, 0.0)
+        self.cpu = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.total_wall = 0.0
+        self.total_cpu = 0.0
+        self._depth = 0
+        self._start = None
+
+    def __enter__(self):
+        self._start = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc):
+        self.total_wall += time.perf_counter() - self._start[0]
+        self.total_cpu += time.process_time() - self._start[1]
+        measured_wall = sum(self.wall[p] for p in PHASES if p != 'transform')
+        measured_cpu = sum(self.cpu[p] for p in PHASES if p != 'transform')
+        self.wall['transform'] = max(0.0, self.total_wall - measured_wall)
+        self.cpu['transform'] = max(0.0, self.total_cpu - measured_cpu)
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._depth = 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] += time.perf_counter() - wall
+            self.cpu[name] += time.process_time() - cpu
+            self.calls[name] += 1
+            self._depth = 0
+
+    def timed(self, name, function):
+        """function wrapped so that its calls count towards phase name."""
+        timer = self
+
+        def wrapper(*args, **kwargs):
+            with timer.phase(name):
+                return function(*args, **kwargs)
+
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def as_dict(self):
+        return {
+            'wall': round(self.total_wall, 4),
+            'cpu': round(self.total_cpu, 4),
+            'phases': {p: {'wall': round(self.wall[p], 4), 'cpu': round(self.cpu[p], 4), 'calls': self.calls[p]}
+                       for p in PHASES},
+        }
+
+    def summary(self):
+        lines = [f"   {'phase':<10} {'wall':>9} {'cpu':>9} {'calls':>7}"]
+        for p in PHASES:
+            calls = '' if p == 'transform' else self.calls[p]
+            lines.append(f"   {p:<10} {self.wall[p]:>8.3f}s {self.cpu[p]:>8.3f}s {calls:>7}")
+        lines.append(f"   {'total':<10} {self.total_wall:>8.3f}s {self.total_cpu:>8.3f}s")
+        return '\n'.join(lines)
+
+
+class _TimedFile:
+    """File object proxy that times its reads or writes."""
+
+    def __init__(self, file, timer, phase):
+        self._file = file
+        self._timer = timer
+        self._phase = phase
+
+    def __getattr__(self, name):
+        attribute = getattr(self._file, name)
+        if name in ('read', 'readline', 'readlines', 'write', 'writelines'):
+            return self._timer.timed(self._phase, attribute)
+        return attribute
+
+    def __iter__(self):
+        return iter(self._timer.timed(self._phase, self._file.readlines)())
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._file.__exit__(*exc)
+
+
+@contextmanager
+def instrument(timer):
+    """Route file I/O, HTML/JSON parsing and serialization through timer's phases while active."""
+    original_open = builtins.open
+
+    def timed_open(file, mode='r', *args, **kwargs):
+        phase = 'read' if mode.startswith('r') and '+' not in mode else 'write'
+        with timer.phase(phase):
+            handle = original_open(file, mode, *args, **kwargs)
+        return _TimedFile(handle, timer, phase)
+
+    patches = [
+        (builtins, 'open', timed_open),
+        (Path, 'read_text', timer.timed('read', Path.read_text)),
+        (Path, 'read_bytes', timer.timed('read', Path.read_bytes)),
+        (Path, 'write_text', timer.timed('write', Path.write_text)),
+        (Path, 'write_bytes', timer.timed('write', Path.write_bytes)),
+        (HTMLParser, 'feed', timer.timed('parse', HTMLParser.feed)),
+        (json, 'load', timer.timed('parse', json.load)),
+        (json, 'loads', timer.timed('parse', json.loads)),
+        (json, 'dump', timer.timed('serialize', json.dump)),
+        (json, 'dumps', timer.timed('serialize', json.dumps)),
+    ]
+    if bs4 is not None:
+        patches += [
+            (bs4.BeautifulSoup, '__init__', timer.timed('parse', bs4.BeautifulSoup.__init__)),
+            (Tag, 'decode', timer.timed('serialize', Tag.decode)),
+        ]
+    # Inherited attributes (Path.read_text lives on a base class) are deleted again rather than restored
+    saved = [(owner, name, vars(owner).get(name)) for owner, name, _ in patches]
+    try:
+        for owner, name, replacement in patches:
+            setattr(owner, name, replacement)
+        yield timer
+    finally:
+        for owner, name, original in saved:
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Precompress text assets into .br and .gz sidecars
+
+Nothing in the repo precompresses output, so every server in front of the
+site compresses on each request (or not at all). This script:
+1. Finds every HTML, CSS, JS, XML (facebook_product_feed.xml, ...) and JSON
+   file served by the site
+2. Writes <file>.br (Brotli, quality 11) and <file>.gz (gzip, level 9)
+   next to each one, on a thread pool
+3. Skips files whose content hash matches the previous run, using
+   .precompress-state.json
+4. Deletes sidecars that no longer match a file: sources that were removed
+   or fell below MIN_SIZE, and stale .br files when brotli is unavailable
+5. Reports per-file and total savings
+
+A CDN or server with precompressed-file support (nginx gzip_static /
+brotli_static, Caddy precompressed, http-server --brotli --gzip) can then
+serve the sidecars with zero runtime CPU. The site is deployed straight from
+this repository with no build step, so the sidecars are committed together
+with the files they belong to. The output is byte-identical for unchanged
+input (gzip mtime=0), so only sidecars of changed files show up in a diff.
+
+Requirements:
+    pip install brotli    # optional; without it only .gz sidecars are written
+
+Usage:
+    python3 scripts/precompress_assets.py
+    python3 scripts/precompress_assets.py --force --workers 8
+    python3 scripts/precompress_assets.py --clean
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).parent.parent
+STATE_FILE = BASE_DIR / '.precompress-state.json'
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.xml', '.json', '.svg', '.txt', '.map'}
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script', 'scripts'}
+EXCLUDED_FILES = {'package.json', 'package-lock.json'}
+# Below this size the response headers outweigh any savings
+MIN_SIZE = 256
+
+def find_compressible_files():
+    """All site files worth precompressing."""
+    files = []
+    for path in sorted(BASE_DIR.rglob('*')):
+        if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS or not path.is_file():
+            continue
+        relative = path.relative_to(BASE_DIR)
+        if EXCLUDED_DIRS.intersection(relative.parts) or path.name in EXCLUDED_FILES:
+            continue
+        if path.name.startswith('.'):
+            continue
+        files.append(path)
+    return files
+
+def load_state():
+    """Content hashes recorded by the previous run."""
+    if not STATE_FILE.exists():
+        return {}
+    try:
+        return json.loads(STATE_FILE.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+
+def sidecar_paths(path):
+    """The .br and .gz files that belong to a source file."""
+    return path.with_name(path.name + '.br'), path.with_name(path.name + '.gz')
+
+def find_sidecars():
+    """Every .br/.gz sidecar on the site, whether or not its source still exists."""
+    sidecars = []
+    for path in sorted(BASE_DIR.rglob('*')):
+        if path.suffix not in ('.br', '.gz') or not path.is_file():
+            continue
+        if Path(path.stem).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            continue
+        if EXCLUDED_DIRS.intersection(path.relative_to(BASE_DIR).parts):
+            continue
+        sidecars.append(path)
+    return sidecars
+
+def remove_files(paths):
+    """Unlink the paths that exist. Returns how many were removed."""
+    removed = 0
+    for path in paths:
+        if path.exists():
+            path.unlink()
+            removed += 1
+    return removed
+
+def compress_file(path, previous_hash, force=False):
+    """
+    Write sidecars for one file.
+
+    Returns a dict with the original and compressed sizes and whether the
+    file was skipped because its hash and sidecars were unchanged.
+    """
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    br_path, gz_path = sidecar_paths(path)
+    result = {'path': path, 'hash': digest, 'size': len(data), 'skipped': False}
+
+    if len(data) < MIN_SIZE:
+        remove_files((br_path, gz_path))
+        result['skipped'] = 'small'
+        return result
+
+    up_to_date = (digest == previous_hash and gz_path.exists()
+                  and (brotli is None or br_path.exists()))
+    if up_to_date and not force:
+        result['skipped'] = 'unchanged'
+        result['gz'] = gz_path.stat().st_size
+        result['br'] = br_path.stat().st_size if br_path.exists() else None
+        return result
+
+    # mtime=0 keeps .gz output byte-identical across runs
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    gz_path.write_bytes(gz_data)
+    result['gz'] = len(gz_data)
+
+    if brotli is not None:
+        mode = brotli.MODE_TEXT if path.suffix != '.json' else brotli.MODE_GENERIC
+        br_data = brotli.compress(data, quality=11, mode=mode)
+        br_path.write_bytes(br_data)
+        result['br'] = len(br_data)
+    else:
+        # An old .br would still describe the previous content
+        remove_files((br_path,))
+        result['br'] = None
+    return result
+
+def format_ratio(original, compressed):
+    if compressed is None or not original:
+        return '    -'
+    return f"{100 * (1 - compressed / original):4.1f}%"
+
+def precompress(force=False, workers=None, verbose=True):
+    """Compress every eligible file. Returns the list of per-file results."""
+    files = find_compressible_files()
+    state = load_state()
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+
+    print(f"🗜️  Precompressing {len(files)} files with {workers} threads"
+          f"{'' if brotli else ' (brotli not installed: gzip only)'}...\n")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda p: compress_file(p, state.get(p.relative_to(BASE_DIR).as_posix()), force),
+            files,
+        ))
+
+    compressed = [r for r in results if r['skipped'] != 'small']
+    written = [r for r in compressed if not r['skipped']]
+
+    if verbose:
+        print(f"   {'File':60s} {'Original':>10s} {'gzip':>10s} {'':>6s} {'brotli':>10s} {'':>6s}")
+        for r in sorted(compressed, key=lambda r: r['size'], reverse=True):
+            name = r['path'].relative_to(BASE_DIR).as_posix()
+            if len(name) > 60:
+                name = '…' + name[-59:]
+            marker = ' ' if r['skipped'] else '*'
+            br_size = f"{r['br']:,}" if r['br'] is not None else '-'
+            print(f" {marker} {name:60s} {r['size']:>10,} {r['gz']:>10,} {format_ratio(r['size'], r['gz'])} "
+                  f"{br_size:>10s} {format_ratio(r['size'], r['br'])}")
+        print("   (* = written this run)\n")
+
+    total = sum(r['size'] for r in compressed)
+    total_gz = sum(r['gz'] for r in compressed)
+    print(f"📊 Total: {total:,} bytes → gzip {total_gz:,} ({format_ratio(total, total_gz).strip()} saved)", end='')
+    if brotli is not None:
+        total_br = sum(r['br'] for r in compressed if r['br'] is not None)
+        print(f", brotli {total_br:,} ({format_ratio(total, total_br).strip()} saved)")
+    else:
+        print()
+    print(f"   Written: {len(written)}, unchanged: {len(compressed) - len(written)}, "
+          f"too small: {len(results) - len(compressed)}")
+
+    expected = {sidecar for r in compressed for sidecar in sidecar_paths(r['path'])}
+    orphans = remove_files(path for path in find_sidecars() if path not in expected)
+    if orphans:
+        print(f"   🗑️  Removed {orphans} sidecars without a current source file")
+
+    new_state = {r['path'].relative_to(BASE_DIR).as_posix(): r['hash'] for r in compressed}
+    STATE_FILE.write_text(json.dumps(new_state, indent=2, sort_keys=True), encoding='utf-8')
+    return results
+
+def clean():
+    """Remove all generated sidecars (including orphaned ones) and the state file."""
+    removed = remove_files(find_sidecars())
+    if STATE_FILE.exists():
+        STATE_FILE.unlink()
+    print(f"🗑️  Removed {removed} sidecar files")
+
+def main():
+    parser = argparse.ArgumentParser(description='Write .br/.gz sidecars for HTML, CSS, JS, XML and JSON')
+    parser.add_argument('--force', action='store_true', help='Recompress files even if unchanged')
+    parser.add_argument('--workers', type=int, default=None, help='Thread pool size')
+    parser.add_argument('--quiet', action='store_true', help='Only print the totals')
+    parser.add_argument('--clean', action='store_true', help='Delete all sidecars')
+    args = parser.parse_args()
+
+    if args.clean:
+        clean()
+        return
+    try:
+        precompress(force=args.force, workers=args.workers, verbose=not args.quiet)
+    except OSError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Profile any script: cProfile, tracemalloc and per-phase timings
+
+Scripts print progress but no timing or memory data, so a slow run gives
+no hint where the time went. This module adds three options to any
+script without touching its logic:
+- --profile          cProfile the run, dump the stats to --profile-output
+                     (default <script>.prof) and print the top
+                     --profile-top functions by cumulative time
+- --trace-memory     tracemalloc the run and print the peak plus the
+                     --profile-top source lines holding the most memory
+                     at the end
+- --timings          wall and CPU time per phase (read, parse, transform,
+                     serialize, write; see phase_timer.py)
+
+Legacy scripts run unchanged through the command-line wrapper; everything
+after the script path goes to the script:
+
+    python3 scripts/profiling.py --profile --timings scripts/fix_navigation_with_titles.py
+    python3 scripts/profiling.py --trace-memory scripts/fix_raw_image_references.py
+
+New scripts can decorate main() with @profiled, which takes the options
+off sys.argv before the script's own argument parsing runs (all of them
+start with --profile, --trace or --timings and are never abbreviated, so
+they cannot shadow a script's own options such as performance_budget.py
+--top):
+
+    python3 scripts/check_links.py --profile --profile-top 15
+
+Only the main process is measured; work done in ProcessPoolExecutor
+workers shows up as time spent waiting on them.
+"""
+
+import os
+import sys
+import runpy
+import pstats
+import argparse
+import cProfile
+import functools
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+
+from phase_timer import PhaseTimer, instrument
+
+TOP_N = 25
+# Stack frames kept per tracemalloc allocation
+TRACE_FRAMES = 1
+
+
+def add_profiling_arguments(parser):
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', action='store_true', help='cProfile the run')
+    group.add_argument('--profile-output', metavar='FILE', help='Where to dump the cProfile stats (default <script>.prof; implies --profile)')
+    group.add_argument('--trace-memory', action='store_true', help='Report peak memory and top allocation sites')
+    group.add_argument('--timings', action='store_true', help='Report wall/CPU time per phase')
+    group.add_argument('--profile-top', type=int, default=TOP_N, help='Rows in the profile and memory reports')
+    return parser
+
+
+def _format_bytes(size):
+    if size < 1024 * 1024:
+        return f"{size / 1024:,.1f} KB"
+    return f"{size / 1024 / 1024:,.1f} MB"
+
+
+@contextmanager
+def profiling(name, profile=False, trace_memory=False, timings=False, top=TOP_N, profile_output=None):
+    """Measure the enclosed block and print the reports when it ends (even on sys.exit)."""
+    timer = PhaseTimer() if timings else None
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start(TRACE_FRAMES)
+    try:
+        with ExitStack() as stack:
+            if timer:
+                stack.enter_context(timer)
+                stack.enter_context(instrument(timer))
+            if profiler:
+                profiler.enable()
+                stack.callback(profiler.disable)
+            yield
+    finally:
+        if timer:
+            print(f"\n⏱️  Timings for {name}")
+            print(timer.summary())
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n🧠 Memory for {name}: peak {_format_bytes(peak)}, {_format_bytes(current)} still allocated")
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            for stat in snapshot.statistics('lineno')[:top]:
+                frame = stat.traceback[0]
+                print(f"   {_format_bytes(stat.size):>10} {stat.count:>8,} blocks  "
+                      f"{os.path.relpath(frame.filename)}:{frame.lineno}")
+        if profiler:
+            path = profile_output or f"{name}.prof"
+            profiler.dump_stats(path)
+            print(f"\n📊 Profile for {name} written to {path} (top {top} by cumulative time)")
+            pstats.Stats(profiler, stream=sys.stdout).strip_dirs().sort_stats('cumulative').print_stats(top)
+
+
+def profiled(main):
+    """Decorator for a script's main(): adds --profile, --profile-output, --trace-memory, --timings and --profile-top."""
+
+    @functools.wraps(main)
+    def wrapper(*args, **kwargs):
+        parser = add_profiling_arguments(argparse.ArgumentParser(add_help=False, allow_abbrev=False))
+        options, sys.argv[1:] = parser.parse_known_args(sys.argv[1:])
+        options.profile = options.profile or bool(options.profile_output)
+        if not (options.profile or options.trace_memory or options.timings):
+            return main(*args, **kwargs)
+        name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        with profiling(name, options.profile, options.trace_memory, options.timings, options.profile_top,
+                       options.profile_output):
+            return main(*args, **kwargs)
+
+    return wrapper
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a script under cProfile, tracemalloc and/or per-phase timers',
+        usage='%(prog)s [--profile [--profile-output FILE]] [--trace-memory] [--timings] [--profile-top N] '
+              'script.py [args...]')
+    add_profiling_arguments(parser)
+    parser.add_argument('script', help='Script to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments for the script')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.script):
+        print(f"❌ Error: {args.script} not found")
+        sys.exit(1)
+    args.profile = args.profile or bool(args.profile_output)
+    if not (args.profile or args.trace_memory or args.timings):
+        args.timings = True
+
+    script = os.path.abspath(args.script)
+    sys.argv = [script] + args.args
+    sys.path.insert(0, os.path.dirname(script))
+    name = os.path.splitext(os.path.basename(script))[0]
+    with profiling(name, args.profile, args.trace_memory, args.timings, args.profile_top, args.profile_output):
+        runpy.run_path(script, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Remove CSS rules that match nothing on the site
+
+The menu fix scripts (fix_blog_posts_menu_and_spacing.add_mobile_menu_styles,
+add_mobile_menu_hide_css.py, fix_duplicate_menu_display.py,
+fix_menu_visibility.py) layered rule after rule into pages, and many of them
+now target markup that no longer exists. This script:
+1. Parses every HTML page once and indexes its elements by id, class and
+   tag, so each selector is only tested against elements that can match
+   its rightmost compound instead of against every element on every page
+2. Parses every local stylesheet and inline <style> block and tests each
+   selector against the pages that actually load it
+3. Removes selectors (and whole rules, and emptied @media blocks) that
+   match nothing, plus exact duplicate declarations and duplicate rules
+4. Edits the original text in place, so formatting and comments are kept,
+   and reports bytes saved per page
+
+Classes, ids and tags that appear in any script (js/**/*.js, inline
+<script> or on* handlers) may be added at runtime, so selectors that use
+them are never removed.
+
+Generated pages are rebuilt from their templates, so re-run this after
+regenerating pages and before critical_css.py.
+
+Requirements:
+    pip install beautifulsoup4
+
+Usage:
+    python3 scripts/prune_css.py --dry-run    # report only
+    python3 scripts/prune_css.py
+"""
+
+import re
+import sys
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+import soupsieve
+from bs4 import BeautifulSoup
+from soupsieve import SelectorSyntaxError
+
+from css_parser import (
+    parse_stylesheet, split_declarations, collapse_whitespace,
+    matchable_selector,
+)
+
+BASE_DIR = Path(__file__).parent.parent
+JS_DIR = BASE_DIR / 'js'
+
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script', 'scripts'}
+
+STYLE_PATTERN = re.compile(r'<style\b(?P<attrs>[^>]*)>(?P<css>.*?)</style>', re.IGNORECASE | re.DOTALL)
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+HANDLER_PATTERN = re.compile(r'\son\w+\s*=\s*"([^"]*)"', re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r'[A-Za-z_][\w-]*')
+# Bracketed and parenthesized parts are removed before picking the index key
+NESTED_PATTERN = re.compile(r'\([^()]*\)|\[[^\]]*\]')
+COMBINATOR_PATTERN = re.compile(r'\s*[>+~]\s*|\s+')
+
+class Page:
+    """A parsed page with its elements indexed for selector matching."""
+
+    def __init__(self, path):
+        self.path = path
+        self.html = path.read_text(encoding='utf-8')
+        self.soup = BeautifulSoup(self.html, 'html.parser')
+        self.elements = self.soup.find_all(True)
+        self.index = defaultdict(list)
+        for element in self.elements:
+            self.index[('tag', element.name)].append(element)
+            for class_name in element.get('class', []):
+                self.index[('class', class_name)].append(element)
+            if element.get('id'):
+                self.index[('id', element['id'])].append(element)
+        self.matches = {}
+
+    def stylesheets(self):
+        """Local stylesheet files loaded by this page."""
+        found = []
+        for link in self.soup.find_all('link', href=True):
+            rel = ' '.join(link.get('rel', [])).lower()
+            if rel != 'stylesheet' and not (rel == 'preload' and link.get('as') == 'style'):
+                continue
+            href = link['href'].split('?')[0].split('#')[0]
+            if re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', href, re.IGNORECASE):
+                continue
+            path = (BASE_DIR / href.lstrip('/')) if href.startswith('/') else (self.path.parent / href)
+            path = path.resolve()
+            if path.is_file() and path not in found:
+                found.append(path)
+        return found
+
+    def inline_styles(self):
+        """Spans of inline <style> blocks (critical CSS is regenerated, so skipped)."""
+        return [(m.start('css'), m.end('css')) for m in STYLE_PATTERN.finditer(self.html)
+                if 'data-critical' not in m.group('attrs')]
+
+    def script_tokens(self):
+        text = ' '.join(SCRIPT_PATTERN.findall(self.html) + HANDLER_PATTERN.findall(self.html))
+        return set(TOKEN_PATTERN.findall(text))
+
+    def matches_selector(self, selector, compiled, key):
+        """Whether any element on the page matches, checking indexed candidates only."""
+        if selector not in self.matches:
+            candidates = self.index.get(key, ()) if key else self.elements
+            self.matches[selector] = any(compiled.match(element) for element in candidates)
+        return self.matches[selector]
+
+def find_pages():
+    """All HTML pages served by the site."""
+    pages = []
+    for html_file in sorted(BASE_DIR.rglob('*.html')):
+        if EXCLUDED_DIRS.intersection(html_file.relative_to(BASE_DIR).parts):
+            continue
+        pages.append(html_file)
+    return pages
+
+def index_key(selector):
+    """The (kind, name) index key of a selector's rightmost compound, or None."""
+    compound = selector
+    while NESTED_PATTERN.search(compound):
+        compound = NESTED_PATTERN.sub('', compound)
+    compound = COMBINATOR_PATTERN.split(compound.strip())[-1]
+    match = re.search(r'#(-?[_a-zA-Z][\w-]*)', compound)
+    if match:
+        return ('id', match.group(1))
+    match = re.search(r'\.(-?[_a-zA-Z][\w-]*)', compound)
+    if match:
+        return ('class', match.group(1))
+    match = re.match(r'[a-zA-Z][\w-]*', compound)
+    if match:
+        return ('tag', match.group(0).lower())
+    return None
+
+def selector_names(selector):
+    """Class and id names in a selector, or its tag names if it has none."""
+    names = set(re.findall(r'[.#](-?[_a-zA-Z][\w-]*)', selector))
+    if names:
+        return names
+    return set(re.findall(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)', selector))
+
+class SelectorMatcher:
+    """Decides whether a selector is used on a set of pages."""
+
+    def __init__(self, dynamic_tokens):
+        self.dynamic_tokens = dynamic_tokens
+        self.compiled = {}
+
+    def compile(self, selector):
+        if selector not in self.compiled:
+            try:
+                self.compiled[selector] = soupsieve.compile(selector)
+            except (SelectorSyntaxError, NotImplementedError, ValueError):
+                self.compiled[selector] = None
+        return self.compiled[selector]
+
+    def is_used(self, selector, pages):
+        matchable = matchable_selector(selector)
+        compiled = self.compile(matchable)
+        if compiled is None:
+            return True  # unknown syntax: keep
+        key = index_key(matchable)
+        if any(page.matches_selector(matchable, compiled, key) for page in pages):
+            return True
+        return bool(selector_names(matchable) & self.dynamic_tokens)
+
+def _removal_span(text, start, end):
+    """Widen a span to swallow its own line when it is the only thing on it."""
+    line_start = start
+    while line_start > 0 and text[line_start - 1] in ' \t':
+        line_start -= 1
+    line_end = end
+    while line_end < len(text) and text[line_end] in ' \t':
+        line_end += 1
+    if (line_start == 0 or text[line_start - 1] == '\n') and (line_end == len(text) or text[line_end] == '\n'):
+        line_end = min(line_end + 1, len(text))
+        # Take the blank separator line after the rule with it
+        blank = re.match(r'[ \t]*\n', text[line_end:])
+        if blank:
+            line_end += blank.end()
+        return line_start, line_end
+    return start, end
+
+def _dedupe_declarations(text, node, edits):
+    """Drop exact duplicate declarations within a rule, keeping the last one."""
+    body_start = node['body_start']
+    body = text[body_start:node['end'] - 1]
+    spans = split_declarations(body)
+    last_seen = {}
+    for span in spans:
+        last_seen[collapse_whitespace(body[span[0]:span[1]]).lower()] = span
+    removed = 0
+    for span in spans:
+        if last_seen[collapse_whitespace(body[span[0]:span[1]]).lower()] != span:
+            edits.append((body_start + span[0], body_start + span[1], ''))
+            removed += 1
+    return removed
+
+def prune_text(text, pages, matcher):
+    """
+    Prune one stylesheet's text against the pages that load it.
+
+    Returns (new_text, stats) where stats counts removed rules, selectors
+    and declarations.
+    """
+    nodes = parse_stylesheet(text)
+    stats = {'rules': 0, 'selectors': 0, 'declarations': 0}
+    edits = []
+
+    # A rule repeated verbatim in the same context is redundant: the last copy wins anyway
+    last_copy = {}
+
+    def remember(node_list, context):
+        for node in node_list:
+            if node['type'] == 'rule':
+                last_copy[(context, tuple(node['selectors']), node['body'])] = node['start']
+            elif node['type'] == 'group':
+                remember(node['children'], context + (node['prelude'],))
+    remember(nodes, ())
+
+    def visit(node_list, context):
+        node_edits = []
+        kept_any = False
+        for node in node_list:
+            if node['type'] == 'group':
+                child_edits, kept = visit(node['children'], context + (node['prelude'],))
+                if kept:
+                    node_edits.extend(child_edits)
+                    kept_any = True
+                else:
+                    node_edits.append((*_removal_span(text, node['start'], node['end']), ''))
+                continue
+            if node['type'] != 'rule':
+                kept_any = True
+                continue
+            if last_copy[(context, tuple(node['selectors']), node['body'])] != node['start']:
+                node_edits.append((*_removal_span(text, node['start'], node['end']), ''))
+                stats['rules'] += 1
+                continue
+            kept = [s for s in node['selectors'] if matcher.is_used(s, pages)]
+            if not kept:
+                node_edits.append((*_removal_span(text, node['start'], node['end']), ''))
+                stats['rules'] += 1
+                continue
+            if len(kept) < len(node['selectors']):
+                brace = node['body_start'] - 1
+                separator = ',\n' if '\n' in text[node['start']:brace].strip() else ', '
+                node_edits.append((node['start'], brace, separator.join(kept) + ' '))
+                stats['selectors'] += len(node['selectors']) - len(kept)
+            stats['declarations'] += _dedupe_declarations(text, node, node_edits)
+            kept_any = True
+        return node_edits, kept_any
+
+    edits, _ = visit(nodes, ())
+    out = []
+    last = 0
+    for start, end, replacement in sorted(edits):
+        if start < last:
+            continue  # nested inside an edit already applied
+        out.append(text[last:start])
+        out.append(replacement)
+        last = end
+    out.append(text[last:])
+    return ''.join(out), stats
+
+def collect_dynamic_tokens(pages):
+    """Every identifier-like token used by scripts, which may add classes at runtime."""
+    tokens = set()
+    for js_file in JS_DIR.rglob('*.js'):
+        tokens |= set(TOKEN_PATTERN.findall(js_file.read_text(encoding='utf-8')))
+    for page in pages:
+        tokens |= page.script_tokens()
+    return tokens
+
+def prune_site(dry_run=False):
+    """Prune every stylesheet and inline style block. Returns bytes saved per page."""
+    print("🔍 Parsing and indexing pages...")
+    pages = [Page(path) for path in find_pages()]
+    matcher = SelectorMatcher(collect_dynamic_tokens(pages))
+
+    stylesheet_pages = defaultdict(list)
+    for page in pages:
+        for stylesheet in page.stylesheets():
+            stylesheet_pages[stylesheet].append(page)
+
+    saved = defaultdict(int)
+    totals = {'rules': 0, 'selectors': 0, 'declarations': 0}
+
+    print(f"✂️  Pruning {len(stylesheet_pages)} stylesheets...")
+    for stylesheet, users in sorted(stylesheet_pages.items()):
+        text = stylesheet.read_text(encoding='utf-8')
+        new_text, stats = prune_text(text, users, matcher)
+        for name in totals:
+            totals[name] += stats[name]
+        delta = len(text.encode('utf-8')) - len(new_text.encode('utf-8'))
+        if not delta:
+            continue
+        print(f"   ✅ {stylesheet.relative_to(BASE_DIR.resolve())}: -{delta:,} bytes "
+              f"({stats['rules']} rules, {stats['selectors']} selectors, "
+              f"{stats['declarations']} declarations) across {len(users)} pages")
+        for page in users:
+            saved[page.path] += delta
+        if not dry_run:
+            stylesheet.write_text(new_text, encoding='utf-8')
+
+    print(f"✂️  Pruning inline <style> blocks in {len(pages)} pages...")
+    for page in pages:
+        pieces = []
+        last = 0
+        for start, end in page.inline_styles():
+            css = page.html[start:end]
+            new_css, stats = prune_text(css, [page], matcher)
+            for name in totals:
+                totals[name] += stats[name]
+            saved[page.path] += len(css.encode('utf-8')) - len(new_css.encode('utf-8'))
+            pieces.append(page.html[last:start])
+            pieces.append(new_css)
+            last = end
+        pieces.append(page.html[last:])
+        new_html = ''.join(pieces)
+        if new_html != page.html and not dry_run:
+            page.path.write_text(new_html, encoding='utf-8')
+
+    print("\n📊 Bytes saved per page:")
+    for path, delta in sorted(saved.items(), key=lambda item: (-item[1], item[0])):
+        if delta:
+            print(f"   {path.relative_to(BASE_DIR)}: {delta:,}")
+    print(f"\n📊 Removed {totals['rules']} rules, {totals['selectors']} selectors and "
+          f"{totals['declarations']} duplicate declarations")
+    if dry_run:
+        print("🔎 Dry run - no files written")
+    return saved
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove unused CSS rules and duplicate declarations')
+    parser.add_argument('--dry-run', action='store_true', help='Report savings without writing files')
+    args = parser.parse_args()
+
+    try:
+        prune_site(dry_run=args.dry_run)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
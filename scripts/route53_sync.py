@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Diff-based Route53 sync engine used by migrate_dns_route53.py
+
+Instead of upserting every record set on every run, sync_zone():
+1. Reads the live zone once with a paginated list_resource_record_sets
+2. Computes the minimal diff against the desired record sets:
+   CREATE for new sets, UPSERT for sets whose TTL or values changed,
+   DELETE for live sets that are no longer wanted (only with prune=True)
+3. Packs the changes into as few change_resource_record_sets calls as
+   Route53's per-request limits allow (MAX_BATCH_RECORDS resource records,
+   MAX_BATCH_VALUE_CHARS value characters; UPSERTs count twice)
+4. Polls the submitted changes concurrently until they are INSYNC
+
+A rerun with nothing to change therefore makes one read call and no writes.
+The zone's own NS and SOA records are never touched.
+
+Record sets are plain dicts in Route53's shape:
+    {'Name': 'www.agroverse.shop.', 'Type': 'CNAME', 'TTL': 3600,
+     'ResourceRecords': [{'Value': 'example.com'}]}
+
+InMemoryRoute53 is a moto-style stand-in implementing the handful of client
+calls used here, persisted to a JSON file, so syncs can be rehearsed offline.
+CountingClient wraps any client and counts read and write calls.
+
+Requirements:
+    pip install boto3
+"""
+
+import json
+import time
+import uuid
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Route53 limits per ChangeResourceRecordSets request
+MAX_BATCH_RECORDS = 1000
+MAX_BATCH_VALUE_CHARS = 32000
+LIST_PAGE_SIZE = 300
+POLL_INTERVAL = 5  # seconds between get_change calls
+POLL_TIMEOUT = 300
+POLL_WORKERS = 4
+PROTECTED_APEX_TYPES = ('NS', 'SOA')
+WRITE_CALLS = ('change_resource_record_sets', 'create_hosted_zone')
+
+
+def normalize_name(name):
+    """Fully qualified, lower-case, with Route53's \\052 escape turned back into '*'."""
+    name = name.replace('\\052', '*').lower()
+    return name if name.endswith('.') else name + '.'
+
+
+def record_key(record_set):
+    return (normalize_name(record_set['Name']), record_set['Type'], record_set.get('SetIdentifier'))
+
+
+def _values(record_set):
+    return sorted(rr['Value'] for rr in record_set.get('ResourceRecords', []))
+
+
+def same_record_set(live, desired):
+    """True if a live set already matches the desired one."""
+    if 'AliasTarget' in live or 'AliasTarget' in desired:
+        return live.get('AliasTarget') == desired.get('AliasTarget')
+    return live.get('TTL') == desired.get('TTL') and _values(live) == _values(desired)
+
+
+def fetch_record_sets(client, zone_id):
+    """Every record set in the zone, following list_resource_record_sets pagination."""
+    record_sets = []
+    params = {'HostedZoneId': zone_id, 'MaxItems': str(LIST_PAGE_SIZE)}
+    while True:
+        response = client.list_resource_record_sets(**params)
+        record_sets.extend(response['ResourceRecordSets'])
+        if not response.get('IsTruncated'):
+            return record_sets
+        params['StartRecordName'] = response['NextRecordName']
+        params['StartRecordType'] = response['NextRecordType']
+        if response.get('NextRecordIdentifier'):
+            params['StartRecordIdentifier'] = response['NextRecordIdentifier']
+        else:
+            params.pop('StartRecordIdentifier', None)
+
+
+def fetch_hosted_zones(client):
+    """Every hosted zone in the account, following list_hosted_zones pagination."""
+    zones = []
+    params = {'MaxItems': '100'}
+    while True:
+        response = client.list_hosted_zones(**params)
+        zones.extend(response['HostedZones'])
+        if not response.get('IsTruncated'):
+            return zones
+        params['Marker'] = response['NextMarker']
+
+
+def find_hosted_zone(client, domain):
+    """Hosted zone id for a domain, or None; one list_hosted_zones_by_name call."""
+    response = client.list_hosted_zones_by_name(DNSName=domain, MaxItems='1')
+    for zone in response.get('HostedZones', []):
+        if normalize_name(zone['Name']) == normalize_name(domain):
+            return zone['Id'].split('/')[-1]
+    return None
+
+
+def compute_diff(live_sets, desired_sets, zone_name, prune=False):
+    """
+    Minimal list of Route53 changes turning live_sets into desired_sets.
+
+    Returns (changes, stale): stale lists the live sets that prune=True
+    would delete, so callers can report them.
+    """
+    zone_name = normalize_name(zone_name)
+    live = {record_key(rs): rs for rs in live_sets}
+    changes = []
+    desired_keys = set()
+    for record_set in desired_sets:
+        key = record_key(record_set)
+        desired_keys.add(key)
+        current = live.get(key)
+        if current is None:
+            changes.append({'Action': 'CREATE', 'ResourceRecordSet': record_set})
+        elif not same_record_set(current, record_set):
+            changes.append({'Action': 'UPSERT', 'ResourceRecordSet': record_set})
+
+    stale = [rs for key, rs in live.items()
+             if key not in desired_keys
+             and not (key[0] == zone_name and key[1] in PROTECTED_APEX_TYPES)]
+    if prune:
+        # Deletes must repeat the live record set exactly
+        changes.extend({'Action': 'DELETE', 'ResourceRecordSet': rs} for rs in stale)
+    return changes, stale
+
+
+def _change_cost(change):
+    """(resource records, value characters) a change counts for against the batch limits."""
+    record_set = change['ResourceRecordSet']
+    values = [rr['Value'] for rr in record_set.get('ResourceRecords', [])]
+    weight = 2 if change['Action'] == 'UPSERT' else 1
+    return weight * max(1, len(values)), weight * sum(len(v) for v in values)
+
+
+def batch_changes(changes, max_records=MAX_BATCH_RECORDS, max_chars=MAX_BATCH_VALUE_CHARS):
+    """
+    Split changes into batches within Route53's per-request limits.
+
+    Deletes go first so a record set can be replaced by one of another type
+    (e.g. A -> CNAME) in the same run.
+    """
+    ordered = sorted(changes, key=lambda c: c['Action'] != 'DELETE')
+    batches = []
+    current, records, chars = [], 0, 0
+    for change in ordered:
+        change_records, change_chars = _change_cost(change)
+        if current and (records + change_records > max_records or chars + change_chars > max_chars):
+            batches.append(current)
+            current, records, chars = [], 0, 0
+        current.append(change)
+        records += change_records
+        chars += change_chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+def wait_for_changes(client, change_ids, interval=POLL_INTERVAL, timeout=POLL_TIMEOUT):
+    """Poll the given change ids concurrently. Returns {change id: final status}."""
+    def poll(change_id):
+        deadline = time.monotonic() + timeout
+        while True:
+            status = client.get_change(Id=change_id)['ChangeInfo']['Status']
+            if status == 'INSYNC' or time.monotonic() >= deadline:
+                return change_id, status
+            time.sleep(interval)
+
+    if not change_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(POLL_WORKERS, len(change_ids))) as executor:
+        return dict(executor.map(poll, change_ids))
+
+
+def sync_zone(client, zone_id, zone_name, desired_sets, prune=False, dry_run=False,
+              wait=True, comment='Synced by migrate_dns_route53.py'):
+    """
+    Bring a hosted zone in line with desired_sets.
+
+    Returns a dict with the computed 'changes', the 'stale' live sets, the
+    submitted 'batches' and the final 'statuses' of the change ids.
+    """
+    live_sets = fetch_record_sets(client, zone_id)
+    changes, stale = compute_diff(live_sets, desired_sets, zone_name, prune=prune)
+    result = {'changes': changes, 'stale': stale, 'batches': batch_changes(changes), 'statuses': {}}
+    if dry_run or not changes:
+        return result
+
+    change_ids = []
+    for batch in result['batches']:
+        response = client.change_resource_record_sets(
+            HostedZoneId=zone_id, ChangeBatch={'Comment': comment, 'Changes': batch})
+        change_ids.append(response['ChangeInfo']['Id'])
+    result['statuses'] = wait_for_changes(client, change_ids) if wait else {i: 'PENDING' for i in change_ids}
+    return result
+
+
+class CountingClient:
+    """Wraps a Route53 client and counts read and write API calls."""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attribute(*args, **kwargs)
+        return counted
+
+    @property
+    def writes(self):
+        return sum(n for name, n in self.calls.items() if name in WRITE_CALLS)
+
+    @property
+    def reads(self):
+        return sum(n for name, n in self.calls.items() if name not in WRITE_CALLS)
+
+
+class InvalidChangeBatch(Exception):
+    pass
+
+
+class InMemoryRoute53:
+    """
+    Local stand-in for the Route53 client calls used by sync_zone() and
+    list_route53_zones.py.
+
+    Zones live in a JSON file ({zone name: [record sets]}) so repeated runs
+    see each other's changes. Changes are validated like Route53 does
+    (CREATE of an existing set and DELETE of a missing or different set
+    fail the whole batch) and report INSYNC immediately.
+    """
+
+    def __init__(self, state_file):
+        self.state_file = Path(state_file)
+        self.zones = {}
+        if self.state_file.exists():
+            self.zones = json.loads(self.state_file.read_text(encoding='utf-8'))
+
+    def _zone_id(self, name):
+        return 'LOCAL' + normalize_name(name).rstrip('.').replace('.', '-').upper()
+
+    def _zone_name(self, zone_id):
+        for name in self.zones:
+            if self._zone_id(name) == zone_id.split('/')[-1]:
+                return name
+        raise KeyError(f"no local hosted zone {zone_id}")
+
+    def _save(self):
+        self.state_file.write_text(json.dumps(self.zones, indent=2) + '\n', encoding='utf-8')
+
+    def create_hosted_zone(self, Name, CallerReference=None, **_):
+        name = normalize_name(Name)
+        self.zones.setdefault(name, [
+            {'Name': name, 'Type': 'NS', 'TTL': 172800,
+             'ResourceRecords': [{'Value': f'ns-{i}.local-route53.test.'} for i in range(1, 5)]},
+            {'Name': name, 'Type': 'SOA', 'TTL': 900,
+             'ResourceRecords': [{'Value': 'ns-1.local-route53.test. hostmaster.local. 1 7200 900 1209600 86400'}]},
+        ])
+        self._save()
+        return {'HostedZone': {'Id': f'/hostedzone/{self._zone_id(name)}', 'Name': name}}
+
+    def list_hosted_zones_by_name(self, DNSName=None, MaxItems='100', **_):
+        names = sorted(self.zones)
+        if DNSName:
+            names = [n for n in names if n >= normalize_name(DNSName)]
+        zones = [{'Id': f'/hostedzone/{self._zone_id(n)}', 'Name': n} for n in names[:int(MaxItems)]]
+        return {'HostedZones': zones, 'IsTruncated': len(names) > int(MaxItems)}
+
+    def _zone_summary(self, name):
+        return {'Id': f'/hostedzone/{self._zone_id(name)}', 'Name': name,
+                'Config': {'PrivateZone': False}, 'ResourceRecordSetCount': len(self.zones[name])}
+
+    def list_hosted_zones(self, Marker=None, MaxItems='100', **_):
+        ids = sorted(self._zone_id(name) for name in self.zones)
+        if Marker:
+            ids = [zone_id for zone_id in ids if zone_id >= Marker]
+        page = ids[:int(MaxItems)]
+        response = {'HostedZones': [self._zone_summary(self._zone_name(zone_id)) for zone_id in page],
+                    'IsTruncated': len(ids) > len(page)}
+        if response['IsTruncated']:
+            response['NextMarker'] = ids[len(page)]
+        return response
+
+    def get_hosted_zone(self, Id):
+        name = self._zone_name(Id)
+        name_servers = [rr['Value'] for rs in self.zones[name]
+                        if rs['Type'] == 'NS' and normalize_name(rs['Name']) == name
+                        for rr in rs['ResourceRecords']]
+        return {'HostedZone': self._zone_summary(name), 'DelegationSet': {'NameServers': name_servers}}
+
+    def list_resource_record_sets(self, HostedZoneId, MaxItems='300', StartRecordName=None,
+                                  StartRecordType=None, StartRecordIdentifier=None, **_):
+        record_sets = sorted(self.zones[self._zone_name(HostedZoneId)], key=record_key_sort)
+        if StartRecordName:
+            start = (_labels(StartRecordName), StartRecordType or '')
+            record_sets = [rs for rs in record_sets if record_key_sort(rs)[:2] >= start]
+        page = record_sets[:int(MaxItems)]
+        response = {'ResourceRecordSets': page, 'IsTruncated': len(record_sets) > len(page)}
+        if response['IsTruncated']:
+            following = record_sets[len(page)]
+            response['NextRecordName'] = following['Name']
+            response['NextRecordType'] = following['Type']
+        return response
+
+    def change_resource_record_sets(self, HostedZoneId, ChangeBatch):
+        name = self._zone_name(HostedZoneId)
+        record_sets = {record_key(rs): rs for rs in self.zones[name]}
+        for change in ChangeBatch['Changes']:
+            record_set = change['ResourceRecordSet']
+            key = record_key(record_set)
+            if change['Action'] == 'CREATE' and key in record_sets:
+                raise InvalidChangeBatch(f"{key[0]} {key[1]} already exists")
+            if change['Action'] == 'DELETE':
+                if key not in record_sets or not same_record_set(record_sets[key], record_set):
+                    raise InvalidChangeBatch(f"{key[0]} {key[1]} not found or different")
+                del record_sets[key]
+            else:
+                record_sets[key] = {**record_set, 'Name': normalize_name(record_set['Name'])}
+        self.zones[name] = list(record_sets.values())
+        self._save()
+        return {'ChangeInfo': {'Id': f'/change/{uuid.uuid4().hex[:14].upper()}', 'Status': 'PENDING'}}
+
+    def get_change(self, Id):
+        return {'ChangeInfo': {'Id': Id, 'Status': 'INSYNC'}}
+
+
+def _labels(name):
+    return tuple(reversed(normalize_name(name).rstrip('.').split('.')))
+
+
+def record_key_sort(record_set):
+    """Route53's listing order: names compared label by label from the right, then type."""
+    return (_labels(record_set['Name']), record_set['Type'], record_set.get('SetIdentifier') or '')
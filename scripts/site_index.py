@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Index of every file the site serves, for the site audit scripts
+
+SiteIndex walks the repository once (skipping the same directories as the
+build scripts) and answers "what would GitHub Pages serve for this URL
+from this page?" with set lookups instead of filesystem calls:
+- 'css/style.css' -> the file
+- 'post/slug/' or 'post/slug' -> post/slug/index.html
+- 'about' -> about.html
+
+extract_references() pulls href/src/srcset/poster references (quoted or
+not) and the id/name anchors out of a page in one pass, ignoring markup
+inside <script> and <style> bodies (string templates there are not links)
+but not the <script src> tags themselves.
+"""
+
+import re
+import posixpath
+from bisect import bisect_right
+from pathlib import Path
+from urllib.parse import unquote
+
+BASE_DIR = Path(__file__).parent.parent
+EXCLUDED_DIRS = {'node_modules', 'docs', '.git', 'google-app-script', 'scripts'}
+
+EXTERNAL_PATTERN = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//)', re.IGNORECASE)
+SKIPPED_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:', 'sms:', 'blob:')
+SCRIPT_STYLE_PATTERN = re.compile(r'(<(script|style)\b[^>]*>)(.*?)(?=</\2\s*>)', re.IGNORECASE | re.DOTALL)
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+ATTR_PATTERN = re.compile(r'([\w-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+REFERENCE_ATTRIBUTES = ('href', 'src', 'srcset', 'poster')
+# The URL in each srcset candidate (descriptors after it are left alone) and in a whole attribute value
+SRCSET_URL_PATTERN = re.compile(r'(?:^|,)\s*([^\s,]+)')
+VALUE_URL_PATTERN = re.compile(r'^\s*(\S(?:.*\S)?)\s*$', re.DOTALL)
+TAG_PATTERN = re.compile(r'<([a-zA-Z][\w-]*)\b([^>]*)>')
+TEMPLATE_MARKERS = ('${', '{{', '{%')
+
+
+def is_excluded(relative_parts):
+    return bool(EXCLUDED_DIRS.intersection(relative_parts))
+
+
+def _blank(match):
+    """Replace a match with spaces and newlines so offsets and line numbers stay put."""
+    return ''.join('\n' if c == '\n' else ' ' for c in match.group(0))
+
+
+def _blank_body(match):
+    """Blank a <script>/<style> body but keep its start tag (and its src)."""
+    return match.group(1) + ''.join('\n' if c == '\n' else ' ' for c in match.group(3))
+
+
+def _iter_attributes(text):
+    """(tag name, attribute name, value, value offset, tag offset) for every attribute with a value."""
+    for tag in TAG_PATTERN.finditer(text):
+        tag_name = tag.group(1).lower()
+        for attr in ATTR_PATTERN.finditer(tag.group(2)):
+            group = next((g for g in (2, 3, 4) if attr.group(g) is not None), None)
+            if group is not None:
+                yield (tag_name, attr.group(1).lower(), attr.group(group),
+                       tag.start(2) + attr.start(group), tag.start())
+
+
+def _blank_markup(html):
+    return SCRIPT_STYLE_PATTERN.sub(_blank_body, COMMENT_PATTERN.sub(_blank, html))
+
+
+def extract_references(html):
+    """
+    ([(attribute, url, line)], anchors) for one page.
+
+    anchors is the set of id and <a name> values a #fragment can target.
+    """
+    text = _blank_markup(html)
+    line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+    references = []
+    anchors = set()
+    for tag_name, name, value, _, offset in _iter_attributes(text):
+        if name == 'id' or (name == 'name' and tag_name == 'a'):
+            anchors.add(value)
+        elif name == 'srcset':
+            line = bisect_right(line_starts, offset)
+            for candidate in value.split(','):
+                url = candidate.strip().split(' ')[0]
+                if url:
+                    references.append((name, url, line))
+        elif name in REFERENCE_ATTRIBUTES:
+            references.append((name, value.strip(), bisect_right(line_starts, offset)))
+    return references, anchors
+
+
+def replace_references(html, replace):
+    """
+    html with reference attribute values rewritten by replace(attribute, url).
+
+    replace returns the new URL or None to keep the old one. Only whole
+    href/src/srcset/poster values (or srcset candidates) are replaced, never
+    the same text elsewhere in the page.
+    """
+    edits = []
+    for _, name, value, value_offset, _ in _iter_attributes(_blank_markup(html)):
+        if name not in REFERENCE_ATTRIBUTES:
+            continue
+        pattern = SRCSET_URL_PATTERN if name == 'srcset' else VALUE_URL_PATTERN
+        for candidate in pattern.finditer(value):
+            new_url = replace(name, candidate.group(1))
+            if new_url is not None and new_url != candidate.group(1):
+                edits.append((value_offset + candidate.start(1), value_offset + candidate.end(1), new_url))
+    for start, end, new_url in reversed(edits):
+        html = html[:start] + new_url + html[end:]
+    return html
+
+
+class SiteIndex:
+    """Every served file under the site root, as POSIX paths relative to it."""
+
+    def __init__(self, root=BASE_DIR):
+        self.root = Path(root)
+        self.files = set()
+        for path in self.root.rglob('*'):
+            relative = path.relative_to(self.root)
+            if is_excluded(relative.parts) or not path.is_file():
+                continue
+            self.files.add(relative.as_posix())
+        self.pages = sorted(f for f in self.files if f.endswith('.html'))
+
+    def resolve(self, url, page):
+        """
+        What a local URL on page (a relative path) points to.
+
+        Returns (kind, target, fragment): kind is 'external', 'skipped',
+        'file', 'missing' or 'outside' (climbs above the site root); target
+        is the served file's relative path for 'file'.
+        """
+        if not url or url.startswith(SKIPPED_SCHEMES) or any(m in url for m in TEMPLATE_MARKERS):
+            return 'skipped', None, None
+        if EXTERNAL_PATTERN.match(url):
+            return 'external', None, None
+        path, _, fragment = url.partition('#')
+        path = unquote(path.split('?')[0])
+        if not path:
+            return 'file', page, fragment
+        if path.startswith('/'):
+            joined = path.lstrip('/')
+        else:
+            joined = posixpath.join(posixpath.dirname(page), path)
+        normalized = posixpath.normpath(joined) if joined else '.'
+        if normalized == '..' or normalized.startswith('../'):
+            return 'outside', None, fragment
+        normalized = '' if normalized == '.' else normalized
+        for candidate in (normalized, posixpath.join(normalized, 'index.html'), normalized + '.html'):
+            if candidate in self.files:
+                if candidate == normalized and path.endswith('/'):
+                    continue  # 'x.html/' is not served
+                return 'file', candidate, fragment
+        return 'missing', normalized, fragment
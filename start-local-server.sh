@@ -19,9 +19,9 @@ if command -v node &> /dev/null; then
         echo ""
         
         if [ -d "node_modules/http-server" ]; then
-            npx http-server -p 8000 -a 127.0.0.1 -c-1
+            npx http-server -p 8000 -a 127.0.0.1 -c-1 --gzip --brotli
         else
-            http-server -p 8000 -a 127.0.0.1 -c-1
+            http-server -p 8000 -a 127.0.0.1 -c-1 --gzip --brotli
         fi
         exit 0
     else
@@ -31,7 +31,7 @@ if command -v node &> /dev/null; then
         echo "Starting server on http://127.0.0.1:8000"
         echo "Press Ctrl+C to stop"
         echo ""
-        npx http-server -p 8000 -a 127.0.0.1 -c-1
+        npx http-server -p 8000 -a 127.0.0.1 -c-1 --gzip --brotli
         exit 0
     fi
 fi